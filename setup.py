@@ -6,7 +6,11 @@ setup(
     packages=find_packages(),
     install_requires=[
         'yfinance',
+        'numpy',
     ],
+    extras_require={
+        'arrow': ['pyarrow'],
+    },
     entry_points={
         'console_scripts': [
             'stock-ratios=stock_ratios.cli:main',  # This will point to the CLI entry point
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+from stock_ratios.batch import BUY, HOLD, SELL, UNAVAILABLE, RECOMMENDATIONS, benchmark_matrices, engine_weights, score_block, recommendations_for
+from stock_ratios.fundamentals import FINANCIALS_LINES, BALANCE_SHEET_LINES, FUNDAMENTAL_FIELDS, FIELD_INDEX, balance_sheet_columns, extract_fundamentals
+from utils.recommendation_engine import RecommendationEngine
+
+# Statement items stored per (ticker, period end) in the local statement history
+HISTORY_FIELDS = tuple(FINANCIALS_LINES) + tuple(BALANCE_SHEET_LINES)
+# Shortest gap between a ticker's periods accepted as annual (fiscal year ends can shift a little)
+MIN_ANNUAL_SPACING_DAYS = 300
+
+
+def statement_history(ticker, balance_sheet, financials):
+    """
+    Turns yfinance statement frames into one row per reported period for the statement history.
+
+    Periods are those of the financials; balances are looked up by period end, and are NaN for
+    periods the balance sheet does not report.
+    """
+    rows = []
+    balance_columns = balance_sheet_columns(balance_sheet, financials)
+    for column, period_end in enumerate(financials.columns):
+        balance_column = balance_columns[column]
+        fundamentals = extract_fundamentals({}, balance_sheet if balance_column is not None else None, financials, column, balance_column)
+        row = {"ticker": ticker, "period_end": pd.Timestamp(period_end)}
+        row.update({field: fundamentals[field] for field in HISTORY_FIELDS})
+        rows.append(row)
+    return rows
+
+
+def save_statement_history(path, rows):
+    pd.DataFrame(rows, columns=["ticker", "period_end"] + list(HISTORY_FIELDS)).to_csv(path, index=False)
+
+
+def load_statement_history(path):
+    return pd.read_csv(path, parse_dates=["period_end"])
+
+
+def load_prices(path):
+    """Loads a "date,ticker,close" CSV price store into a dates x tickers frame."""
+    prices = pd.read_csv(path, parse_dates=["date"])
+    return prices.pivot_table(index="date", columns="ticker", values="close").sort_index()
+
+
+def quarter_ends(start, end):
+    return pd.period_range(start, end, freq="Q").end_time.normalize()
+
+
+def _days(values):
+    return np.asarray(values, dtype="datetime64[D]").astype(np.int64)
+
+
+def _prices_asof(prices, dates):
+    """
+    Each ticker's last close on or before each date, as a (dates, tickers) array (NaN before its
+    first close); tickers without a bar on a date, e.g. on another exchange's holiday, carry
+    their previous close forward.
+    """
+    rows = np.searchsorted(_days(prices.index.values), _days(dates), side="right") - 1
+    values = prices.ffill().to_numpy(dtype=np.float64)
+    result = values[np.clip(rows, 0, None)]
+    result[rows < 0] = np.nan
+    return result
+
+
+class BacktestResult:
+    def __init__(self, dates, tickers, scores, recommendations, forward_returns):
+        self.dates = dates
+        self.tickers = tickers
+        self.scores = scores  # (dates, tickers) overall scores, NaN where no point-in-time data
+        self.recommendations = recommendations  # (dates, tickers) batch.BUY/HOLD/SELL/UNAVAILABLE codes
+        self.forward_returns = forward_returns  # (dates, tickers)
+
+    def summary(self):
+        """Forward-return statistics per recommendation and the average Buy minus Sell spread."""
+        summary = {}
+        for code in (BUY, HOLD, SELL):
+            mask = (self.recommendations == code) & ~np.isnan(self.forward_returns)
+            returns = self.forward_returns[mask]
+            summary[RECOMMENDATIONS[code]] = {
+                "observations": int(mask.sum()),
+                "mean_forward_return": float(returns.mean()) if returns.size else None,
+                "hit_rate": float((returns > 0).mean()) if returns.size else None,
+            }
+
+        spreads = []
+        for row in range(len(self.dates)):
+            returns = self.forward_returns[row]
+            buys = returns[(self.recommendations[row] == BUY) & ~np.isnan(returns)]
+            sells = returns[(self.recommendations[row] == SELL) & ~np.isnan(returns)]
+            if buys.size and sells.size:
+                spreads.append(buys.mean() - sells.mean())
+        summary["buy_minus_sell_spread"] = float(np.mean(spreads)) if spreads else None
+        summary["periods_with_spread"] = len(spreads)
+        return summary
+
+
+def run_backtest(statements, prices, start, end, sectors=None, horizon_days=91, availability_lag_days=45, recommendation_engine=None):
+    """
+    Scores every (quarter-end, ticker) pair using only statements available at that date.
+
+    `statements` is a statement history frame (ticker, period_end and HISTORY_FIELDS), `prices`
+    a dates x tickers close frame and `sectors` an optional {ticker: (sector, industry)} map.
+    A period counts as available `availability_lag_days` after its end. Price-driven valuation
+    inputs are rebuilt from the as-of close and statements; info-only fields such as forward P/E
+    and dividends are left unavailable. All dates x tickers are scored in one vectorized pass.
+
+    Periods must be annual: P/E uses a period's net income as yearly earnings and growth compares
+    it with the period before. Raises ValueError if a ticker's periods are closer together than
+    MIN_ANNUAL_SPACING_DAYS (e.g. a quarterly history).
+    """
+    engine = recommendation_engine or RecommendationEngine()
+    sectors = sectors or {}
+    dates = quarter_ends(start, end)
+    reporting = set(statements["ticker"])
+    tickers = [ticker for ticker in prices.columns if ticker in reporting]
+    ticker_index = {ticker: i for i, ticker in enumerate(tickers)}
+
+    history = statements[statements["ticker"].isin(ticker_index)].copy()
+    history["_ticker"] = history["ticker"].map(ticker_index)
+    history = history.sort_values(["_ticker", "period_end"]).reset_index(drop=True)
+    values = history[list(HISTORY_FIELDS)].to_numpy(dtype=np.float64)
+    history_tickers = history["_ticker"].to_numpy()
+    period_days = _days(history["period_end"].values)
+    available = period_days + availability_lag_days
+
+    # Previous period of the same ticker, for averages and earnings growth
+    previous = np.arange(len(history)) - 1
+    has_previous = (previous >= 0) & (history_tickers[np.clip(previous, 0, None)] == history_tickers)
+    too_close = has_previous & (period_days - period_days[np.clip(previous, 0, None)] < MIN_ANNUAL_SPACING_DAYS)
+    if too_close.any():
+        offenders = sorted(set(history["ticker"].to_numpy()[too_close]))
+        raise ValueError(
+            f"Statement history must hold annual periods, but {len(offenders)} tickers have periods less than "
+            f"{MIN_ANNUAL_SPACING_DAYS} days apart (e.g. {', '.join(offenders[:5])})"
+        )
+
+    # Locate the latest available period for every grid cell with one searchsorted
+    span = 1 << 32
+    history_keys = history_tickers.astype(np.int64) * span + available
+    grid_tickers = np.tile(np.arange(len(tickers)), len(dates))
+    grid_keys = grid_tickers.astype(np.int64) * span + np.repeat(_days(dates.values), len(tickers))
+    order = np.argsort(history_keys, kind="stable")
+    positions = np.searchsorted(history_keys[order], grid_keys, side="right") - 1
+    rows = order[np.clip(positions, 0, None)]
+    found = (positions >= 0) & (history_tickers[rows] == grid_tickers)
+
+    fundamentals = np.full((len(grid_keys), len(FUNDAMENTAL_FIELDS)), np.nan)
+    for i, field in enumerate(HISTORY_FIELDS):
+        fundamentals[found, FIELD_INDEX[field]] = values[rows[found], i]
+    previous_rows = previous[rows]
+    use_previous = found & has_previous[rows]
+    for name in ("total_assets", "inventory"):
+        column = FIELD_INDEX[f"{name}_previous"]
+        fundamentals[:, column] = fundamentals[:, FIELD_INDEX[name]]
+        fundamentals[use_previous, column] = values[previous_rows[use_previous], HISTORY_FIELDS.index(name)]
+    net_income = fundamentals[:, FIELD_INDEX["net_income"]]
+    previous_net_income = np.full(len(grid_keys), np.nan)
+    previous_net_income[use_previous] = values[previous_rows[use_previous], HISTORY_FIELDS.index("net_income")]
+
+    # Point-in-time valuation inputs from the as-of price
+    price = _prices_asof(prices[tickers], dates).ravel()
+    shares = fundamentals[:, FIELD_INDEX["shares_outstanding"]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fundamentals[:, FIELD_INDEX["trailingPE"]] = price / (net_income / shares)
+        fundamentals[:, FIELD_INDEX["priceToBook"]] = price / (fundamentals[:, FIELD_INDEX["equity"]] / shares)
+        fundamentals[:, FIELD_INDEX["priceToSalesTrailing12Months"]] = price * shares / fundamentals[:, FIELD_INDEX["total_revenue"]]
+        fundamentals[:, FIELD_INDEX["earningsQuarterlyGrowth"]] = net_income / previous_net_income - 1
+    fundamentals[~np.isfinite(fundamentals)] = np.nan
+
+    lower, upper = benchmark_matrices(
+        [sectors.get(ticker, (None, None))[0] for ticker in tickers],
+        [sectors.get(ticker, (None, None))[1] for ticker in tickers],
+    )
+    _, _, _, overall = score_block(
+        fundamentals, np.tile(lower, (len(dates), 1)), np.tile(upper, (len(dates), 1)), *engine_weights(engine)
+    )
+
+    scored = found & ~np.isnan(price)
+    overall[~scored] = np.nan
+    recommendations = recommendations_for(overall, engine)
+    recommendations[~scored] = UNAVAILABLE
+
+    forward_dates = dates + pd.Timedelta(days=horizon_days)
+    forward_price = _prices_asof(prices[tickers], forward_dates)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        forward_returns = forward_price / price.reshape(len(dates), len(tickers)) - 1
+    forward_returns[np.asarray(forward_dates > prices.index[-1])] = np.nan  # Horizon not observed yet
+
+    shape = (len(dates), len(tickers))
+    return BacktestResult(dates, tickers, overall.reshape(shape), recommendations.reshape(shape), forward_returns)
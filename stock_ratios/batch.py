@@ -0,0 +1,223 @@
+import numpy as np
+from config.valuation.valuation_config import (
+    INDUSTRY_PE_BENCHMARKS,
+    DEFAULT_PE_BENCHMARK,
+    INDUSTRY_PB_BENCHMARK,
+    INDUSTRY_PS_BENCHMARK,
+    INDUSTRY_PEG_BENCHMARK,
+    INDUSTRY_DIVIDEND_YIELD_BENCHMARK,
+    INDUSTRY_DIVIDEND_PAYOUT_RATIO_BENCHMARK
+)
+from config.profit.profitability_config import (
+    INDUSTRY_ROA_BENCHMARK,
+    INDUSTRY_ROE_BENCHMARK,
+    INDUSTRY_PROFIT_MARGIN_BENCHMARK,
+    INDUSTRY_GROSS_PROFIT_MARGIN_BENCHMARK,
+    DEFAULT_ROA_BENCHMARK,
+    DEFAULT_ROE_BENCHMARK,
+    DEFAULT_PROFIT_MARGIN_BENCHMARK,
+    DEFAULT_GROSS_PROFIT_MARGIN_BENCHMARK
+)
+from config.liquidity.liquidity_config import (
+    INDUSTRY_CURRENT_RATIO_BENCHMARK,
+    INDUSTRY_QUICK_RATIO_BENCHMARK,
+    DEFAULT_CURRENT_RATIO_BENCHMARK,
+    DEFAULT_QUICK_RATIO_BENCHMARK
+)
+from config.debt.debt_config import (
+    INDUSTRY_DEBT_TO_EQUITY_RATIO_BENCHMARK,
+    INDUSTRY_INTEREST_COVERAGE_RATIO_BENCHMARK,
+    DEFAULT_DEBT_TO_EQUITY_RATIO_BENCHMARK,
+    DEFAULT_INTEREST_COVERAGE_RATIO_BENCHMARK
+)
+from config.efficiency.efficiency_config import (
+    INDUSTRY_ASSET_TURNOVER_RATIO_BENCHMARK,
+    INDUSTRY_INVENTORY_TURNOVER_RATIO_BENCHMARK,
+    DEFAULT_ASSET_TURNOVER_RATIO_BENCHMARK,
+    DEFAULT_INVENTORY_TURNOVER_RATIO_BENCHMARK
+)
+from stock_ratios.fundamentals import FUNDAMENTAL_FIELDS, FIELD_INDEX
+from stock_ratios.metrics import registered_metrics
+from utils.benchmark import get_industry_benchmark
+from utils.recommendation_engine import RecommendationEngine
+
+# Column-wise counterpart of the five ratio classes for universe-scale runs:
+# (category, metric, benchmark table, default benchmark, buy_if_below)
+METRICS = (
+    ("Valuation", "P/E Ratio", INDUSTRY_PE_BENCHMARKS, DEFAULT_PE_BENCHMARK, True),
+    ("Valuation", "P/B Ratio", INDUSTRY_PB_BENCHMARK, (1.5, 3.0), True),
+    ("Valuation", "P/S Ratio", INDUSTRY_PS_BENCHMARK, (2.0, 4.0), True),
+    ("Valuation", "PEG Ratio", INDUSTRY_PEG_BENCHMARK, (1.0, 1.2), True),
+    ("Valuation", "Dividend Yield", INDUSTRY_DIVIDEND_YIELD_BENCHMARK, (2.0, 3.0), False),
+    ("Valuation", "Dividend Payout", INDUSTRY_DIVIDEND_PAYOUT_RATIO_BENCHMARK, (30, 50), False),
+    ("Profitability", "ROA", INDUSTRY_ROA_BENCHMARK, DEFAULT_ROA_BENCHMARK, True),
+    ("Profitability", "ROE", INDUSTRY_ROE_BENCHMARK, DEFAULT_ROE_BENCHMARK, True),
+    ("Profitability", "Net Profit Margin", INDUSTRY_PROFIT_MARGIN_BENCHMARK, DEFAULT_PROFIT_MARGIN_BENCHMARK, True),
+    ("Profitability", "Gross Profit Margin", INDUSTRY_GROSS_PROFIT_MARGIN_BENCHMARK, DEFAULT_GROSS_PROFIT_MARGIN_BENCHMARK, True),
+    ("Liquidity", "Current Ratio", INDUSTRY_CURRENT_RATIO_BENCHMARK, DEFAULT_CURRENT_RATIO_BENCHMARK, True),
+    ("Liquidity", "Quick Ratio", INDUSTRY_QUICK_RATIO_BENCHMARK, DEFAULT_QUICK_RATIO_BENCHMARK, True),
+    ("Debt", "Debt-to-Equity Ratio", INDUSTRY_DEBT_TO_EQUITY_RATIO_BENCHMARK, DEFAULT_DEBT_TO_EQUITY_RATIO_BENCHMARK, True),
+    ("Debt", "Interest Coverage Ratio", INDUSTRY_INTEREST_COVERAGE_RATIO_BENCHMARK, DEFAULT_INTEREST_COVERAGE_RATIO_BENCHMARK, False),
+    ("Efficiency", "Asset Turnover Ratio", INDUSTRY_ASSET_TURNOVER_RATIO_BENCHMARK, DEFAULT_ASSET_TURNOVER_RATIO_BENCHMARK, True),
+    ("Efficiency", "Inventory Turnover Ratio", INDUSTRY_INVENTORY_TURNOVER_RATIO_BENCHMARK, DEFAULT_INVENTORY_TURNOVER_RATIO_BENCHMARK, True),
+)
+METRIC_NAMES = tuple(metric for _, metric, _, _, _ in METRICS)
+CATEGORIES = ("Valuation", "Profitability", "Liquidity", "Debt", "Efficiency")
+
+# Recommendation codes and the score RecommendationEngine.calculate_metric_score gives each
+BUY, HOLD, SELL, UNAVAILABLE = 0, 1, 2, 3
+RECOMMENDATIONS = ("Buy", "Hold", "Sell", "Data Unavailable")
+CODE_SCORES = np.array([100.0, 50.0, 0.0, 0.0])
+
+
+def metric_table():
+    """METRICS followed by the registered plugin metrics, in the column order of metric_values."""
+    return METRICS + tuple(
+        (metric.category, metric.name, metric.benchmarks, metric.default_benchmark, metric.buy_if_below)
+        for metric in registered_metrics()
+    )
+
+
+def _ratio(numerator, denominator):
+    return np.where(denominator != 0, numerator / np.where(denominator != 0, denominator, 1.0), np.nan)
+
+
+def fundamentals_matrix(records):
+    """Stacks fundamentals dicts (see extract_fundamentals) into an (n, fields) float64 matrix."""
+    matrix = np.full((len(records), len(FUNDAMENTAL_FIELDS)), np.nan)
+    for row, record in enumerate(records):
+        matrix[row] = [record.get(field, np.nan) for field in FUNDAMENTAL_FIELDS]
+    return matrix
+
+
+def benchmark_matrices(sectors, industries, statistics=None):
+    """
+    Resolves (n, metrics) lower and upper benchmark bounds, looking each sector/industry pair up once.
+
+    With `statistics` (peer_statistics.SectorStatistics) the live peer ranges are used where
+    enough peers have been seen, and the static benchmarks elsewhere.
+    """
+    table = metric_table()
+    lower = np.full((len(sectors), len(table)), np.nan)
+    upper = np.full((len(sectors), len(table)), np.nan)
+    resolved = {}
+    for row, pair in enumerate(zip(sectors, industries)):
+        if pair not in resolved:
+            bounds = []
+            for _, metric, benchmarks, default, _ in table:
+                benchmark = statistics.benchmark(pair[0], pair[1], metric) if statistics is not None else None
+                if benchmark is None:
+                    benchmark = get_industry_benchmark(pair[0], pair[1], benchmarks, default)
+                try:
+                    bounds.append((float(benchmark[0]), float(benchmark[1])))
+                except (TypeError, ValueError, IndexError):
+                    bounds.append((np.nan, np.nan))
+            resolved[pair] = np.array(bounds)
+        lower[row] = resolved[pair][:, 0]
+        upper[row] = resolved[pair][:, 1]
+    return lower, upper
+
+
+def engine_weights(recommendation_engine=None):
+    """Returns (metric weights, metric category indexes, category weights) arrays for an engine."""
+    weights = (recommendation_engine or RecommendationEngine()).weights
+    table = metric_table()
+    metric_weights = np.array([weights.get(category, {}).get(metric, 0.0) for category, metric, _, _, _ in table])
+    metric_categories = np.array([CATEGORIES.index(category) for category, _, _, _, _ in table])
+    category_weights = np.array([sum(weights.get(category, {}).values()) for category in CATEGORIES])
+    return metric_weights, metric_categories, category_weights
+
+
+def metric_values(fundamentals):
+    """Computes every metric column from an (n, fields) fundamentals matrix."""
+    c = {field: fundamentals[:, i] for field, i in FIELD_INDEX.items()}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_total_assets = (c["total_assets"] + c["total_assets_previous"]) / 2
+        avg_inventory = (c["inventory"] + c["inventory_previous"]) / 2
+        positive_equity = np.where(c["equity"] > 0, c["equity"], np.nan)
+        values = [
+            c["trailingPE"],
+            c["priceToBook"],
+            c["priceToSalesTrailing12Months"],
+            _ratio(c["trailingPE"], c["earningsQuarterlyGrowth"]),
+            c["dividendYield"] * 100,
+            c["payoutRatio"] * 100,
+            _ratio(c["net_income"], avg_total_assets) * 100,
+            _ratio(c["net_income"], positive_equity) * 100,
+            _ratio(c["net_income"], c["total_revenue"]) * 100,
+            _ratio(c["gross_profit"], c["total_revenue"]) * 100,
+            _ratio(c["current_assets"], c["current_liabilities"]),
+            _ratio(c["current_assets"] - c["inventory"], c["current_liabilities"]),
+            _ratio(c["total_debt"], c["equity"]),
+            _ratio(c["ebit"], c["interest_expense"]),
+            _ratio(c["total_revenue"], avg_total_assets),
+            _ratio(c["cost_of_revenue"], avg_inventory),
+        ]
+    # Plugin metrics run their formula once over whole columns
+    values += [metric.compute_columns([c[field] for field in metric.inputs]) for metric in registered_metrics()]
+    return np.column_stack(values) if len(fundamentals) else np.empty((0, len(values)))
+
+
+def recommendation_codes(values, lower, upper, fundamentals=None):
+    """Maps (n, metrics) values onto Buy/Hold/Sell/Unavailable codes against their benchmark bounds."""
+    codes = np.full(values.shape, HOLD, dtype=np.int8)
+    buy_if_below = np.array([direction for _, _, _, _, direction in metric_table()])
+    with np.errstate(invalid="ignore"):
+        below = values < lower
+        above = values > upper
+    codes[below & buy_if_below] = BUY
+    codes[above & buy_if_below] = SELL
+    codes[below & ~buy_if_below] = SELL
+    codes[above & ~buy_if_below] = BUY
+    codes[np.isnan(values) | np.isnan(lower) | np.isnan(upper)] = UNAVAILABLE
+
+    if fundamentals is not None:
+        # P/E looks at both trailing and forward P/E, mirroring ValuationRatios.get_pe_ratio
+        trailing = fundamentals[:, FIELD_INDEX["trailingPE"]]
+        forward = fundamentals[:, FIELD_INDEX["forwardPE"]]
+        pe_lower, pe_upper = lower[:, 0], upper[:, 0]
+        with np.errstate(invalid="ignore"):
+            pe_codes = np.full(len(values), HOLD, dtype=np.int8)
+            pe_codes[(forward > pe_upper) | (trailing > pe_upper)] = SELL
+            pe_codes[(forward < pe_lower) | (trailing < pe_lower)] = BUY
+        pe_codes[(np.isnan(trailing) & np.isnan(forward)) | np.isnan(pe_lower)] = UNAVAILABLE
+        codes[:, 0] = pe_codes
+    return codes
+
+
+def category_scores(codes, metric_weights, metric_categories):
+    """Weighted (n, categories) scores, skipping zero-score metrics like RecommendationEngine does."""
+    scores = CODE_SCORES[codes]
+    weights = np.where(scores != 0, metric_weights, 0.0)
+    result = np.zeros((len(codes), len(CATEGORIES)))
+    for index in range(len(CATEGORIES)):
+        mask = metric_categories == index
+        numerator = (scores[:, mask] * metric_weights[mask]).sum(axis=1)
+        denominator = weights[:, mask].sum(axis=1)
+        result[:, index] = np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1.0), 0.0)
+    return result
+
+
+def overall_scores(category_score_matrix, category_weights):
+    """Combines (n, categories) scores into overall scores, skipping zero-score categories."""
+    weights = np.where(category_score_matrix != 0, category_weights, 0.0)
+    numerator = (category_score_matrix * weights).sum(axis=1)
+    denominator = weights.sum(axis=1)
+    return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1.0), 0.0)
+
+
+def score_block(fundamentals, lower, upper, metric_weights, metric_categories, category_weights):
+    """Runs the full ratio and scoring pipeline on a block of rows and returns its output arrays."""
+    values = metric_values(fundamentals)
+    codes = recommendation_codes(values, lower, upper, fundamentals)
+    categories = category_scores(codes, metric_weights, metric_categories)
+    return values, codes, categories, overall_scores(categories, category_weights)
+
+
+def recommendations_for(scores, recommendation_engine=None):
+    """Maps a score array onto Buy/Hold/Sell using the engine's thresholds, as an array of codes."""
+    thresholds = (recommendation_engine or RecommendationEngine()).thresholds
+    codes = np.full(np.shape(scores), SELL, dtype=np.int8)
+    codes[scores >= thresholds["Hold"]] = HOLD
+    codes[scores >= thresholds["Buy"]] = BUY
+    return codes
@@ -1,16 +1,48 @@
+import os
 import sys
 import json
 import argparse
 from stock_ratios.core import StockRatios
+from stock_ratios.distributed import SQLiteWorkQueue, DirectorySink, Coordinator, Worker
+from stock_ratios.warehouse import ResultsWarehouse
+from stock_ratios.results import read_results
+from stock_ratios.summary import summarize, summarize_stream
+from stock_ratios.watch import WatchlistMonitor, RecommendationStateStore, StdoutEmitter, FileEmitter, WebhookEmitter
+from utils.universe import load_tickers
+from utils.symbols import SymbolIndex, InvalidTickerError
+from utils import events
+from utils.tracing import span
 from rich.console import Console
 from rich.table import Table
 
-def get_ratios(ticker):
-    stock_ratios = StockRatios(ticker)
-    ratios = stock_ratios.fetch_all_ratios()
-    
+def _start_tracing(target):
+    """Exports trace spans to a JSON-lines file or an OTLP/HTTP collector URL until the process exits."""
+    import atexit
+    from utils import tracing
+    tracing.configure(tracing.exporter_for(target))
+    atexit.register(tracing.shutdown)
+
+def _configure_events(level):
+    """Writes sampled events at or above `level` to stderr and their aggregate counts at exit."""
+    import atexit
+    sink = events.configure(events.LEVELS[level])
+    atexit.register(sink.write_summary)
+
+def get_ratios(ticker, ttm=False, timeout=None):
     console = Console()
 
+    with span("ticker", ticker=ticker, ttm=ttm), events.ticker_scope(ticker):
+        try:
+            stock_ratios = StockRatios(ticker, ttm=ttm)
+            ratios = stock_ratios.fetch_all_ratios(timeout=timeout)
+        except InvalidTickerError as e:
+            console.print(f"[red]Invalid ticker[/red] {e}")
+            return None
+        with span("render", ticker=ticker):
+            render_ratios(console, ratios)
+    return ratios
+
+def render_ratios(console, ratios):
     # Displaying the detailed ratio tables
     for category, data in ratios["analysis_result"].items():
         table = Table(title=f"{category} Ratios")
@@ -59,199 +91,392 @@ def get_ratios(ticker):
 
     console.print(recommendation_table)
 
-# def summarize_stock_ratios(ticker):
-#     """
-#     Summarizes stock ratios by categorizing metrics into Above Benchmark, Below Benchmark, 
-#     and Unavailable, and counts overall recommendations (Buy, Sell, Hold), 
-#     while assigning a priority number to each ratio.
-    
-#     Args:
-#         ticker (str): Stock ticker symbol.
-#         ratios (dict): Dictionary containing stock ratios.
-        
-#     Returns:
-#         dict: Summary of ratios, recommendations, and priorities in JSON format.
-#     """
-
-#     try:
-#         stock_ratios = StockRatios(ticker)
-#         ratios = stock_ratios.fetch_all_ratios()
-#         print(f"Stock Ratios for {ticker}:")
-#         print(f"{ratios}")
-#         summary = {}
-#         overall_recommendations = {"Buy": 0, "Sell": 0, "Hold": 0}
-#         ratio_priorities = {}
-
-#         # Loop through each category (e.g., "Valuation", "Profitability", etc.)
-#         for category, metrics in ratios.items():
-#             category_summary = {"Above Benchmark": [], "Below Benchmark": [], "Unavailable": []}
-
-#             # Loop through each metric (e.g., "P/E Ratio", "P/B Ratio", etc.)
-#             for metric, details in metrics.items():
-#                 # Determine comparison priority (Above Benchmark, Below Benchmark, or Unavailable)
-#                 comparison = None
-#                 for key in details:
-#                     if 'comparison' in key.lower():
-#                         comparison = details[key]
-#                         break
-#                 comparison = comparison or "Unavailable"  # Default to "Unavailable" if no comparison is found
-
-#                 # Determine recommendation priority
-#                 recommendation = details.get("Recommendation") or details.get("recommendation", "Hold")
-                
-#                 # Priority assignment for comparison and recommendation
-#                 comparison_priority = {"Above Benchmark": 1, "Below Benchmark": 2, "Unavailable": 3}.get(comparison, 3)
-#                 recommendation_priority = {"Buy": 1, "Sell": 2, "Hold": 3}.get(recommendation.split()[0], 3)
-                
-#                 # Calculate final priority by summing comparison and recommendation priorities
-#                 final_priority = comparison_priority + recommendation_priority
-
-#                 # Store the ratio and its priority
-#                 ratio_priorities[metric] = final_priority
-
-#                 # Categorize the metric based on its comparison
-#                 if comparison == "Above Benchmark":
-#                     category_summary["Above Benchmark"].append((metric, final_priority))
-#                 elif comparison == "Below Benchmark":
-#                     category_summary["Below Benchmark"].append((metric, final_priority))
-#                 else:
-#                     category_summary["Unavailable"].append((metric, final_priority))
-
-#                 # Tally recommendations
-#                 if recommendation.lower().startswith("buy"):
-#                     overall_recommendations["Buy"] += 1
-#                 elif recommendation.lower().startswith("sell"):
-#                     overall_recommendations["Sell"] += 1
-#                 else:
-#                     overall_recommendations["Hold"] += 1
-
-#             # Store the category summary
-#             summary[category] = category_summary
-
-#         # Construct the final result
-#         result = {
-#             "Stock": ticker,
-#             "Summary": summary,
-#             "Overall Recommendations": overall_recommendations,
-#             "Ratio Priorities": ratio_priorities  # Include ratio priorities
-#         }
-
-#         # Print the final result in a nicely formatted JSON
-#         print(json.dumps(result, indent=4))
-#         # return result  # Return the result for further use or API response
-
-#     except Exception as e:
-#         error_result = {
-#             "Stock": ticker,
-#             "Summary": "Error occurred",
-#             "Error": str(e),
-#         }
-#         print(json.dumps(error_result, indent=4))
-#         # return error_result  # Return error details if an exception occurs
-def summarize_stock_ratios(ticker):
+def summarize_stock_ratios(ticker, ratios=None):
     """
-    Summarizes stock ratios by categorizing metrics into Above Benchmark, Below Benchmark, 
-    and Unavailable, and counts overall recommendations (Buy, Sell, Hold), 
-    while assigning a priority number to each ratio.
-    
+    Summarizes stock ratios by categorizing metrics by benchmark comparison, counting
+    recommendations (Buy, Sell, Hold) and assigning a priority number to each ratio.
+
     Args:
         ticker (str): Stock ticker symbol.
-        
+        ratios (dict): Already computed fetch_all_ratios result; fetched only if not given.
+
     Returns:
-        dict: Summary of ratios, recommendations, and priorities in JSON format.
+        dict: Summary of ratios, recommendations, and priorities.
     """
-
     try:
-        stock_ratios = StockRatios(ticker)
-        ratios = stock_ratios.fetch_all_ratios()
-        print(f"Stock Ratios for {ticker}:")
-        print(json.dumps(ratios, indent=2))
-        summary = {}
-        overall_recommendations = {"Buy": 0, "Sell": 0, "Hold": 0}
-        ratio_priorities = {}
-
-        # Define weights for comparison and recommendation priorities
-        comparison_weight = 0.6
-        recommendation_weight = 0.4
-
-        # Loop through each category (e.g., "Valuation", "Profitability", etc.)
-        for category, metrics in ratios.items():
-            category_summary = {"Above Benchmark": [], "Below Benchmark": [], "Unavailable": []}
-
-            # Loop through each metric (e.g., "P/E Ratio", "P/B Ratio", etc.)
-            for metric, details in metrics.items():
-                # Determine comparison priority (Above Benchmark, Below Benchmark, or Unavailable)
-                comparison = None
-                for key in details:
-                    if 'comparison' in key.lower():
-                        comparison = details[key]
-                        break
-                comparison = comparison or "Unavailable"  # Default to "Unavailable" if no comparison is found
-
-                # Determine recommendation priority
-                recommendation = details.get("Recommendation") or details.get("recommendation", "Hold")
-                
-                # Assign weights to comparison and recommendation priorities
-                comparison_priority = {"Above Benchmark": 1, "Below Benchmark": 2, "Unavailable": 3}.get(comparison, 3)
-                recommendation_priority = {"Buy": 1, "Sell": 2, "Hold": 3}.get(recommendation.split()[0], 3)
-                
-                # Calculate weighted final priority
-                final_priority = (comparison_weight * comparison_priority) + (recommendation_weight * recommendation_priority)
-
-                # Store the ratio and its priority
-                ratio_priorities[metric] = final_priority
-
-                # Categorize the metric based on its comparison
-                if comparison == "Above Benchmark":
-                    category_summary["Above Benchmark"].append((metric, final_priority))
-                elif comparison == "Below Benchmark":
-                    category_summary["Below Benchmark"].append((metric, final_priority))
-                else:
-                    category_summary["Unavailable"].append((metric, final_priority))
-
-                # Tally recommendations
-                if recommendation.lower().startswith("buy"):
-                    overall_recommendations["Buy"] += 1
-                elif recommendation.lower().startswith("sell"):
-                    overall_recommendations["Sell"] += 1
-                else:
-                    overall_recommendations["Hold"] += 1
-
-            # Store the category summary
-            summary[category] = category_summary
-
-        # Construct the final result
-        result = {
-            "Stock": ticker,
-            "Summary Statement": f"{ticker} has a mix of above and below benchmark ratios, with a total of {sum(overall_recommendations.values())} recommendations.",
-            "Summary": summary,
-            "Overall Recommendations": overall_recommendations,
-            "Ratio Priorities": {
-                "Priorities": ratio_priorities,
-                "Description": "The priority scores are calculated based on the comparison and recommendation priorities."
-            }
-        }
-
-        # Print the final result in a nicely formatted JSON
-        print(json.dumps(result, indent=4))
-        # return result  # Return the result for further use or API response
-
+        if ratios is None:
+            ratios = StockRatios(ticker).fetch_all_ratios()
+        return summarize(ratios)
     except Exception as e:
-        error_result = {
+        return {
             "Stock": ticker,
             "Summary": "Error occurred",
             "Error": str(e),
         }
-        print(json.dumps(error_result, indent=4))
 
-def main():
+def summarize_results(argv):
+    parser = argparse.ArgumentParser(prog="stock-ratios summarize", description="Summarize existing results per ticker and across the universe")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--results', help="JSON-lines results file (e.g. from coordinator --output)")
+    source.add_argument('--sink', help="Result sink directory written by workers")
+    parser.add_argument('--per-ticker', default=None, help="Write per-ticker summaries to this JSON-lines file")
+
+    args = parser.parse_args(argv)
+
+    results = read_results(args.results) if args.results else iter(DirectorySink(args.sink))
+    output = open(args.per_ticker, "w") if args.per_ticker else None
+    on_ticker = (lambda summary: output.write(json.dumps(summary) + "\n")) if output else None
+    universe = summarize_stream(results, on_ticker)
+    if output:
+        output.close()
+    print(json.dumps(universe, indent=4))
+
+def watch(argv):
+    parser = argparse.ArgumentParser(prog="stock-ratios watch", description="Emit recommendation changes for a watchlist")
+    parser.add_argument('--watchlist', required=True, help="File with one ticker per line")
+    parser.add_argument('--interval', type=float, default=300, help="Seconds between rescoring cycles")
+    parser.add_argument('--cycles', type=int, default=None, help="Stop after this many cycles (default: run forever)")
+    parser.add_argument('--state', default=None, help="File used to persist the previous recommendations")
+    parser.add_argument('--output', default=None, help="Append transitions to this file instead of stdout")
+    parser.add_argument('--webhook', default=None, help="Also POST transitions to this URL")
+    parser.add_argument('--trace', default=None, help="Write trace spans to this file (OTLP JSON lines) or POST them to this collector URL")
+    parser.add_argument('--log-level', choices=list(events.LEVELS), default="warning", help="Lowest level of events written to stderr (quiet: none)")
+
+    args = parser.parse_args(argv)
+    _configure_events(args.log_level)
+    if args.trace:
+        _start_tracing(args.trace)
+
+    emitters = [FileEmitter(args.output) if args.output else StdoutEmitter()]
+    if args.webhook:
+        emitters.append(WebhookEmitter(args.webhook))
+
+    monitor = WatchlistMonitor(load_tickers(args.watchlist), RecommendationStateStore(args.state), emitters)
+    monitor.run(args.interval, args.cycles)
+
+def coordinator(argv):
+    parser = argparse.ArgumentParser(prog="stock-ratios coordinator", description="Shard a universe across workers and aggregate the results")
+    parser.add_argument('--universe', required=True, help="File with one ticker per line")
+    parser.add_argument('--queue', required=True, help="Work queue database shared with the workers")
+    parser.add_argument('--sink', required=True, help="Directory the workers write results to")
+    parser.add_argument('--shard-size', type=int, default=50, help="Tickers per shard")
+    parser.add_argument('--max-attempts', type=int, default=3, help="Attempts per ticker before giving up")
+    parser.add_argument('--output', default=None, help="Write the aggregated results to this JSON-lines file")
+    parser.add_argument('--known-symbols', default=None, help="File of known tickers; others are rejected without fetching")
+    parser.add_argument('--warehouse', default=None, help="Also append the results to this results warehouse database")
+    parser.add_argument('--replace-run', action='store_true', help="With --warehouse, overwrite results already stored for today's run date")
+
+    args = parser.parse_args(argv)
+
+    symbols = SymbolIndex.from_file(args.known_symbols) if args.known_symbols else None
+    run = Coordinator(SQLiteWorkQueue(args.queue), DirectorySink(args.sink), args.shard_size, args.max_attempts, symbols=symbols)
+    try:
+        shards = run.submit(load_tickers(args.universe))
+    except ValueError as e:
+        parser.error(f"{e}; use a new --queue and an empty --sink for each run")
+    print(f"Submitted {shards} shards, waiting for workers...")
+    run.wait()
+
+    completed = 0
+    output = open(args.output, "w") if args.output else None
+    for result in run.aggregate():
+        completed += 1
+        if output:
+            output.write(json.dumps(result, default=str) + "\n")
+    if output:
+        output.close()
+    print(json.dumps({"completed": completed, "failed": run.failed}, indent=4))
+    if args.warehouse:
+        store = ResultsWarehouse(args.warehouse)
+        try:
+            store.append_run(run.aggregate(), replace=args.replace_run)
+        except ValueError as e:
+            parser.error(f"{e}; pass --replace-run to overwrite them")
+        finally:
+            store.close()
+
+def worker(argv):
+    parser = argparse.ArgumentParser(prog="stock-ratios worker", description="Process shards from a coordinator's work queue")
+    parser.add_argument('--queue', required=True, help="Work queue database shared with the coordinator")
+    parser.add_argument('--sink', required=True, help="Directory to write results to")
+    parser.add_argument('--worker-id', default=None, help="Identifier used for leases (default: host:pid)")
+    parser.add_argument('--lease', type=float, default=600, help="Seconds a leased shard stays reserved")
+    parser.add_argument('--trace', default=None, help="Write trace spans to this file (OTLP JSON lines) or POST them to this collector URL")
+    parser.add_argument('--log-level', choices=list(events.LEVELS), default="warning", help="Lowest level of events written to stderr (quiet: none)")
+
+    args = parser.parse_args(argv)
+    _configure_events(args.log_level)
+    if args.trace:
+        _start_tracing(args.trace)
+
+    processed = Worker(SQLiteWorkQueue(args.queue), DirectorySink(args.sink), args.worker_id, lease_seconds=args.lease).run()
+    print(f"Processed {processed} shards")
+
+def snapshot(argv):
+    parser = argparse.ArgumentParser(prog="stock-ratios snapshot", description="Export a universe to a memory-mappable Arrow snapshot")
+    parser.add_argument('--universe', required=True, help="File with one ticker per line")
+    parser.add_argument('--output', required=True, help="Snapshot file to write (Arrow IPC / Feather v2)")
+
+    args = parser.parse_args(argv)
+
+    from stock_ratios.snapshot import collect_universe, write_snapshot
+    results, fundamentals, failed = collect_universe(load_tickers(args.universe))
+    rows = write_snapshot(args.output, results, fundamentals)
+    print(json.dumps({"written": rows, "output": args.output, "failed": failed}, indent=4))
+
+def backtest(argv):
+    parser = argparse.ArgumentParser(prog="stock-ratios backtest", description="Backtest the recommendation model on point-in-time statements")
+    parser.add_argument('--statements', required=True, help="Statement history CSV (ticker, period_end, line items) or fundamentals store directory")
+    parser.add_argument('--prices', required=True, help="Price store CSV (date, ticker, close)")
+    parser.add_argument('--start', required=True, help="First rebalance date, e.g. 2015-01-01")
+    parser.add_argument('--end', required=True, help="Last rebalance date, e.g. 2024-12-31")
+    parser.add_argument('--sectors', default=None, help="Optional CSV of ticker, sector, industry for benchmarks")
+    parser.add_argument('--horizon', type=int, default=91, help="Forward return horizon in days")
+    parser.add_argument('--lag', type=int, default=45, help="Days after period end before statements count as published")
+
+    args = parser.parse_args(argv)
+
+    import csv
+    from stock_ratios.backtest import load_statement_history, load_prices, run_backtest
+    sectors = {}
+    if args.sectors:
+        with open(args.sectors) as f:
+            sectors = {row["ticker"]: (row["sector"], row["industry"]) for row in csv.DictReader(f)}
+
+    if os.path.isdir(args.statements):
+        from stock_ratios.fundamentals_store import FundamentalsStore
+        statements = FundamentalsStore(args.statements).history(end=args.end)
+    else:
+        statements = load_statement_history(args.statements)
+    try:
+        result = run_backtest(
+            statements, load_prices(args.prices), args.start, args.end,
+            sectors=sectors, horizon_days=args.horizon, availability_lag_days=args.lag,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(result.summary(), indent=4))
+
+def ingest(argv):
+    parser = argparse.ArgumentParser(prog="stock-ratios ingest", description="Append new statement periods of a universe to the fundamentals store")
+    parser.add_argument('--universe', required=True, help="File with one ticker per line")
+    parser.add_argument('--store', required=True, help="Fundamentals store directory (Parquet, partitioned by market and quarter)")
+    parser.add_argument('--batch', type=int, default=500, help="Tickers per written batch of files")
+
+    args = parser.parse_args(argv)
+
+    from stock_ratios.fundamentals_store import FundamentalsStore
+    store = FundamentalsStore(args.store)
+    added = 0
+    failed = {}
+    for count, ticker in enumerate(load_tickers(args.universe), 1):
+        try:
+            store.ingest(ticker)
+        except Exception as e:
+            failed[ticker] = str(e)
+        if count % args.batch == 0:
+            added += store.flush()
+    added += store.flush()
+    print(json.dumps({"periods_added": added, "failed": failed, "partitions": len(store.partitions())}, indent=4))
+
+def score(argv):
+    parser = argparse.ArgumentParser(prog="stock-ratios score", description="Score a universe with the batch engine")
+    parser.add_argument('--universe', required=True, help="File with one ticker per line")
+    parser.add_argument('--output', default=None, help="Write one compact result per ticker to this JSON-lines file")
+    parser.add_argument('--processes', type=int, default=None, help="Score across this many processes")
+    parser.add_argument('--float64', action='store_true', help="Store fundamentals as float64 instead of float32")
+    parser.add_argument('--ttm', action='store_true', help="Score trailing-twelve-month figures from quarterly statements")
+    parser.add_argument('--refresh-state', default=None, help="Directory keeping statements between runs; they are refetched only when a new filing is expected")
+    parser.add_argument('--calendar', default=None, help="With --refresh-state, CSV of ticker,date results announcements")
+    parser.add_argument('--trace', default=None, help="Write trace spans to this file (OTLP JSON lines) or POST them to this collector URL")
+    parser.add_argument('--log-level', choices=list(events.LEVELS), default="warning", help="Lowest level of events written to stderr (quiet: none)")
+
+    args = parser.parse_args(argv)
+    _configure_events(args.log_level)
+    if args.trace:
+        _start_tracing(args.trace)
+
+    import numpy as np
+    from stock_ratios.store import UniverseStore
+    planner = None
+    if args.refresh_state:
+        from utils.data_fetcher import default_fetcher
+        from utils.refresh_planner import RefreshPlanner, load_calendar
+        planner = RefreshPlanner(args.refresh_state, load_calendar(args.calendar) if args.calendar else None)
+        default_fetcher.planner = planner
+    store = UniverseStore(np.float64 if args.float64 else np.float32)
+    failed = {}
+    for ticker in load_tickers(args.universe):
+        try:
+            store.load(ticker, ttm=args.ttm)
+        except Exception as e:
+            failed[ticker] = str(e)
+    if planner:
+        planner.save()
+
+    completed = 0
+    output = open(args.output, "w") if args.output else None
+    for result in store.results(processes=args.processes):
+        completed += 1
+        if output:
+            output.write(json.dumps(result) + "\n")
+    if output:
+        output.close()
+    print(json.dumps({"completed": completed, "failed": failed, "memory": store.memory_usage()}, indent=4))
+
+def warm(argv):
+    parser = argparse.ArgumentParser(prog="stock-ratios warm", description="Pre-fetch a universe into the shared cache")
+    parser.add_argument('--universe', required=True, help="File with one ticker per line")
+    parser.add_argument('--cache', default=None, help="Shared cache database (default: $STOCK_RATIOS_CACHE)")
+    parser.add_argument('--rate', type=float, default=1.0, help="Downloads per second")
+    parser.add_argument('--min-remaining', type=float, default=60, help="Refresh entries expiring within this many minutes (capped at half of each dataset's TTL)")
+    parser.add_argument('--nice', type=int, default=10, help="Increment to this process's niceness")
+
+    args = parser.parse_args(argv)
+
+    from utils.cache_warmer import CacheWarmer
+    from utils.data_fetcher import SHARED_CACHE_ENV
+    from utils.shared_cache import SharedCache
+    path = args.cache or os.environ.get(SHARED_CACHE_ENV)
+    if not path:
+        parser.error(f"give --cache or set {SHARED_CACHE_ENV}")
+    if args.nice and hasattr(os, "nice"):
+        os.nice(args.nice)
+
+    tickers = load_tickers(args.universe)
+    warmer = CacheWarmer(SharedCache(path), rate=args.rate, min_remaining=args.min_remaining * 60)
+    warmed, failed = warmer.run(tickers)
+    print(json.dumps({"warmed": warmed, "failed": failed, "coverage": warmer.coverage(tickers)}, indent=4))
+
+def history(argv):
+    parser = argparse.ArgumentParser(prog="stock-ratios history", description="Query the results warehouse")
+    parser.add_argument('ticker', nargs='?', default=None, help="Show the score history of this ticker")
+    parser.add_argument('--warehouse', required=True, help="Results warehouse database")
+    parser.add_argument('--changed', nargs=2, metavar=('FROM', 'TO'), default=None, help="List tickers whose recommendation changed between two run dates")
+    parser.add_argument('--category', default=None, help="With --changed, compare this category's recommendation instead of the overall one")
+
+    args = parser.parse_args(argv)
+    if not args.ticker and not args.changed:
+        parser.error("give a ticker or --changed FROM TO")
+
+    store = ResultsWarehouse(args.warehouse)
+    console = Console()
+    if args.ticker:
+        table = Table(title=f"{args.ticker} Score History")
+        table.add_column("Run Date", style="cyan")
+        table.add_column("Overall Score", style="magenta")
+        table.add_column("Overall Recommendation", style="green")
+        for run_date, score, recommendation in store.score_history(args.ticker):
+            table.add_row(run_date, str(score), recommendation)
+        console.print(table)
+    if args.changed:
+        table = Table(title=f"Recommendation Changes {args.changed[0]} -> {args.changed[1]}")
+        table.add_column("Ticker", style="cyan")
+        table.add_column("From", style="magenta")
+        table.add_column("To", style="green")
+        for row in store.recommendation_changes(*args.changed, category=args.category):
+            table.add_row(*(str(value) for value in row))
+        console.print(table)
+    store.close()
+
+def top(argv):
+    parser = argparse.ArgumentParser(prog="stock-ratios top", description="Rank tickers by overall score or a metric from stored results")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--warehouse', help="Results warehouse database")
+    source.add_argument('--snapshot', help="Universe snapshot file")
+    source.add_argument('--results', help="JSON-lines results file (e.g. from coordinator --output)")
+    source.add_argument('--sink', help="Result sink directory written by workers")
+    parser.add_argument('--metric', default="overall_score", help="Metric to rank by, e.g. \"Interest Coverage Ratio\" (default: overall score)")
+    parser.add_argument('-k', '--count', type=int, default=50, help="Tickers to keep per group")
+    parser.add_argument('--lowest', action='store_true', help="Rank the lowest values first")
+    parser.add_argument('--sector', default=None, help="Only rank tickers of this sector")
+    parser.add_argument('--industry', default=None, help="Only rank tickers of this industry")
+    parser.add_argument('--group-by', choices=["sector", "industry"], default=None, help="Rank within each sector or industry")
+    parser.add_argument('--run-date', default=None, help="With --warehouse, the run to rank (default: latest)")
+    parser.add_argument('--json', action='store_true', help="Print JSON instead of tables")
+
+    args = parser.parse_args(argv)
+    if args.count < 1:
+        parser.error("-k/--count must be at least 1")
+
+    from stock_ratios.ranking import top_k, metric_names, warehouse_rows, snapshot_rows, result_rows
+    if args.metric not in metric_names():
+        parser.error(f"unknown metric '{args.metric}' (choose from: {', '.join(metric_names())})")
+    store = None
+    try:
+        if args.warehouse:
+            store = ResultsWarehouse(args.warehouse)
+            rows = warehouse_rows(store, args.metric, args.run_date, args.sector, args.industry)
+        elif args.snapshot:
+            from stock_ratios.snapshot import UniverseSnapshot
+            try:
+                rows = snapshot_rows(UniverseSnapshot(args.snapshot), args.metric)
+            except KeyError as e:
+                parser.error(e.args[0])
+        else:
+            rows = result_rows(read_results(args.results) if args.results else iter(DirectorySink(args.sink)), args.metric)
+        ranked = top_k(rows, args.count, args.lowest, args.group_by, args.sector, args.industry)
+    finally:
+        if store is not None:
+            store.close()
+
+    if args.json:
+        print(json.dumps(ranked, indent=4))
+        return
+    console = Console()
+    for group, entries in ranked.items():
+        table = Table(title=f"{'Lowest' if args.lowest else 'Top'} {args.count} by {args.metric} ({group})")
+        table.add_column("Rank", style="cyan")
+        table.add_column("Ticker", style="magenta")
+        table.add_column("Value", style="green")
+        for entry in entries:
+            table.add_row(str(entry["rank"]), entry["ticker"], "" if entry["value"] is None else str(round(entry["value"], 2)))
+        console.print(table)
+
+COMMANDS = {
+    "watch": watch,
+    "coordinator": coordinator,
+    "worker": worker,
+    "snapshot": snapshot,
+    "backtest": backtest,
+    "history": history,
+    "score": score,
+    "summarize": summarize_results,
+    "warm": warm,
+    "ingest": ingest,
+    "top": top,
+}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+        return
+
     parser = argparse.ArgumentParser(description="Fetch stock ratios")
     parser.add_argument('ticker', type=str, help="Stock ticker symbol")
+    parser.add_argument('--ttm', action='store_true', help="Use trailing-twelve-month figures from quarterly statements")
+    parser.add_argument('--warehouse', default=None, help="Also append the result to this results warehouse database")
+    parser.add_argument('--replace-run', action='store_true', help="With --warehouse, overwrite the ticker's result already stored for today")
+    parser.add_argument('--timeout', type=float, default=None, help="Seconds to wait for data; categories still waiting are reported as timed out")
+    parser.add_argument('--trace', default=None, help="Write trace spans to this file (OTLP JSON lines) or POST them to this collector URL")
+    parser.add_argument('--log-level', choices=list(events.LEVELS), default="warning", help="Lowest level of events written to stderr (quiet: none)")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    _configure_events(args.log_level)
+    if args.trace:
+        _start_tracing(args.trace)
     
     # Get the ratios for the given stock ticker
-    get_ratios(args.ticker)
+    ratios = get_ratios(args.ticker, ttm=args.ttm, timeout=args.timeout)
+    if ratios and args.warehouse:
+        store = ResultsWarehouse(args.warehouse)
+        try:
+            store.append_run([ratios], replace=args.replace_run)
+        except ValueError as e:
+            parser.error(f"{e}; pass --replace-run to overwrite them")
+        finally:
+            store.close()
     # summarize_stock_ratios(args.ticker)
 
 if __name__ == "__main__":
@@ -1,18 +1,81 @@
+import contextvars
+import threading
+import time
 from stock_ratios.valuation import ValuationRatios
 from stock_ratios.profitability import ProfitabilityRatios
 from stock_ratios.liquidity import LiquidityRatios
 from stock_ratios.debt import DebtRatios
 from stock_ratios.efficiency import EfficiencyRatios
+from stock_ratios.graph import FundamentalsGraph
+from stock_ratios.metrics import registered_metrics
 from utils.recommendation_engine import RecommendationEngine
+from utils.data_fetcher import fetch_dataset
+from utils import events
+from utils.tracing import span
+
+# Datasets each category needs (info also gives the sector/industry for benchmarks); in TTM
+# mode the statements are built from the quarterly ones
+CATEGORY_DATASETS = {
+    "Valuation": ("info",),
+    "Profitability": ("info", "balance_sheet", "financials", "quarterly_balance_sheet", "quarterly_financials"),
+    "Liquidity": ("info", "balance_sheet", "quarterly_balance_sheet", "quarterly_financials"),  # TTM balances follow the income periods
+    "Debt": ("info", "balance_sheet", "financials", "quarterly_balance_sheet", "quarterly_financials"),
+    "Efficiency": ("info", "balance_sheet", "financials", "quarterly_balance_sheet", "quarterly_financials"),
+}
+TIMED_OUT = "Timed Out"
+
+
+def fetch_concurrently(ticker, datasets, timeout):
+    """
+    Fetches datasets in parallel and waits at most `timeout` seconds for them.
+
+    Returns ({dataset: value} for those that arrived, {dataset: exception} for those that
+    failed). Late downloads keep running on daemon threads and still fill the fetcher cache,
+    but never hold up the caller or interpreter exit.
+    """
+    results = {}
+    errors = {}
+
+    def run(dataset):
+        try:
+            results[dataset] = fetch_dataset(ticker, dataset)
+        except Exception as e:
+            errors[dataset] = e
+
+    # Each thread runs in a copy of the caller's context so its fetch spans nest under the caller's
+    threads = [
+        threading.Thread(target=contextvars.copy_context().run, args=(run, dataset), daemon=True) for dataset in datasets
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+    return dict(results), dict(errors)
 
 class StockRatios:
-    def __init__(self, ticker):
+    def __init__(self, ticker, ttm=False, info=None, balance_sheet=None, financials=None, fundamentals=None):
+        """
+        Sets up the five ratio categories for a ticker.
+
+        With ttm=True the statement-based ratios use trailing-twelve-month figures built from
+        quarterly statements instead of the latest annual report.
+
+        Any of info, balance_sheet and financials can be passed in instead of being fetched;
+        statements may be plain mappings of row label to period values (newest first), and
+        `fundamentals` (canonical fields, see stock_ratios.fundamentals) replaces the
+        statements altogether. Nothing here needs pandas unless a DataFrame is involved.
+        """
         self.ticker = ticker
-        self.valuation = ValuationRatios(ticker)
-        self.profitability = ProfitabilityRatios(ticker)
-        self.liquidity = LiquidityRatios(ticker)
-        self.debt = DebtRatios(ticker)
-        self.efficiency = EfficiencyRatios(ticker)
+        self.ttm = ttm
+        self._has_fundamentals = fundamentals is not None
+        # One graph per ticker, so intermediates shared between categories are computed once
+        self.graph = FundamentalsGraph(ticker, info, balance_sheet, financials, fundamentals, ttm=ttm)
+        self.valuation = ValuationRatios(ticker, graph=self.graph)
+        self.profitability = ProfitabilityRatios(ticker, graph=self.graph)
+        self.liquidity = LiquidityRatios(ticker, graph=self.graph)
+        self.debt = DebtRatios(ticker, graph=self.graph)
+        self.efficiency = EfficiencyRatios(ticker, graph=self.graph)
         self.recommendation_engine = RecommendationEngine()
 
     def get_valuation_ratios(self):
@@ -30,31 +93,79 @@ class StockRatios:
     def get_efficiency_ratios(self): 
         return self.efficiency.fetch_all_ratios()
 
-    def fetch_all_ratios(self):
-        valuation_results = self.get_valuation_ratios()
-        profitability_results = self.get_profitability_ratios()
-        liquidity_results = self.get_liquidity_ratios()
-        debt_results = self.get_debt_ratios()
-        efficiency_results = self.get_efficiency_ratios()
-
-        analysis_results = {
-            "Valuation": valuation_results,
-            "Profitability": profitability_results,
-            "Liquidity": liquidity_results,
-            "Debt": debt_results,
-            "Efficiency": efficiency_results
+    def _missing_datasets(self, timeout):
+        """Fetches the datasets not passed in within `timeout` seconds and returns those still missing."""
+        if self._has_fundamentals:
+            datasets = ("info",)
+        elif self.ttm:
+            datasets = ("info", "quarterly_financials", "quarterly_balance_sheet")
+        else:
+            datasets = ("info", "balance_sheet", "financials")
+        datasets = [dataset for dataset in datasets if not self.graph.has(dataset)]
+        results, errors = fetch_concurrently(self.ticker, datasets, timeout)
+        if errors:
+            raise errors.get("info") or next(iter(errors.values()))  # Failures are not timeouts
+        for dataset, value in results.items():
+            self.graph.provide(dataset, value)
+        return {dataset for dataset in datasets if dataset not in results}
+
+    def fetch_all_ratios(self, timeout=None):
+        """
+        Runs every category and scores the ticker.
+
+        With a `timeout` (seconds) the datasets are fetched concurrently and categories whose
+        data has not arrived by then are reported as "Timed Out" instead of waiting; the overall
+        score then uses the weight of the categories that were scored.
+        """
+        missing = self._missing_datasets(timeout) if timeout is not None else set()
+        if self._has_fundamentals:
+            missing -= {"balance_sheet", "financials"}
+        categories = {
+            "Valuation": self.get_valuation_ratios,
+            "Profitability": self.get_profitability_ratios,
+            "Liquidity": self.get_liquidity_ratios,
+            "Debt": self.get_debt_ratios,
+            "Efficiency": self.get_efficiency_ratios,
         }
+        weights = self.recommendation_engine.weights
+        timed_out = [category for category in categories if missing.intersection(CATEGORY_DATASETS[category])]
+
+        analysis_results = {}
+        for category, get_ratios in categories.items():
+            if category in timed_out:
+                analysis_results[category] = {metric: {"Recommendation": TIMED_OUT} for metric in weights.get(category, {})}
+            else:
+                with span("category", ticker=self.ticker, category=category):
+                    analysis_results[category] = get_ratios()
+        for metric in registered_metrics():
+            if metric.category not in timed_out:
+                with span("ratio", ticker=self.ticker, category=metric.category, ratio=metric.name):
+                    analysis_results[metric.category][metric.name] = metric.evaluate(self.graph)
 
-        overall_score = self.recommendation_engine.calculate_overall_score(analysis_results)
-        overall_recommendation = self.recommendation_engine.get_overall_recommendation(overall_score)
-        category_recommendations = {category: self.recommendation_engine.get_category_recommendation(data, category) for category, data in analysis_results.items()}
+        with span("scoring", ticker=self.ticker) as current:
+            overall_score = self.recommendation_engine.calculate_overall_score(analysis_results)
+            overall_recommendation = self.recommendation_engine.get_overall_recommendation(overall_score)
+            category_recommendations = {
+                category: TIMED_OUT if category in timed_out else self.recommendation_engine.get_category_recommendation(data, category)
+                for category, data in analysis_results.items()
+            }
+            current.set_attribute("overall_recommendation", overall_recommendation)
 
-        return {
+        info = {} if "info" in missing else self.valuation.info
+        results = {
             "ticker": self.ticker,
+            "sector": info.get("sector"),
+            "industry": info.get("industry"),
             "analysis_result": analysis_results,
             "overall_score": overall_score,
             "overall_recommendation": overall_recommendation,
             "category_recommendations": category_recommendations
         }
+        if timed_out:
+            results["timed_out"] = timed_out
+        return results
 
-
+def analyze_ticker(ticker, ttm=False, timeout=None):
+    """Runs the full ratio analysis for a single ticker."""
+    with span("ticker", ticker=ticker, ttm=ttm), events.ticker_scope(ticker):
+        return StockRatios(ticker, ttm=ttm).fetch_all_ratios(timeout=timeout)
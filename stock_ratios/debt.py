@@ -1,66 +1,40 @@
-import yfinance as yf
-import math
 from config.debt.debt_config import (
     INDUSTRY_DEBT_TO_EQUITY_RATIO_BENCHMARK,
     INDUSTRY_INTEREST_COVERAGE_RATIO_BENCHMARK,
     DEFAULT_DEBT_TO_EQUITY_RATIO_BENCHMARK,
     DEFAULT_INTEREST_COVERAGE_RATIO_BENCHMARK
 )
+from stock_ratios.graph import FundamentalsGraph
 from utils.benchmark import (
-    get_industry_benchmark
+    get_industry_benchmark,
+    compare_to_benchmark,
+    recommendation_by_range
 )
+from utils.tracing import span
 
 
 class DebtRatios:
-    def __init__(self, ticker):
+    def __init__(self, ticker, info=None, balance_sheet=None, financials=None, graph=None):
         """
-        Initialize with the stock ticker and fetch relevant financial data.
+        Initialize with the stock ticker and fetch relevant financial data (unless it is passed in).
+
+        A shared FundamentalsGraph can be passed instead so intermediates are computed once per ticker.
         """
         self.ticker = ticker
-        self.stock = yf.Ticker(ticker)
-        self.info = self.stock.info
-        self.balance_sheet = self.stock.balance_sheet
-        # print(f"Balance Sheet Keys for {ticker}: {self.balance_sheet.index.tolist()}")
-        self.financials = self.stock.financials
-
-    def _get_recommendation_by_range(self, value, benchmark_range, buy_if_below=True):
-        if value is None or benchmark_range is None:
-            return "Data Unavailable"
-        try:
-            lower_bound, upper_bound = benchmark_range
-        except TypeError: #Handle the case where benchmark_range is not a tuple
-            return "Data Unavailable"
-
-        if buy_if_below:
-            if value < lower_bound:
-                return "Buy"
-            elif value > upper_bound:
-                return "Sell"
-            else:
-                return "Hold"
-        else:
-            if value > upper_bound:
-                return "Buy"
-            elif value < lower_bound:
-                return "Sell"
-            else:
-                return "Hold"
-
-    def _compare_to_benchmark(self, value, benchmark_range):
-        if value is None or benchmark_range is None:
-            return "Data Unavailable"
-        try:
-            lower_bound, upper_bound = benchmark_range
-        except TypeError:
-            return "Data Unavailable"
-
-        if value > upper_bound:
-            return "Above Benchmark"
-        elif value < lower_bound:
-            return "Below Benchmark"
-        else:
-            return "Within Benchmark"
-        
+        self.graph = graph or FundamentalsGraph(ticker, info, balance_sheet, financials)
+
+    @property
+    def info(self):
+        return self.graph.value("info")
+
+    @property
+    def balance_sheet(self):
+        return self.graph.value("balance_sheet")
+
+    @property
+    def financials(self):
+        return self.graph.value("financials")
+
     def _get_benchmark(self, ratio_type):
         sector = self.info.get("sector")
         industry = self.info.get("industry")
@@ -71,22 +45,6 @@ class DebtRatios:
         else:
             return None
 
-    def _get_financial_data(self, statement, keys):
-        """
-        Generic function to get financial data given a list of possible keys.
-        """
-        if statement is None or statement.empty:
-            return None
-        for key in keys:
-            try:
-                value = statement.loc[key].iloc[0]
-                if not (isinstance(value, (int, float)) and not math.isnan(value)):
-                    continue  # Skip if value is not a valid number
-                return value
-            except KeyError:
-                continue
-        return None
-
     def _calculate_ratio(self, numerator, denominator):
         """
         Utility function to calculate a ratio and handle zero or None values.
@@ -97,38 +55,19 @@ class DebtRatios:
 
     def get_total_debt(self):
         """Fetch the latest Total Debt."""
-        possible_keys = ['Total Debt', 'Net Debt','totalDebt', 'Total Liabilities Net Minority Interest', 'Total Liabilities','totalLiabilities', 'Liabilities', 'Long Term Debt And Capital Lease Obligation', 'Long Term Debt', 'Current Debt And Capital Lease Obligation', 'Current Debt']
-        return self._get_financial_data(self.balance_sheet, possible_keys)
+        return self.graph.value("total_debt")
 
     def get_total_equity(self):
-        """Fetch the latest Total Equity."""
-        possible_keys = ['Total Equity Gross Minority Interest', 'Stockholders Equity', 'Common Stock Equity', 'Total Equity', 'totalEquity', "Stockholders' Equity", "stockholdersEquity", "Equity"]
-        equity = self._get_financial_data(self.balance_sheet, possible_keys)
-        if equity is None:  # Try calculating if not found directly
-            total_assets = self._get_financial_data(self.balance_sheet, ['Total Assets', 'totalAssets', 'Assets'])
-            total_liabilities = self._get_financial_data(self.balance_sheet, ['Total Liabilities Net Minority Interest','Total Liabilities', 'totalLiabilities', 'Liabilities'])
-
-            if total_assets is not None and total_liabilities is not None:
-                equity = total_assets - total_liabilities
-        return equity
+        """Fetch the latest Total Equity (Total Assets - Total Liabilities if not reported)."""
+        return self.graph.value("equity")
 
     def get_ebit(self):
-        """Fetch the latest EBIT (Earnings Before Interest and Taxes)."""
-        possible_keys = ['EBIT', 'ebit', 'Operating Income', 'operatingIncome']
-        ebit = self._get_financial_data(self.financials, possible_keys)
-        if ebit is None:
-            operating_income_keys = ['Operating Income', 'operatingIncome']
-            operating_income = self._get_financial_data(self.financials, operating_income_keys)
-            interest_expense_keys = ['Interest Expense', 'interestExpense']
-            interest_expense = self._get_financial_data(self.financials, interest_expense_keys)
-            if operating_income is not None and interest_expense is not None:
-                ebit = operating_income + interest_expense
-        return ebit
+        """Fetch the latest EBIT (Earnings Before Interest and Taxes), or Operating Income."""
+        return self.graph.value("ebit")
 
     def get_interest_expense(self):
         """Fetch the latest Interest Expense."""
-        possible_keys = ['Interest Expense', 'interestExpense', 'Interest and Debt Expense', 'interestAndDebtExpense']
-        return self._get_financial_data(self.financials, possible_keys)
+        return self.graph.value("interest_expense")
 
     def calculate_debt_to_equity_ratio(self):
         """Calculate and evaluate Debt-to-Equity Ratio."""
@@ -145,8 +84,8 @@ class DebtRatios:
 
             debt_to_equity_ratio = self._calculate_ratio(total_debt, total_equity)
             benchmark_range = self._get_benchmark("Debt-to-Equity Ratio")
-            comparison = self._compare_to_benchmark(debt_to_equity_ratio, benchmark_range)
-            recommendation = self._get_recommendation_by_range(debt_to_equity_ratio, benchmark_range, buy_if_below=True) #buy_if_below = True is important here
+            comparison = compare_to_benchmark(debt_to_equity_ratio, benchmark_range)
+            recommendation = recommendation_by_range(debt_to_equity_ratio, benchmark_range, buy_if_below=True) #buy_if_below = True is important here
 
             return {
                 "Debt-to-Equity Ratio": round(debt_to_equity_ratio, 2) if debt_to_equity_ratio is not None else None,
@@ -172,8 +111,8 @@ class DebtRatios:
 
             interest_coverage_ratio = self._calculate_ratio(ebit, interest_expense)
             benchmark_range = self._get_benchmark("Interest Coverage Ratio")
-            comparison = self._compare_to_benchmark(interest_coverage_ratio, benchmark_range)
-            recommendation = self._get_recommendation_by_range(interest_coverage_ratio, benchmark_range, buy_if_below=False) #buy_if_below=False is important here
+            comparison = compare_to_benchmark(interest_coverage_ratio, benchmark_range)
+            recommendation = recommendation_by_range(interest_coverage_ratio, benchmark_range, buy_if_below=False) #buy_if_below=False is important here
 
             return {
                 "Interest Coverage Ratio": round(interest_coverage_ratio, 2) if interest_coverage_ratio is not None else None,
@@ -192,5 +131,6 @@ class DebtRatios:
         }
         results = {}
         for ratio_name, calculation_method in ratios.items():
-            results[ratio_name] = calculation_method()  # Call each calculation method
+            with span("ratio", ticker=self.ticker, category="Debt", ratio=ratio_name):
+                results[ratio_name] = calculation_method()  # Call each calculation method
         return results
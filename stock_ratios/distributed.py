@@ -0,0 +1,262 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+from stock_ratios.core import analyze_ticker
+from utils.data_fetcher import default_fetcher
+from utils.symbols import SymbolIndex, InvalidTickerError
+
+
+def partition(tickers, shard_size):
+    """Splits a ticker universe into consecutive shards of at most `shard_size` tickers."""
+    return [tickers[i:i + shard_size] for i in range(0, len(tickers), shard_size)]
+
+
+class SQLiteWorkQueue:
+    """
+    Shard queue with leases backed by a SQLite file, usable by workers on one machine or a shared disk.
+
+    Any broker exposing the same enqueue/lease/renew/complete/take_failures/counts methods
+    can replace it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS shards (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tickers TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 3,
+                lease_owner TEXT,
+                lease_expires REAL,
+                failed TEXT,
+                failures_taken INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS shards_status ON shards (status, lease_expires)")
+
+    def enqueue(self, tickers, attempts=0, max_attempts=3):
+        cursor = self.conn.execute(
+            "INSERT INTO shards (tickers, attempts, max_attempts) VALUES (?, ?, ?)",
+            (json.dumps(tickers), attempts, max_attempts),
+        )
+        return cursor.lastrowid
+
+    def lease(self, worker_id, lease_seconds):
+        """
+        Claims a pending shard, or one whose lease expired, and returns (shard_id, tickers, attempts).
+
+        Reclaiming an expired lease counts as an attempt, since its worker died or hung on it.
+        A shard that runs out of attempts this way is marked failed, with every ticker in it,
+        for the coordinator to collect through take_failures.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")  # Serialises concurrent lease attempts across processes
+        try:
+            while True:
+                row = self.conn.execute(
+                    """SELECT id, tickers, attempts, max_attempts, status FROM shards
+                       WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                       ORDER BY id LIMIT 1""",
+                    (now,),
+                ).fetchone()
+                if row is None or row[4] == "pending":
+                    break
+                attempts = row[2] + 1
+                if attempts < row[3]:
+                    row = row[:2] + (attempts,)
+                    break
+                error = f"Lease expired {attempts} times; the worker processing this shard died or hung"
+                failed = {ticker: {"error": error, "retryable": False} for ticker in json.loads(row[1])}
+                self.conn.execute(
+                    "UPDATE shards SET status = 'failed', attempts = ?, lease_owner = NULL, failed = ? WHERE id = ?",
+                    (attempts, json.dumps(failed), row[0]),
+                )
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE shards SET status = 'leased', attempts = ?, lease_owner = ?, lease_expires = ? WHERE id = ?",
+                    (row[2], worker_id, now + lease_seconds, row[0]),
+                )
+            self.conn.execute("COMMIT")
+        except sqlite3.Error:
+            self.conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def renew(self, shard_id, worker_id, lease_seconds):
+        """Extends a lease, returning False if the worker no longer holds it."""
+        cursor = self.conn.execute(
+            "UPDATE shards SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (time.time() + lease_seconds, shard_id, worker_id),
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, shard_id, worker_id, failed=None):
+        """
+        Marks a shard done, recording the {ticker: {"error", "retryable"}} map of tickers that failed in it.
+        Returns False, changing nothing, if the worker's lease was taken over by another worker.
+        """
+        cursor = self.conn.execute(
+            "UPDATE shards SET status = 'done', lease_owner = NULL, failed = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (json.dumps(failed or {}), shard_id, worker_id),
+        )
+        return cursor.rowcount > 0
+
+    def take_failures(self):
+        """Returns [(attempts, failed)] for completed or failed shards not yet inspected by the coordinator."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute(
+                "SELECT id, attempts, failed FROM shards WHERE status IN ('done', 'failed') AND failures_taken = 0"
+            ).fetchall()
+            self.conn.executemany("UPDATE shards SET failures_taken = 1 WHERE id = ?", [(row[0],) for row in rows])
+            self.conn.execute("COMMIT")
+        except sqlite3.Error:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [(attempts, json.loads(failed)) for _, attempts, failed in rows if failed and failed != "{}"]
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+
+    def is_empty(self):
+        return not self.conn.execute("SELECT 1 FROM shards LIMIT 1").fetchone()
+
+    def is_drained(self):
+        counts = self.counts()
+        return not counts.get("pending") and not counts.get("leased")
+
+
+class DirectorySink:
+    """Shared result sink writing one JSON-lines file per shard, atomically, into a directory."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, shard_id, results):
+        target = os.path.join(self.path, f"shard-{shard_id:08d}.jsonl")
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            for result in results:
+                f.write(json.dumps(result, default=str) + "\n")
+        os.replace(tmp_path, target)  # Readers never see a partially written shard
+
+    def is_empty(self):
+        return not any(name.endswith(".jsonl") for name in os.listdir(self.path))
+
+    def __iter__(self):
+        for name in sorted(os.listdir(self.path)):
+            if name.endswith(".jsonl"):
+                with open(os.path.join(self.path, name)) as f:
+                    for line in f:
+                        yield json.loads(line)
+
+
+class Worker:
+    """Leases shards from the queue, analyses their tickers and writes results to the sink."""
+
+    def __init__(self, work_queue, sink, worker_id=None, scorer=analyze_ticker, lease_seconds=600, poll_interval=5):
+        self.queue = work_queue
+        self.sink = sink
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.scorer = scorer
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+    def process(self, shard_id, tickers):
+        """Analyses a shard; returns (results, failed), or None if its lease was taken over meanwhile."""
+        results = []
+        failed = {}
+        for ticker in tickers:
+            try:
+                results.append(self.scorer(ticker))
+            except InvalidTickerError as e:
+                failed[ticker] = {"error": str(e), "retryable": False}
+            except Exception as e:
+                failed[ticker] = {"error": str(e), "retryable": True}
+            finally:
+                default_fetcher.invalidate(ticker)  # A long-lived worker would otherwise keep every ticker's datasets
+            if not self.queue.renew(shard_id, self.worker_id, self.lease_seconds):
+                return None  # Another worker owns the shard now and writes its outcome
+        self.sink.write(shard_id, results)
+        if not self.queue.complete(shard_id, self.worker_id, failed):
+            return None
+        return len(results), failed
+
+    def run(self, exit_when_drained=True):
+        """Processes shards until the queue is drained, returning the number of shards handled."""
+        processed = 0
+        while True:
+            leased = self.queue.lease(self.worker_id, self.lease_seconds)
+            if leased is None:
+                if exit_when_drained and self.queue.is_drained():
+                    return processed
+                time.sleep(self.poll_interval)  # Other workers still hold leases that may expire
+                continue
+            shard_id, tickers, _ = leased
+            if self.process(shard_id, tickers) is not None:
+                processed += 1
+
+
+class Coordinator:
+    """Partitions a universe into shards, retries failed tickers and aggregates worker results."""
+
+    def __init__(self, work_queue, sink, shard_size=50, max_attempts=3, poll_interval=5, symbols=None):
+        self.queue = work_queue
+        self.sink = sink
+        self.shard_size = shard_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.symbols = symbols or SymbolIndex()
+        self.failed = {}
+
+    def submit(self, tickers):
+        """
+        Enqueues the universe in shards, rejecting malformed or unknown tickers up front.
+
+        Raises ValueError if the queue or the sink already holds an earlier run, whose shards
+        would otherwise be mixed into this run's results.
+        """
+        if not self.queue.is_empty():
+            raise ValueError(f"Work queue {self.queue.path} already holds shards from an earlier run")
+        if not self.sink.is_empty():
+            raise ValueError(f"Result sink {self.sink.path} already holds results from an earlier run")
+        tickers, rejected = self.symbols.split(tickers)
+        self.failed.update(rejected)
+        shards = partition(tickers, self.shard_size)
+        for shard in shards:
+            self.queue.enqueue(shard, max_attempts=self.max_attempts)
+        return len(shards)
+
+    def _retry_failures(self):
+        for attempts, failed in self.queue.take_failures():
+            retry = []
+            for ticker, failure in failed.items():
+                if failure["retryable"] and attempts + 1 < self.max_attempts:
+                    retry.append(ticker)
+                else:
+                    self.failed[ticker] = failure["error"]  # Invalid or out of attempts
+            for shard in partition(retry, self.shard_size):
+                self.queue.enqueue(shard, attempts + 1, self.max_attempts)
+
+    def wait(self):
+        """Blocks until every shard, including retries, has been processed."""
+        while True:
+            self._retry_failures()
+            if self.queue.is_drained():
+                self._retry_failures()
+                if self.queue.is_drained():
+                    return
+            time.sleep(self.poll_interval)
+
+    def aggregate(self):
+        """Yields every result written to the shared sink."""
+        return iter(self.sink)
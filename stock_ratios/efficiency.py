@@ -1,5 +1,3 @@
-import yfinance as yf
-import math
 from config.efficiency.efficiency_config import (
     INDUSTRY_ASSET_TURNOVER_RATIO_BENCHMARK,
     INDUSTRY_INVENTORY_TURNOVER_RATIO_BENCHMARK,
@@ -8,59 +6,36 @@ from config.efficiency.efficiency_config import (
     DEFAULT_INVENTORY_TURNOVER_RATIO_BENCHMARK,
     DEFAULT_RECEIVABLES_TURNOVER_RATIO_BENCHMARK
 )
+from stock_ratios.graph import FundamentalsGraph
 from utils.benchmark import (
-    get_industry_benchmark
+    get_industry_benchmark,
+    compare_to_benchmark,
+    recommendation_by_range
 )
+from utils.tracing import span
 
 class EfficiencyRatios:
-    def __init__(self, ticker):
+    def __init__(self, ticker, info=None, balance_sheet=None, financials=None, graph=None):
         """
-        Initialize with the stock ticker and fetch relevant financial data.
+        Initialize with the stock ticker and fetch relevant financial data (unless it is passed in).
+
+        A shared FundamentalsGraph can be passed instead so intermediates are computed once per ticker.
         """
         self.ticker = ticker
-        self.stock = yf.Ticker(ticker)
-        self.info = self.stock.info
-        self.financials = self.stock.financials
-        self.balance_sheet = self.stock.balance_sheet
-
-    def _get_recommendation_by_range(self, value, benchmark_range, buy_if_below=True):
-        if value is None or benchmark_range is None:
-            return "Data Unavailable"
-        try:
-            lower_bound, upper_bound = benchmark_range
-        except TypeError: #Handle the case where benchmark_range is not a tuple
-            return "Data Unavailable"
-
-        if buy_if_below:
-            if value < lower_bound:
-                return "Buy"
-            elif value > upper_bound:
-                return "Sell"
-            else:
-                return "Hold"
-        else:
-            if value > upper_bound:
-                return "Buy"
-            elif value < lower_bound:
-                return "Sell"
-            else:
-                return "Hold"
-            
-    def _compare_to_benchmark(self, value, benchmark_range):
-        if value is None or benchmark_range is None:
-            return "Data Unavailable"
-        try:
-            lower_bound, upper_bound = benchmark_range
-        except TypeError:
-            return "Data Unavailable"
-
-        if value > upper_bound:
-            return "Above Benchmark"
-        elif value < lower_bound:
-            return "Below Benchmark"
-        else:
-            return "Within Benchmark"
-        
+        self.graph = graph or FundamentalsGraph(ticker, info, balance_sheet, financials)
+
+    @property
+    def info(self):
+        return self.graph.value("info")
+
+    @property
+    def financials(self):
+        return self.graph.value("financials")
+
+    @property
+    def balance_sheet(self):
+        return self.graph.value("balance_sheet")
+
     def _get_benchmark(self, ratio_type):
         sector = self.info.get("sector")
         industry = self.info.get("industry")
@@ -73,22 +48,6 @@ class EfficiencyRatios:
         else:
             return None
 
-    def _get_financial_data(self, statement, keys): # Added statement parameter
-        """
-        Generic function to get financial data given a list of possible keys.
-        """
-        if statement is None or statement.empty: #Check for empty statement
-            return None
-        for key in keys:
-            try:
-                value = statement.loc[key].iloc[0]
-                if not (isinstance(value, (int, float)) and not math.isnan(value)):
-                    continue  # Skip if value is not a valid number
-                return value
-            except KeyError:
-                continue
-        return None
-
     def _calculate_ratio(self, numerator, denominator):
         """
         Utility function to calculate a ratio and handle zero or None values.
@@ -99,27 +58,19 @@ class EfficiencyRatios:
 
     def get_total_revenue(self):
         """Fetch the latest Total Revenue."""
-        return self._get_financial_data(self.financials, ['Total Revenue', 'totalRevenue'])
+        return self.graph.value("total_revenue")
 
     def get_total_assets(self):
         """Fetch the latest Total Assets."""
-        return self._get_financial_data(self.balance_sheet, ['Total Assets', 'totalAssets', 'Assets'])
+        return self.graph.value("total_assets")
 
     def get_cost_of_goods_sold(self):
-        """Fetch the latest Cost of Goods Sold (COGS)."""
-        possible_keys = ['Cost of Revenue', 'costOfRevenue', 'Cost Of Goods Sold', 'costOfGoodsSold']
-        cogs = self._get_financial_data(self.financials, possible_keys)
-        if cogs is None:  # Try calculating COGS if not directly available
-            gross_profit_keys = ['Gross Profit', 'grossProfit']
-            gross_profit = self._get_financial_data(self.financials, gross_profit_keys)
-            revenue = self.get_total_revenue()
-            if gross_profit is not None and revenue is not None:
-                cogs = revenue - gross_profit  # COGS = Revenue - Gross Profit
-        return cogs
+        """Fetch the latest Cost of Goods Sold (COGS), or Revenue - Gross Profit if not reported."""
+        return self.graph.value("cost_of_revenue")
 
     def get_inventory(self):
         """Fetch the latest Inventory value."""
-        return self._get_financial_data(self.balance_sheet, ["Inventory", "inventory", "Inventories"])
+        return self.graph.value("inventory")
 
     def calculate_asset_turnover_ratio(self):
         """Calculate and evaluate Asset Turnover Ratio."""
@@ -133,19 +84,15 @@ class EfficiencyRatios:
             if total_assets_end is None:
                 return {"Asset Turnover Ratio": None, "Industry Benchmark": None, "Comparison": "Assets Data Unavailable", "Recommendation": "Assets Data Unavailable"}
 
-            total_assets_start = (
-                self.balance_sheet.loc['Total Assets'].iloc[1] if 'Total Assets' in self.balance_sheet.index and len(self.balance_sheet.loc['Total Assets']) > 1 else total_assets_end
-            )
-
-            avg_total_assets = (total_assets_end + total_assets_start) / 2 if total_assets_start is not None and total_assets_end is not None else None
+            avg_total_assets = self.graph.value("average_total_assets")  # Shared with ROA
 
             if avg_total_assets is None or avg_total_assets == 0:
                 return {"Asset Turnover Ratio": None, "Industry Benchmark": None, "Comparison": "Cannot calculate Asset Turnover Ratio, Avg Total Assets is zero or data unavailable", "Recommendation": "Cannot calculate Asset Turnover Ratio, Avg Total Assets is zero or data unavailable"}
 
             asset_turnover_ratio = self._calculate_ratio(total_revenue, avg_total_assets)
             benchmark_range = self._get_benchmark("Asset Turnover Ratio")
-            comparison = self._compare_to_benchmark(asset_turnover_ratio, benchmark_range)
-            recommendation = self._get_recommendation_by_range(asset_turnover_ratio, benchmark_range)
+            comparison = compare_to_benchmark(asset_turnover_ratio, benchmark_range)
+            recommendation = recommendation_by_range(asset_turnover_ratio, benchmark_range)
 
             return {
                 "Asset Turnover Ratio": round(asset_turnover_ratio, 2) if asset_turnover_ratio is not None else None,
@@ -168,18 +115,15 @@ class EfficiencyRatios:
             if inventory_end is None:
                 return {"Inventory Turnover Ratio": None, "Industry Benchmark": None, "Comparison": "Inventory Data Unavailable", "Recommendation": "Inventory Data Unavailable"}
 
-            inventory_start = (
-                self.balance_sheet.loc['Inventory'].iloc[1] if 'Inventory' in self.balance_sheet.index and len(self.balance_sheet.loc['Inventory']) > 1 else inventory_end
-            )
-            avg_inventory = (inventory_end + inventory_start) / 2 if inventory_end is not None and inventory_start is not None else None
+            avg_inventory = self.graph.value("average_inventory")
 
             if avg_inventory is None or avg_inventory == 0:
                 return {"Inventory Turnover Ratio": None, "Industry Benchmark": None, "Comparison": "Cannot calculate Inventory Turnover Ratio, Avg Inventory is zero or data unavailable", "Recommendation": "Cannot calculate Inventory Turnover Ratio, Avg Inventory is zero or data unavailable"}
 
             inventory_turnover_ratio = self._calculate_ratio(cogs, avg_inventory)
             benchmark_range = self._get_benchmark("Inventory Turnover Ratio")
-            comparison = self._compare_to_benchmark(inventory_turnover_ratio, benchmark_range)
-            recommendation = self._get_recommendation_by_range(inventory_turnover_ratio, benchmark_range)
+            comparison = compare_to_benchmark(inventory_turnover_ratio, benchmark_range)
+            recommendation = recommendation_by_range(inventory_turnover_ratio, benchmark_range)
 
             return {
                 "Inventory Turnover Ratio": round(inventory_turnover_ratio, 2) if inventory_turnover_ratio is not None else None,
@@ -199,5 +143,6 @@ class EfficiencyRatios:
         }
         results = {}
         for ratio_name, calculation_method in ratios.items():
-            results[ratio_name] = calculation_method()  # Call each calculation method
+            with span("ratio", ticker=self.ticker, category="Efficiency", ratio=ratio_name):
+                results[ratio_name] = calculation_method()  # Call each calculation method
         return results
@@ -0,0 +1,131 @@
+import math
+from collections.abc import Mapping
+
+# info fields used by the ratio calculations
+INFO_FIELDS = (
+    "trailingPE",
+    "forwardPE",
+    "priceToBook",
+    "priceToSalesTrailing12Months",
+    "earningsQuarterlyGrowth",
+    "dividendYield",
+    "payoutRatio",
+    "freeCashflow",
+    "marketCap",
+)
+
+# Statement line items, each with the row labels tried in order (same fallbacks as the ratio classes)
+FINANCIALS_LINES = {
+    "net_income": ["Net Income"],
+    "total_revenue": ["Total Revenue", "totalRevenue"],
+    "gross_profit": ["Gross Profit", "grossProfit"],
+    "cost_of_revenue": ["Cost of Revenue", "costOfRevenue", "Cost Of Goods Sold", "costOfGoodsSold"],
+    "ebit": ["EBIT", "ebit", "Operating Income", "operatingIncome"],
+    "interest_expense": ["Interest Expense", "interestExpense", "Interest and Debt Expense", "interestAndDebtExpense"],
+}
+BALANCE_SHEET_LINES = {
+    "total_assets": ["Total Assets", "totalAssets", "Assets"],
+    "total_liabilities": ["Total Liabilities Net Minority Interest", "Total Liabilities", "totalLiabilities", "Liabilities"],
+    "equity": ["Total Stockholder Equity", "Total Equity Gross Minority Interest", "Stockholders Equity", "Common Stock Equity", "Total Equity", "totalEquity", "Stockholders' Equity", "stockholdersEquity", "Equity", "Total Common Equity"],
+    "current_assets": ["Total Current Assets", "Current Assets", "totalCurrentAssets", "currentAssets", "Total Assets", "totalAssets", "Assets"],
+    "current_liabilities": ["Total Current Liabilities", "Current Liabilities", "totalCurrentLiabilities", "currentLiabilities"],
+    "inventory": ["Inventory", "inventory", "Inventories"],
+    "total_debt": ["Total Debt", "Net Debt", "totalDebt", "Total Liabilities Net Minority Interest", "Total Liabilities", "totalLiabilities", "Liabilities", "Long Term Debt And Capital Lease Obligation", "Long Term Debt", "Current Debt And Capital Lease Obligation", "Current Debt"],
+    "shares_outstanding": ["Ordinary Shares Number", "Share Issued"],
+}
+# Balance sheet items whose prior-period value is needed for averages
+PREVIOUS_PERIOD_LINES = ("total_assets", "inventory")
+
+STATEMENT_FIELDS = (
+    tuple(FINANCIALS_LINES)
+    + tuple(BALANCE_SHEET_LINES)
+    + tuple(f"{name}_previous" for name in PREVIOUS_PERIOD_LINES)
+)
+FUNDAMENTAL_FIELDS = INFO_FIELDS + STATEMENT_FIELDS
+FIELD_INDEX = {field: i for i, field in enumerate(FUNDAMENTAL_FIELDS)}
+
+
+def _to_float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return value
+
+
+def statement_line(statement, keys, column=0):
+    """
+    Returns (row label, value) for the first of the given row labels with a numeric value in
+    the column, or (None, NaN).
+
+    `statement` is a yfinance DataFrame or a plain mapping of row label to a sequence of
+    period values (newest first), so the scalar path does not need pandas.
+    """
+    if statement is None:
+        return None, math.nan
+    if isinstance(statement, Mapping):
+        for key in keys:
+            row = statement.get(key)
+            if row is None or len(row) <= column:
+                continue
+            value = _to_float(row[column])
+            if not math.isnan(value):
+                return key, value
+        return None, math.nan
+    if statement.empty:
+        return None, math.nan
+    for key in keys:
+        if key in statement.index:
+            row = statement.loc[key]
+            if len(row) <= column:
+                continue
+            value = _to_float(row.iloc[column])
+            if not math.isnan(value):
+                return key, value
+    return None, math.nan
+
+
+def statement_value(statement, keys, column=0):
+    """Returns the first numeric value found for the given row labels and column, or NaN."""
+    return statement_line(statement, keys, column)[1]
+
+
+def balance_sheet_columns(balance_sheet, financials):
+    """
+    Balance sheet column of each financials column, matched by period end date rather than by
+    position, so a period missing from one statement does not shift the other; None where the
+    balance sheet does not report that period.
+    """
+    columns = {}
+    for i, period in enumerate(getattr(balance_sheet, "columns", ())):
+        columns.setdefault(str(period)[:10], i)  # "2024-12-31" for timestamps, dates and ISO strings
+    return [columns.get(str(period)[:10]) for period in financials.columns]
+
+
+def extract_fundamentals(info, balance_sheet, financials, column=0, balance_column=None):
+    """
+    Extracts the canonical fundamentals of one period from yfinance data as a dict of floats.
+
+    Missing values are NaN. `column` selects the statement period (0 is the latest) and
+    `balance_column` the balance sheet's column for it (see balance_sheet_columns; defaults
+    to `column`).
+    """
+    balance_column = column if balance_column is None else balance_column
+    fundamentals = {field: _to_float(info.get(field)) for field in INFO_FIELDS}
+    for name, keys in FINANCIALS_LINES.items():
+        fundamentals[name] = statement_value(financials, keys, column)
+    for name, keys in BALANCE_SHEET_LINES.items():
+        fundamentals[name] = statement_value(balance_sheet, keys, balance_column)
+    for name in PREVIOUS_PERIOD_LINES:
+        previous = statement_value(balance_sheet, BALANCE_SHEET_LINES[name], balance_column + 1)
+        fundamentals[f"{name}_previous"] = fundamentals[name] if math.isnan(previous) else previous
+    return derive_missing(fundamentals)
+
+
+def derive_missing(fundamentals):
+    """Fills items the ratio classes derive when not reported directly (in place) and returns the dict."""
+    if math.isnan(fundamentals["equity"]):
+        fundamentals["equity"] = fundamentals["total_assets"] - fundamentals["total_liabilities"]
+    if math.isnan(fundamentals["cost_of_revenue"]):
+        fundamentals["cost_of_revenue"] = fundamentals["total_revenue"] - fundamentals["gross_profit"]
+    return fundamentals
@@ -0,0 +1,207 @@
+import datetime
+import math
+import os
+import re
+import time
+from stock_ratios.fundamentals import INFO_FIELDS, FINANCIALS_LINES, BALANCE_SHEET_LINES, PREVIOUS_PERIOD_LINES, statement_value, derive_missing, _to_float
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency, only needed for the fundamentals store
+    pa = None
+
+# Canonical statement line items stored per (ticker, period end)
+LINE_ITEMS = tuple(FINANCIALS_LINES) + tuple(BALANCE_SHEET_LINES)
+KEY_COLUMNS = ("ticker", "period_end")
+STRING_COLUMNS = ("ticker", "sector", "industry")
+QUARTER = re.compile(r"^\d{4}Q[1-4]$")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("The fundamentals store requires pyarrow: pip install pyarrow")
+
+
+def market_of(ticker):
+    """Exchange of a ticker from its suffix (RELIANCE.NS -> "NS"); suffix-less tickers are "US"."""
+    return ticker.rsplit(".", 1)[1].upper() if "." in ticker else "US"
+
+
+def quarter_of(value):
+    """Partition label ("2024Q4") of a period end date, or of a label passed through."""
+    if isinstance(value, str) and QUARTER.match(value):
+        return value
+    date = value if isinstance(value, datetime.date) else datetime.date.fromisoformat(str(value)[:10])
+    return f"{date.year}Q{(date.month - 1) // 3 + 1}"
+
+
+def _date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def _schema():
+    fields = [
+        ("ticker", pa.string()),
+        ("period_end", pa.date32()),
+        ("sector", pa.string()),
+        ("industry", pa.string()),
+    ]
+    fields += [(field, pa.float64()) for field in INFO_FIELDS + LINE_ITEMS]
+    return pa.schema(fields)
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("market", pa.string()), ("period", pa.string())]), flavor="hive")
+
+
+class FundamentalsStore:
+    """
+    Statement history of a universe as Parquet files partitioned by market and quarter
+    (root/market=NS/period=2024Q4/part-*.parquet).
+
+    Rows hold the reported canonical line items (nothing derived) plus the info fields, which
+    only describe the latest period when ingested. Ingestion is append-only: periods already
+    stored for a ticker are skipped and new rows go to new files, so existing files are never
+    rewritten. String columns are dictionary encoded and files zstd compressed. Reads prune
+    partitions by market and quarter and only decode the requested columns.
+    """
+
+    def __init__(self, root, compression="zstd"):
+        _require_pyarrow()
+        self.root = root
+        self.compression = compression
+        self._buffer = []
+        self._known = None  # (ticker, period end) pairs already stored or buffered
+        os.makedirs(root, exist_ok=True)
+
+    def _dataset(self):
+        return ds.dataset(self.root, format="parquet", partitioning=_partitioning(), schema=self._full_schema())
+
+    def _full_schema(self):
+        return _schema().append(pa.field("market", pa.string())).append(pa.field("period", pa.string()))
+
+    def _known_keys(self):
+        if self._known is None:
+            table = self._dataset().to_table(columns=list(KEY_COLUMNS))
+            self._known = set(zip(table.column("ticker").to_pylist(), table.column("period_end").to_pylist()))
+        return self._known
+
+    def add(self, ticker, info, balance_sheet, financials):
+        """
+        Buffers every period of a ticker's yfinance statements that is not stored yet and returns
+        how many were new. Balance sheet columns are matched to financials columns by period end
+        date; a period the balance sheet does not report stores NaN balances.
+        """
+        if financials is None or financials.empty:
+            return 0
+        known = self._known_keys()
+        balance_columns = {} if balance_sheet is None else {_date(period): i for i, period in enumerate(balance_sheet.columns)}
+        added = 0
+        for column, period_end in enumerate(financials.columns):
+            key = (ticker, _date(period_end))
+            if key in known:
+                continue
+            row = {"ticker": ticker, "period_end": key[1], "sector": info.get("sector"), "industry": info.get("industry")}
+            for field in INFO_FIELDS:
+                row[field] = _to_float(info.get(field)) if column == 0 else math.nan
+            for name, keys in FINANCIALS_LINES.items():
+                row[name] = statement_value(financials, keys, column)
+            balance_column = balance_columns.get(key[1])
+            for name, keys in BALANCE_SHEET_LINES.items():
+                row[name] = math.nan if balance_column is None else statement_value(balance_sheet, keys, balance_column)
+            self._buffer.append(row)
+            known.add(key)
+            added += 1
+        return added
+
+    def flush(self):
+        """Writes buffered rows as one new file per (market, quarter) partition and returns the row count."""
+        partitions = {}
+        for row in self._buffer:
+            partitions.setdefault((market_of(row["ticker"]), quarter_of(row["period_end"])), []).append(row)
+        schema = _schema()
+        name = f"part-{time.strftime('%Y%m%dT%H%M%S')}-{os.urandom(4).hex()}.parquet"
+        for (market, period), rows in partitions.items():
+            directory = os.path.join(self.root, f"market={market}", f"period={period}")
+            os.makedirs(directory, exist_ok=True)
+            rows.sort(key=lambda row: row["ticker"])
+            table = pa.Table.from_pylist(rows, schema=schema)
+            path = os.path.join(directory, name)
+            tmp_path = os.path.join(directory, f".{name}.tmp")  # Hidden from readers until complete
+            pq.write_table(table, tmp_path, compression=self.compression, use_dictionary=list(STRING_COLUMNS))
+            os.replace(tmp_path, path)
+        written = len(self._buffer)
+        self._buffer = []
+        return written
+
+    def ingest(self, ticker, fetcher=None):
+        """Fetches a ticker's info and annual statements and buffers its new periods."""
+        from utils.data_fetcher import default_fetcher
+        fetcher = fetcher or default_fetcher
+        try:
+            return self.add(ticker, fetcher.get(ticker, "info"), fetcher.get(ticker, "balance_sheet"), fetcher.get(ticker, "financials"))
+        finally:
+            fetcher.invalidate(ticker)
+
+    def partitions(self):
+        """Sorted (market, quarter) partitions present on disk."""
+        found = set()
+        for market_dir in os.listdir(self.root):
+            if not market_dir.startswith("market="):
+                continue
+            for period_dir in os.listdir(os.path.join(self.root, market_dir)):
+                if period_dir.startswith("period="):
+                    found.add((market_dir.split("=", 1)[1], period_dir.split("=", 1)[1]))
+        return sorted(found)
+
+    def read(self, columns=None, tickers=None, markets=None, start=None, end=None):
+        """
+        Reads a pyarrow Table of the requested columns (all by default; "market" and "period"
+        are available too). Only partitions within the markets and the quarters from `start` to
+        `end` (dates or "2015Q1"-style labels, inclusive) are opened.
+        """
+        expression = None
+        conditions = []
+        if markets is not None:
+            conditions.append(ds.field("market").isin(list(markets)))
+        if start is not None:
+            conditions.append(ds.field("period") >= quarter_of(start))
+        if end is not None:
+            conditions.append(ds.field("period") <= quarter_of(end))
+        if tickers is not None:
+            conditions.append(ds.field("ticker").isin(list(tickers)))
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return self._dataset().to_table(columns=list(columns) if columns is not None else None, filter=expression)
+
+    def fundamentals(self, ticker, period_end=None):
+        """
+        Canonical fundamentals of a ticker's latest period on or before `period_end` (latest
+        stored by default), with prior-period balances and derived items filled in, for
+        StockRatios(ticker, fundamentals=...). Returns None if nothing is stored.
+        """
+        table = self.read(tickers=[ticker], markets=[market_of(ticker)], end=period_end)
+        if period_end is not None:
+            table = table.filter(pc.less_equal(table.column("period_end"), pa.scalar(_date(period_end), pa.date32())))
+        if table.num_rows == 0:
+            return None
+        rows = table.sort_by([("period_end", "descending")]).slice(0, 2).to_pylist()
+        fundamentals = {field: math.nan if rows[0][field] is None else rows[0][field] for field in INFO_FIELDS + LINE_ITEMS}
+        for name in PREVIOUS_PERIOD_LINES:
+            previous = rows[1][name] if len(rows) > 1 else None
+            fundamentals[f"{name}_previous"] = fundamentals[name] if previous is None or math.isnan(previous) else previous
+        return derive_missing(fundamentals)
+
+    def history(self, fields=LINE_ITEMS, tickers=None, markets=None, start=None, end=None):
+        """Statement history frame (ticker, period_end and `fields`), as backtest.run_backtest takes."""
+        table = self.read(["ticker", "period_end"] + list(fields), tickers, markets, start, end)
+        history = table.to_pandas(date_as_object=False)
+        history["period_end"] = history["period_end"].astype("datetime64[ns]")
+        return history.sort_values(["ticker", "period_end"]).reset_index(drop=True)
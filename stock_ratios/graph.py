@@ -0,0 +1,157 @@
+import math
+from stock_ratios.fundamentals import INFO_FIELDS, FINANCIALS_LINES, BALANCE_SHEET_LINES, PREVIOUS_PERIOD_LINES, statement_line, _to_float
+from utils import events
+from utils.data_fetcher import fetch_dataset
+
+# Datasets at the roots of the graph, fetched on first use unless passed in
+SOURCES = ("info", "balance_sheet", "financials")
+# Roots of the statements in TTM mode, from which balance_sheet and financials are built
+TTM_SOURCES = ("quarterly_financials", "quarterly_balance_sheet")
+
+# name -> (input node names, function of the input values); missing values are None
+NODES = {}
+
+
+def node(name, *inputs):
+    """Registers the decorated function as node `name`, computed from the values of `inputs`."""
+    def register(function):
+        NODES[name] = (inputs, function)
+        return function
+    return register
+
+
+def _line(name, keys, column=0):
+    def read(statement):
+        label, value = statement_line(statement, keys, column)
+        if label is not None and label != keys[0] and events.enabled(events.DEBUG):
+            events.emit(events.DEBUG, "label_alias", field=name, label=label)
+        return None if math.isnan(value) else value
+    return read
+
+
+def _info_field(field):
+    def read(info):
+        value = _to_float(info.get(field))
+        return None if math.isnan(value) else value
+    return read
+
+
+for _field in INFO_FIELDS:
+    NODES[_field] = (("info",), _info_field(_field))
+
+# Statement line items, read with the canonical row label fallbacks
+for _name, _keys in FINANCIALS_LINES.items():
+    NODES[_name] = (("financials",), _line(_name, _keys))
+for _name, _keys in BALANCE_SHEET_LINES.items():
+    NODES[_name] = (("balance_sheet",), _line(_name, _keys))
+for _name in PREVIOUS_PERIOD_LINES:
+    NODES[f"{_name}_previous"] = (("balance_sheet",), _line(_name, BALANCE_SHEET_LINES[_name], 1))
+
+# Items derived when they are not reported directly
+NODES["reported_cost_of_revenue"] = NODES["cost_of_revenue"]
+
+
+@node("reported_equity", "balance_sheet")
+def reported_equity(balance_sheet):
+    label, value = statement_line(balance_sheet, BALANCE_SHEET_LINES["equity"])
+    if label is None:
+        return None
+    if label != BALANCE_SHEET_LINES["equity"][0] and events.enabled(events.DEBUG):
+        events.emit(events.DEBUG, "label_alias", field="equity", label=label)
+    if events.enabled(events.DEBUG):
+        events.emit(events.DEBUG, "equity_line", label=label)  # Aggregated per label, so no value
+    return value
+
+
+@node("cost_of_revenue", "reported_cost_of_revenue", "total_revenue", "gross_profit")
+def cost_of_revenue(reported, revenue, gross_profit):
+    if reported is None and revenue is not None and gross_profit is not None:
+        return revenue - gross_profit  # COGS = Revenue - Gross Profit
+    return reported
+
+
+@node("equity", "reported_equity", "total_assets", "total_liabilities")
+def equity(reported, total_assets, total_liabilities):
+    if reported is None and total_assets is not None and total_liabilities is not None:
+        return total_assets - total_liabilities
+    return reported
+
+
+def _average(end, start):
+    """Average of two period-end balances, using the end balance when the start is unavailable."""
+    if end is None:
+        return None
+    return (end + (start if start is not None else end)) / 2
+
+
+@node("average_total_assets", "total_assets", "total_assets_previous")
+def average_total_assets(end, start):
+    return _average(end, start)
+
+
+@node("average_inventory", "inventory", "inventory_previous")
+def average_inventory(end, start):
+    return _average(end, start)
+
+
+@node("quick_assets", "current_assets", "inventory")
+def quick_assets(current_assets, inventory):
+    if current_assets is None or inventory is None:
+        return None
+    return current_assets - inventory
+
+
+class FundamentalsGraph:
+    """
+    Per-ticker evaluation of NODES.
+
+    A node is computed on first request, after its inputs, and memoized, so the ratio classes of
+    one ticker share every intermediate and nodes no requested metric depends on never run.
+    """
+
+    def __init__(self, ticker, info=None, balance_sheet=None, financials=None, fundamentals=None, ttm=False):
+        """
+        Datasets passed in are used instead of fetching them; statements may be DataFrames or
+        mappings of row label to period values. `fundamentals` (canonical field -> value, as
+        from extract_fundamentals) seeds the line item nodes directly, so no statement is needed.
+
+        With ttm=True, balance_sheet and financials are trailing-twelve-month statements built
+        from the quarterly datasets (TTM_SOURCES) on first use.
+        """
+        self.ticker = ticker
+        self.ttm = ttm
+        self._values = {}
+        for name, value in (("info", info), ("balance_sheet", balance_sheet), ("financials", financials)):
+            if value is not None:
+                self._values[name] = value
+        for name, value in (fundamentals or {}).items():
+            value = _to_float(value)
+            self._values[name] = None if math.isnan(value) else value
+
+    def has(self, name):
+        return name in self._values
+
+    def provide(self, name, value):
+        """Supplies a node's value (e.g. a dataset fetched elsewhere) so it is not computed or fetched."""
+        self._values[name] = value
+
+    def value(self, name):
+        if name in self._values:
+            return self._values[name]
+        if self.ttm and name == "financials":
+            from stock_ratios.ttm import ttm_financials  # pandas is only needed for TTM
+            value = ttm_financials(self.value("quarterly_financials"))
+        elif self.ttm and name == "balance_sheet":
+            from stock_ratios.ttm import ttm_balance_sheet
+            value = ttm_balance_sheet(self.value("quarterly_balance_sheet"), self.value("financials").columns)
+        elif name in SOURCES or name in TTM_SOURCES:
+            value = fetch_dataset(self.ticker, name)
+        else:
+            inputs, function = NODES[name]
+            value = function(*(self.value(dependency) for dependency in inputs))
+        self._values[name] = value
+        return value
+
+    def evaluated(self):
+        """Names of the nodes computed so far."""
+        return [name for name in self._values if name not in SOURCES and name not in TTM_SOURCES]
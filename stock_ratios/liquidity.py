@@ -1,64 +1,35 @@
-import yfinance as yf
-import math
 from config.liquidity.liquidity_config import (
     INDUSTRY_CURRENT_RATIO_BENCHMARK,
     INDUSTRY_QUICK_RATIO_BENCHMARK,
     DEFAULT_CURRENT_RATIO_BENCHMARK,
     DEFAULT_QUICK_RATIO_BENCHMARK
 )
+from stock_ratios.graph import FundamentalsGraph
 from utils.benchmark import (
-    get_industry_benchmark
+    get_industry_benchmark,
+    compare_to_benchmark,
+    recommendation_by_range
 )
+from utils.tracing import span
 
 
 class LiquidityRatios:
-    def __init__(self, ticker):
+    def __init__(self, ticker, info=None, balance_sheet=None, graph=None):
         """
-        Initialize with the stock ticker and fetch relevant financial data.
+        Initialize with the stock ticker and fetch relevant financial data (unless it is passed in).
+
+        A shared FundamentalsGraph can be passed instead so intermediates are computed once per ticker.
         """
         self.ticker = ticker
-        self.stock = yf.Ticker(ticker)
-        self.info = self.stock.info
-        self.balance_sheet = self.stock.balance_sheet
-        # print(f"Balance Sheet for {ticker}:\n{self.balance_sheet}")
-
-    def _get_recommendation_by_range(self, value, benchmark_range, buy_if_below=True):
-        if value is None or benchmark_range is None:
-            return "Data Unavailable"
-        try:
-            lower_bound, upper_bound = benchmark_range
-        except TypeError: #Handle the case where benchmark_range is not a tuple
-            return "Data Unavailable"
+        self.graph = graph or FundamentalsGraph(ticker, info, balance_sheet)
 
-        if buy_if_below:
-            if value < lower_bound:
-                return "Buy"
-            elif value > upper_bound:
-                return "Sell"
-            else:
-                return "Hold"
-        else:
-            if value > upper_bound:
-                return "Buy"
-            elif value < lower_bound:
-                return "Sell"
-            else:
-                return "Hold"
-            
-    def _compare_to_benchmark(self, value, benchmark_range):
-        if value is None or benchmark_range is None:
-            return "Data Unavailable"
-        try:
-            lower_bound, upper_bound = benchmark_range
-        except TypeError:
-            return "Data Unavailable"
+    @property
+    def info(self):
+        return self.graph.value("info")
 
-        if value > upper_bound:
-            return "Above Benchmark"
-        elif value < lower_bound:
-            return "Below Benchmark"
-        else:
-            return "Within Benchmark"
+    @property
+    def balance_sheet(self):
+        return self.graph.value("balance_sheet")
 
     def _get_benchmark(self, ratio_type):
         sector = self.info.get("sector")
@@ -70,22 +41,6 @@ class LiquidityRatios:
         else:
             return None
         
-    def _get_financial_data(self, keys):
-        """
-        Generic function to get financial data given a list of possible keys.
-        """
-        if self.balance_sheet is None or self.balance_sheet.empty:
-            return None
-        for key in keys:
-            try:
-                value = self.balance_sheet.loc[key].iloc[0]
-                if not (isinstance(value, (int, float)) and not math.isnan(value)):
-                    continue # Skip if value is not a valid number
-                return value
-            except KeyError:
-                continue
-        return None
-
     def _calculate_ratio(self, numerator, denominator):
         """
         Utility function to calculate a ratio and handle zero or None values.
@@ -95,21 +50,13 @@ class LiquidityRatios:
         return numerator / denominator
 
     def get_current_assets(self):
-        possible_keys = [
-            "Total Current Assets", "Current Assets", "totalCurrentAssets", "currentAssets",
-            "Total Assets", "totalAssets", "Assets" # Fallback if only total assets are available
-        ]
-        return self._get_financial_data(possible_keys)
+        return self.graph.value("current_assets")  # Falls back to total assets if that is all there is
 
     def get_current_liabilities(self):
-        possible_keys = [
-            "Total Current Liabilities", "Current Liabilities", "totalCurrentLiabilities", "currentLiabilities"
-        ]
-        return self._get_financial_data(possible_keys)
+        return self.graph.value("current_liabilities")
 
     def get_inventory(self):
-        possible_keys = ["Inventory", "inventory", "Inventories"]
-        return self._get_financial_data(possible_keys)
+        return self.graph.value("inventory")
 
     def calculate_current_ratio(self):
         """Calculate and evaluate Current Ratio."""
@@ -124,8 +71,8 @@ class LiquidityRatios:
             # Calculate Current Ratio
             current_ratio = self._calculate_ratio(current_assets, current_liabilities)
             benchmark_range = self._get_benchmark("Current Ratio")
-            comparison = self._compare_to_benchmark(current_ratio, benchmark_range)
-            recommendation = self._get_recommendation_by_range(current_ratio, benchmark_range)
+            comparison = compare_to_benchmark(current_ratio, benchmark_range)
+            recommendation = recommendation_by_range(current_ratio, benchmark_range)
             return {
                 "Current Ratio": round(current_ratio, 2) if current_ratio is not None else None,
                 "Industry Benchmark": benchmark_range,
@@ -149,12 +96,12 @@ class LiquidityRatios:
             if current_liabilities is None:
                 return {"Quick Ratio": None, "Industry Benchmark": None, "Comparison": "Current Liabilities Data Unavailable", "Recommendation": "Current Liabilities Data Unavailable"}
 
-            # Calculate Quick Assets (Current Assets - Inventory)
-            quick_assets = None if current_assets is None or inventory is None else current_assets - inventory
+            # Quick Assets (Current Assets - Inventory)
+            quick_assets = self.graph.value("quick_assets")
             quick_ratio = self._calculate_ratio(quick_assets, current_liabilities)
             benchmark_range = self._get_benchmark("Quick Ratio")
-            comparison = self._compare_to_benchmark(quick_ratio, benchmark_range)
-            recommendation = self._get_recommendation_by_range(quick_ratio, benchmark_range)
+            comparison = compare_to_benchmark(quick_ratio, benchmark_range)
+            recommendation = recommendation_by_range(quick_ratio, benchmark_range)
             return {
                 "Quick Ratio": round(quick_ratio, 2) if quick_ratio is not None else None,
                 "Industry Benchmark": benchmark_range,
@@ -172,5 +119,6 @@ class LiquidityRatios:
         }
         results = {}
         for ratio_name, calculation_method in ratios.items():
-            results[ratio_name] = calculation_method()  # Call each calculation method
+            with span("ratio", ticker=self.ticker, category="Liquidity", ratio=ratio_name):
+                results[ratio_name] = calculation_method()  # Call each calculation method
         return results
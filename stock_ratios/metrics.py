@@ -0,0 +1,109 @@
+import math
+import numpy as np
+from stock_ratios.fundamentals import FIELD_INDEX
+from utils.benchmark import get_industry_benchmark, compare_to_benchmark, recommendation_by_range
+from utils.recommendation_engine import DEFAULT_WEIGHTS
+
+# Categories a plugin metric can join (the batch kernel scores a fixed set of categories)
+CATEGORIES = ("Valuation", "Profitability", "Liquidity", "Debt", "Efficiency")
+
+
+class Metric:
+    """
+    A ratio declared once and run by both the per-ticker and the batch engines.
+
+    `inputs` are canonical fundamentals fields (see fundamentals.FUNDAMENTAL_FIELDS) and
+    `formula` takes their values positionally. The formula must stick to arithmetic so the
+    same function works on floats in StockRatios and on NumPy columns in batch.metric_values.
+    """
+
+    def __init__(self, category, name, inputs, formula, benchmarks, default_benchmark, buy_if_below=True, weight=0.0):
+        if category not in CATEGORIES:
+            raise ValueError(f"Unknown category {category!r}, expected one of {', '.join(CATEGORIES)}")
+        unknown = [field for field in inputs if field not in FIELD_INDEX]
+        if unknown:
+            raise ValueError(f"Unknown fundamentals fields for {name}: {', '.join(unknown)}")
+        self.category = category
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.formula = formula
+        self.benchmarks = benchmarks
+        self.default_benchmark = default_benchmark
+        self.buy_if_below = buy_if_below
+        self.weight = weight
+
+    def compute(self, values):
+        """Scalar value from input values (None if an input is missing or the result is undefined)."""
+        if any(value is None for value in values):
+            return None
+        try:
+            result = self.formula(*values)
+        except ZeroDivisionError:
+            return None
+        return result if math.isfinite(result) else None
+
+    def compute_columns(self, columns):
+        """Column of values from input columns (NaN where the result is undefined)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = np.asarray(self.formula(*columns), dtype=np.float64)
+        return np.where(np.isfinite(result), result, np.nan)
+
+    def benchmark(self, sector, industry):
+        return get_industry_benchmark(sector, industry, self.benchmarks, self.default_benchmark)
+
+    def evaluate(self, graph):
+        """Result dict for one ticker, in the same shape as the built-in ratio classes return."""
+        info = graph.value("info")
+        value = self.compute([graph.value(field) for field in self.inputs])
+        benchmark_range = self.benchmark(info.get("sector"), info.get("industry"))
+        return {
+            self.name: round(value, 2) if value is not None else None,
+            "Industry Benchmark": benchmark_range,
+            "Comparison": compare_to_benchmark(value, benchmark_range),
+            "Recommendation": recommendation_by_range(value, benchmark_range, self.buy_if_below),
+        }
+
+
+# Registered plugin metrics, in registration order
+REGISTRY = {}
+
+
+def register_metric(metric):
+    """
+    Adds a metric to every analysis: StockRatios results, the batch kernel and the default weights.
+
+    Register at import time, before RecommendationEngine instances or batch process pools are
+    created, so they pick the metric up; engines already built keep their weights. Registering
+    the same (category, name) again replaces it.
+    """
+    REGISTRY[(metric.category, metric.name)] = metric
+    return metric
+
+
+def unregister_metric(category, name):
+    REGISTRY.pop((category, name), None)
+
+
+def registered_metrics():
+    return list(REGISTRY.values())
+
+
+def default_weights():
+    """A fresh copy of DEFAULT_WEIGHTS with the weights of the registered metrics merged in."""
+    weights = {category: dict(metrics) for category, metrics in DEFAULT_WEIGHTS.items()}
+    for metric in REGISTRY.values():
+        weights.setdefault(metric.category, {})[metric.name] = metric.weight
+    return weights
+
+
+# Free cash flow yield (%), a house metric available for registration
+FCF_YIELD = Metric(
+    "Valuation",
+    "FCF Yield",
+    inputs=("freeCashflow", "marketCap"),
+    formula=lambda free_cash_flow, market_cap: free_cash_flow / market_cap * 100,
+    benchmarks={},
+    default_benchmark=(3.0, 6.0),
+    buy_if_below=False,
+    weight=0.1,
+)
@@ -0,0 +1,113 @@
+import os
+from multiprocessing import Pool, shared_memory
+import numpy as np
+from stock_ratios.batch import CATEGORIES, metric_table, engine_weights, score_block
+
+
+class SharedArray:
+    """A NumPy array living in a multiprocessing.shared_memory block, attachable from other processes."""
+
+    def __init__(self, shape, dtype=np.float64, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        if name is None:
+            size = max(int(np.prod(self.shape)) * self.dtype.itemsize, 1)
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @classmethod
+    def from_array(cls, array):
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def spec(self):
+        return self.shm.name, self.shape, self.dtype.str
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+
+    def unlink(self):
+        self.close()
+        self.shm.unlink()
+
+
+class ParallelScores:
+    """Zero-copy views over the shared output blocks of a parallel scoring run."""
+
+    def __init__(self, values, codes, category_scores, overall_scores):
+        self._blocks = (values, codes, category_scores, overall_scores)
+        self.values = values.array
+        self.codes = codes.array
+        self.category_scores = category_scores.array
+        self.overall_scores = overall_scores.array
+
+    def release(self):
+        """Frees the shared memory; the arrays must not be used afterwards."""
+        self.values = self.codes = self.category_scores = self.overall_scores = None
+        for block in self._blocks:
+            block.unlink()
+
+
+_worker_state = {}
+
+
+def _attach(specs, weights):
+    _worker_state["arrays"] = {key: SharedArray(shape, dtype, name) for key, (name, shape, dtype) in specs.items()}
+    _worker_state["weights"] = weights
+
+
+def _score_rows(bounds):
+    start, end = bounds
+    arrays = {key: shared.array for key, shared in _worker_state["arrays"].items()}
+    values, codes, categories, overall = score_block(
+        arrays["fundamentals"][start:end], arrays["lower"][start:end], arrays["upper"][start:end], *_worker_state["weights"]
+    )
+    # Results go straight into the shared output blocks, nothing is pickled back
+    arrays["values"][start:end] = values
+    arrays["codes"][start:end] = codes
+    arrays["category_scores"][start:end] = categories
+    arrays["overall_scores"][start:end] = overall
+    return end - start
+
+
+def score_universe_parallel(fundamentals, lower, upper, recommendation_engine=None, processes=None, chunk_size=2048):
+    """
+    Scores an (n, fields) fundamentals matrix across a process pool using shared memory.
+
+    `lower`/`upper` are the (n, metrics) benchmark bounds from batch.benchmark_matrices.
+    Inputs are copied once into shared blocks that every worker attaches to, each worker
+    writes its row range into shared output blocks, and the returned ParallelScores exposes
+    those blocks directly. Call release() on it when done. Plugin metrics must be registered
+    at import time so workers started with the "spawn" method see them too.
+    """
+    rows = len(fundamentals)
+    metrics = len(metric_table())
+    blocks = {
+        "fundamentals": SharedArray.from_array(np.ascontiguousarray(fundamentals, dtype=np.float64)),
+        "lower": SharedArray.from_array(np.ascontiguousarray(lower, dtype=np.float64)),
+        "upper": SharedArray.from_array(np.ascontiguousarray(upper, dtype=np.float64)),
+        "values": SharedArray((rows, metrics)),
+        "codes": SharedArray((rows, metrics), np.int8),
+        "category_scores": SharedArray((rows, len(CATEGORIES))),
+        "overall_scores": SharedArray((rows,)),
+    }
+    specs = {key: block.spec for key, block in blocks.items()}
+    chunks = [(start, min(start + chunk_size, rows)) for start in range(0, rows, chunk_size)]
+
+    try:
+        with Pool(processes or os.cpu_count(), initializer=_attach, initargs=(specs, engine_weights(recommendation_engine))) as pool:
+            for _ in pool.imap_unordered(_score_rows, chunks):
+                pass
+    except BaseException:
+        for block in blocks.values():
+            block.unlink()
+        raise
+
+    for key in ("fundamentals", "lower", "upper"):
+        blocks[key].unlink()
+    return ParallelScores(blocks["values"], blocks["codes"], blocks["category_scores"], blocks["overall_scores"])
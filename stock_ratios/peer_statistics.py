@@ -0,0 +1,115 @@
+import time
+from stock_ratios.batch import metric_table
+from stock_ratios.results import iter_metrics
+from utils.sketch import KLLSketch
+
+DISTRIBUTION_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+LEVELS = ("industry", "sector")
+
+
+class SectorStatistics:
+    """
+    Live per-sector and per-industry distributions of every metric, kept in KLL sketches.
+
+    Values are added as tickers are (re)scored. Sketches cannot forget a ticker's old value,
+    so they are kept in two generations: every `window` seconds the current one becomes the
+    previous one and the oldest is dropped, and queries merge both. A ticker rescored within a
+    window therefore counts once per score, and values older than two windows are gone. Memory
+    is bounded by groups x metrics x 2 sketches of about 3 * k values each.
+
+    benchmark() turns a group's distribution into a (lower, upper) range that can stand in for
+    the static industry benchmarks once enough peers have been seen.
+    """
+
+    def __init__(self, k=200, window=24 * 60 * 60, min_count=30, benchmark_quantiles=(0.25, 0.75)):
+        self.k = k
+        self.window = window
+        self.min_count = min_count
+        self.benchmark_quantiles = benchmark_quantiles
+        self.current = {}  # (level, group, metric) -> KLLSketch
+        self.previous = {}
+        self.rotated_at = time.time()
+
+    def rotate(self, now=None):
+        self.previous = self.current
+        self.current = {}
+        self.rotated_at = now or time.time()
+
+    def _maybe_rotate(self, now):
+        now = now or time.time()
+        if now - self.rotated_at >= self.window:
+            self.rotate(now)
+
+    def add_value(self, sector, industry, metric, value, now=None):
+        if value is None or value != value:
+            return
+        self._maybe_rotate(now)
+        for level, group in (("industry", industry), ("sector", sector)):
+            if group:
+                sketch = self.current.get((level, group, metric))
+                if sketch is None:
+                    sketch = self.current[(level, group, metric)] = KLLSketch(self.k)
+                sketch.update(value)
+
+    def add(self, results, now=None):
+        """Adds every metric value of a fetch_all_ratios result."""
+        for _, metric, value, _, _ in iter_metrics(results):
+            self.add_value(results.get("sector"), results.get("industry"), metric, value, now)
+
+    def add_columns(self, sectors, industries, values, now=None):
+        """Adds a batch of (tickers, metrics) values in batch.metric_table order (e.g. UniverseStore.score()[0])."""
+        metrics = [metric for _, metric, _, _, _ in metric_table()]
+        for sector, industry, row in zip(sectors, industries, values):
+            for metric, value in zip(metrics, row):
+                self.add_value(sector, industry, metric, float(value), now)
+
+    def merge(self, other):
+        """Folds in statistics gathered elsewhere (e.g. by another worker) into the current generation."""
+        for generation in (other.previous, other.current):
+            for key, sketch in generation.items():
+                target = self.current.get(key)
+                if target is None:
+                    target = self.current[key] = KLLSketch(self.k)
+                target.merge(sketch)
+        return self
+
+    def sketch(self, level, group, metric):
+        """A merged sketch of both generations for a group, or None if nothing was seen."""
+        parts = [generation[(level, group, metric)] for generation in (self.previous, self.current) if (level, group, metric) in generation]
+        if not parts:
+            return None
+        merged = KLLSketch(self.k)
+        for part in parts:
+            merged.merge(part)
+        return merged
+
+    def distribution(self, level, group, metric, quantiles=DISTRIBUTION_QUANTILES):
+        """{"count", "min", "max", "p5", "p25", "p50", ...} for a group, or None."""
+        sketch = self.sketch(level, group, metric)
+        if sketch is None:
+            return None
+        distribution = {"count": sketch.count, "min": sketch.min, "max": sketch.max}
+        for fraction, value in zip(quantiles, sketch.quantiles(quantiles)):
+            distribution[f"p{round(fraction * 100):g}"] = value
+        return distribution
+
+    def benchmark(self, sector, industry, metric, fallback=None):
+        """
+        Peer range of a metric: the benchmark_quantiles of the industry, or of the sector when the
+        industry has fewer than min_count values, otherwise `fallback` (the static benchmark).
+        """
+        for level, group in (("industry", industry), ("sector", sector)):
+            if not group:
+                continue
+            sketch = self.sketch(level, group, metric)
+            if sketch is not None and sketch.count >= self.min_count:
+                return tuple(sketch.quantiles(self.benchmark_quantiles))
+        return fallback
+
+    def summary(self, level="sector"):
+        """{group: {metric: distribution}} for every group of a level."""
+        keys = sorted({key for generation in (self.previous, self.current) for key in generation if key[0] == level})
+        summary = {}
+        for _, group, metric in keys:
+            summary.setdefault(group, {})[metric] = self.distribution(level, group, metric)
+        return summary
@@ -1,4 +1,3 @@
-import yfinance as yf
 import math
 from config.profit.profitability_config import (
     INDUSTRY_ROA_BENCHMARK,
@@ -12,59 +11,37 @@ from config.profit.profitability_config import (
     DEFAULT_GROSS_PROFIT_MARGIN_BENCHMARK,
     DEFAULT_OPERATING_PROFIT_MARGIN_BENCHMARK
 )
+from stock_ratios.graph import FundamentalsGraph
 from utils.benchmark import (
-    get_industry_benchmark
+    get_industry_benchmark,
+    compare_to_benchmark,
+    recommendation_by_range
 )
+from utils import events
+from utils.tracing import span
 
 class ProfitabilityRatios:
-    def __init__(self, ticker):
+    def __init__(self, ticker, info=None, balance_sheet=None, financials=None, graph=None):
         """
-        Initialize with the stock ticker and fetch relevant financial data.
+        Initialize with the stock ticker and fetch relevant financial data (unless it is passed in).
+
+        A shared FundamentalsGraph can be passed instead so intermediates are computed once per ticker.
         """
         self.ticker = ticker
-        self.stock = yf.Ticker(ticker)
-        self.info = self.stock.info
-        self.income_statement = self.stock.financials
-        self.balance_sheet = self.stock.balance_sheet
-    
-    def _get_recommendation_by_range(self, value, benchmark_range, buy_if_below=True):
-        if value is None or benchmark_range is None:
-            return "Data Unavailable"
-        try:
-            lower_bound, upper_bound = benchmark_range
-        except TypeError: #Handle the case where benchmark_range is not a tuple
-            return "Data Unavailable"
+        self.graph = graph or FundamentalsGraph(ticker, info, balance_sheet, financials)
 
-        if buy_if_below:
-            if value < lower_bound:
-                return "Buy"
-            elif value > upper_bound:
-                return "Sell"
-            else:
-                return "Hold"
-        else:
-            if value > upper_bound:
-                return "Buy"
-            elif value < lower_bound:
-                return "Sell"
-            else:
-                return "Hold"
+    @property
+    def info(self):
+        return self.graph.value("info")
 
-    def _compare_to_benchmark(self, value, benchmark_range):
-        if value is None or benchmark_range is None:
-            return "Data Unavailable"
-        try:
-            lower_bound, upper_bound = benchmark_range
-        except TypeError:
-            return "Data Unavailable"
+    @property
+    def income_statement(self):
+        return self.graph.value("financials")
 
-        if value > upper_bound:
-            return "Above Benchmark"
-        elif value < lower_bound:
-            return "Below Benchmark"
-        else:
-            return "Within Benchmark"
-        
+    @property
+    def balance_sheet(self):
+        return self.graph.value("balance_sheet")
+    
     def _get_benchmark(self, ratio_type):
         sector = self.info.get("sector")
         industry = self.info.get("industry")
@@ -82,48 +59,19 @@ class ProfitabilityRatios:
             return None
 
     def get_net_profit(self):
-        try:
-            return self.income_statement.loc['Net Income'].iloc[0]
-        except (KeyError, IndexError):
-            return None
+        return self.graph.value("net_income")
         
     def get_revenue(self):
-        try:
-            return self.income_statement.loc['Total Revenue'].iloc[0]
-        except (KeyError, IndexError):
-            return None
+        return self.graph.value("total_revenue")
 
     def get_gross_profit(self):
-        try:
-            return self.income_statement.loc['Gross Profit'].iloc[0]
-        except (KeyError, IndexError):
-            return None
+        return self.graph.value("gross_profit")
 
     def get_equity(self):
-        possible_equity_lines = [
-            "Total Stockholder Equity",
-            "Total Equity Gross Minority Interest",
-            "Stockholders Equity",  # Add other common variations
-            "Equity",
-            "Total Common Equity"
-        ]
-        # print("Balance Sheet Index:", self.balance_sheet.index) # Print the index for debugging
-
-        try:
-            for equity_line in possible_equity_lines:
-                if equity_line in self.balance_sheet.index:
-                    equity_value = self.balance_sheet.loc[equity_line].iloc[0]
-                    print(f"Using equity line: {equity_line} with value {equity_value}")
-                    return equity_value
-            return None  # No suitable equity line found
-        except (KeyError, IndexError):
-            return None
+        return self.graph.value("equity")
 
     def get_total_assets(self):
-        try:
-            return self.balance_sheet.loc['Total Assets'].iloc[0]
-        except (KeyError, IndexError):
-            return None
+        return self.graph.value("total_assets")
 
     def _calculate_ratio(self, numerator, denominator):
         if numerator is None or denominator is None or denominator == 0:
@@ -135,18 +83,9 @@ class ProfitabilityRatios:
         try:
             # Fetch Net Income and Total Assets
             net_profit = self.get_net_profit()
-            total_assets_end = self.get_total_assets()  # End-of-year total assets
-            if net_profit is None or total_assets_end is None:
+            avg_total_assets = self.graph.value("average_total_assets")  # End value if start not available
+            if net_profit is None or avg_total_assets is None:
                 return {"ROA (%)": None, "Industry Benchmark (%)": None, "Comparison": "Data Unavailable", "Recommendation": "Data Unavailable"}
-        
-            # Calculate Average Total Assets if historical data is available
-            total_assets_start = (
-                self.balance_sheet.loc['Total Assets'].iloc[1]
-                if len(self.balance_sheet.loc['Total Assets']) > 1
-                else total_assets_end  # Use end value if start not available
-            )
-
-            avg_total_assets = (total_assets_end + total_assets_start) / 2
 
             if avg_total_assets == 0:
                 return {"ROA (%)": None, "Industry Benchmark (%)": None, "Comparison": "Cannot calculate ROA, Avg Total Assets is zero", "Recommendation": "Cannot calculate ROA, Avg Total Assets is zero"}
@@ -154,8 +93,8 @@ class ProfitabilityRatios:
             # Calculate ROA
             roa = self._calculate_ratio(net_profit, avg_total_assets)
             benchmark_range = self._get_benchmark("ROA")
-            comparison = self._compare_to_benchmark(roa, benchmark_range)
-            recommendation = self._get_recommendation_by_range(roa, benchmark_range)
+            comparison = compare_to_benchmark(roa, benchmark_range)
+            recommendation = recommendation_by_range(roa, benchmark_range)
 
             return {
                 "ROA (%)": round(roa, 2) if roa is not None else None,
@@ -193,13 +132,13 @@ class ProfitabilityRatios:
                 return {"ROE (%)": None, "Industry Benchmark (%)": None, "Comparison": "Invalid Data Type for Calculation", "Recommendation": "Invalid Data Type for Calculation"}
         
             if equity <= 0:  # Check for zero or negative equity
-                print("WARNING: Equity is zero or negative. ROE cannot be meaningfully calculated.")
+                events.emit(events.WARNING, "nonpositive_equity", ticker=self.ticker, ratio="ROE")
                 return {"ROE (%)": None, "Industry Benchmark (%)": None, "Comparison": "Cannot calculate ROE, Equity is zero or negative", "Recommendation": "Cannot calculate ROE, Equity is zero or negative"}
 
             roe = self._calculate_ratio(net_profit, equity)
             benchmark_range = self._get_benchmark("ROE")
-            comparison = self._compare_to_benchmark(roe, benchmark_range)
-            recommendation = self._get_recommendation_by_range(roe, benchmark_range)
+            comparison = compare_to_benchmark(roe, benchmark_range)
+            recommendation = recommendation_by_range(roe, benchmark_range)
 
             return {
                 "ROE (%)": round(roe, 2) if roe is not None else None,
@@ -221,8 +160,8 @@ class ProfitabilityRatios:
             
             npm = self._calculate_ratio(net_profit, revenue)
             benchmark_range = self._get_benchmark("Net Profit Margin")
-            comparison = self._compare_to_benchmark(npm, benchmark_range)
-            recommendation = self._get_recommendation_by_range(npm, benchmark_range)
+            comparison = compare_to_benchmark(npm, benchmark_range)
+            recommendation = recommendation_by_range(npm, benchmark_range)
 
             return {
                 "Net Profit Margin (%)": round(npm, 2) if npm is not None else None,
@@ -245,8 +184,8 @@ class ProfitabilityRatios:
             gpm = self._calculate_ratio(gross_profit, revenue)
             benchmark_range = self._get_benchmark("Gross Profit Margin")
 
-            comparison = self._compare_to_benchmark(gpm, benchmark_range)
-            recommendation = self._get_recommendation_by_range(gpm, benchmark_range)
+            comparison = compare_to_benchmark(gpm, benchmark_range)
+            recommendation = recommendation_by_range(gpm, benchmark_range)
 
             return {
                 "Gross Profit Margin (%)": round(gpm, 2) if gpm is not None else None,
@@ -268,5 +207,6 @@ class ProfitabilityRatios:
         }
         results = {}
         for ratio_name, calculation_method in ratios.items():
-            results[ratio_name] = calculation_method()
+            with span("ratio", ticker=self.ticker, category="Profitability", ratio=ratio_name):
+                results[ratio_name] = calculation_method()
         return results
@@ -0,0 +1,141 @@
+import heapq
+import math
+from stock_ratios.batch import metric_table
+from stock_ratios.results import metric_value
+
+OVERALL_SCORE = "overall_score"
+ALL = "All"
+
+
+class _Kept:
+    """Heap entry ordered worst-first, so the root of a bounded heap is the next one to evict."""
+
+    __slots__ = ("key", "ticker", "value")
+
+    def __init__(self, key, ticker, value):
+        self.key = key
+        self.ticker = ticker
+        self.value = value
+
+    def __lt__(self, other):
+        return self.key > other.key
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def top_k(rows, k, lowest=False, group_by=None, sector=None, industry=None):
+    """
+    Selects the k highest (or lowest) values per group from (ticker, sector, industry, value) rows.
+
+    Rows are consumed one at a time into a bounded heap per group, so memory is k entries per
+    group whatever the universe size; groups come back empty for k <= 0. `group_by` is None,
+    "sector" or "industry"; `sector` and `industry` filter rows first. Ties are broken by ticker,
+    and missing values (None/NaN) rank after every real value in either direction, so results
+    are deterministic.
+
+    Returns {group: [{"rank", "ticker", "value"}, ...]} best first; the group is "All" when not
+    grouping.
+    """
+    heaps = {}
+    for ticker, row_sector, row_industry, value in rows:
+        if (sector is not None and row_sector != sector) or (industry is not None and row_industry != industry):
+            continue
+        if group_by == "sector":
+            group = row_sector or "Unknown"
+        elif group_by == "industry":
+            group = row_industry or "Unknown"
+        else:
+            group = ALL
+        if _missing(value):
+            key = (1, 0.0, ticker)
+            value = None
+        else:
+            key = (0, value if lowest else -value, ticker)
+        heap = heaps.setdefault(group, [])
+        if len(heap) < k:
+            heapq.heappush(heap, _Kept(key, ticker, value))
+        elif heap and key < heap[0].key:  # k <= 0 keeps nothing
+            heapq.heapreplace(heap, _Kept(key, ticker, value))
+
+    ranked = {}
+    for group in sorted(heaps):
+        kept = sorted(heaps[group], key=lambda entry: entry.key)
+        ranked[group] = [{"rank": rank, "ticker": entry.ticker, "value": entry.value} for rank, entry in enumerate(kept, 1)]
+    return ranked
+
+
+def metric_names():
+    """Metrics rows can be ranked by: OVERALL_SCORE and every name in batch.metric_table."""
+    return [OVERALL_SCORE] + [name for _, name, _, _, _ in metric_table()]
+
+
+def metric_category(metric):
+    """Category of a metric name in batch.metric_table, or None."""
+    for category, name, _, _, _ in metric_table():
+        if name == metric:
+            return category
+    return None
+
+
+def warehouse_rows(warehouse, metric=OVERALL_SCORE, run_date=None, sector=None, industry=None):
+    """Streams (ticker, sector, industry, value) rows of one warehouse run (the latest by default)."""
+    run_date = run_date or (warehouse.run_dates() or [None])[-1]
+    filters = "AND (? IS NULL OR s.sector = ?) AND (? IS NULL OR s.industry = ?)"
+    if metric == OVERALL_SCORE:
+        cursor = warehouse.conn.execute(
+            f"SELECT s.ticker, s.sector, s.industry, s.overall_score FROM scores s WHERE s.run_date = ? {filters}",
+            (run_date, sector, sector, industry, industry),
+        )
+    else:
+        cursor = warehouse.conn.execute(
+            "SELECT m.ticker, s.sector, s.industry, m.value FROM metrics m "
+            "JOIN scores s ON s.run_date = m.run_date AND s.ticker = m.ticker "
+            f"WHERE m.run_date = ? AND m.metric = ? {filters}",
+            (run_date, metric, sector, sector, industry, industry),
+        )
+    return iter(cursor)
+
+
+def _array_values(array):
+    """Python values of an Arrow array, decoding its dictionary once instead of per row."""
+    import pyarrow as pa
+    if pa.types.is_dictionary(array.type):
+        dictionary = array.dictionary.to_pylist()
+        return [dictionary[i] if i >= 0 else None for i in array.indices.fill_null(-1).to_numpy().tolist()]
+    if pa.types.is_floating(array.type):
+        return array.to_numpy(zero_copy_only=False).tolist()  # Nulls become NaN
+    return array.to_pylist()
+
+
+def snapshot_rows(snapshot, metric=OVERALL_SCORE, batch_size=4096):
+    """
+    Rows from a UniverseSnapshot's columns; metric values need a snapshot written with fundamentals.
+    The memory-mapped columns are decoded `batch_size` rows at a time, so memory stays constant.
+    Raises KeyError right away if the snapshot has no column for the metric.
+    """
+    from stock_ratios.snapshot import value_column
+    if metric == OVERALL_SCORE:
+        column = OVERALL_SCORE
+    else:
+        column = value_column(metric_category(metric), metric)
+        if column not in snapshot.table.column_names:
+            raise KeyError(f"Snapshot {snapshot.path} has no values for metric '{metric}'")
+    return _batch_rows(snapshot.table.select(["ticker", "sector", "industry", column]), batch_size)
+
+
+def _batch_rows(table, batch_size):
+    for batch in table.to_batches(max_chunksize=batch_size):  # Zero-copy slices of the map
+        yield from zip(*(_array_values(array) for array in batch.columns))
+
+
+def result_rows(results, metric=OVERALL_SCORE):
+    """Rows from a stream of fetch_all_ratios results (e.g. read_results or a DirectorySink), one at a time."""
+    category = metric_category(metric) if metric != OVERALL_SCORE else None
+    for result in results:
+        if metric == OVERALL_SCORE:
+            value = result.get(OVERALL_SCORE)
+        else:
+            value = metric_value(result.get("analysis_result", {}).get(category, {}).get(metric))
+        yield result["ticker"], result.get("sector"), result.get("industry"), value
@@ -0,0 +1,65 @@
+import json
+import math
+
+# Keys in a metric's result dict that never hold the metric's own value
+_NON_VALUE_KEYS = ("benchmark", "comparison", "recommendation", "error", "forward")
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        value = float(value)
+        return None if math.isnan(value) else value
+    if isinstance(value, str) and value.endswith("%"):  # e.g. the dividend metrics' "1.5%"
+        try:
+            return float(value[:-1])
+        except ValueError:
+            return None
+    return None
+
+
+def metric_value(metric_data):
+    """Returns the numeric value of a metric result dict (e.g. "ROA (%)", "pb_ratio"), or None."""
+    if not isinstance(metric_data, dict):
+        return None
+    for key, value in metric_data.items():
+        if any(word in key.lower() for word in _NON_VALUE_KEYS):
+            continue
+        number = _number(value)
+        if number is not None:
+            return number
+    return None
+
+
+def metric_comparison(metric_data):
+    """Returns the benchmark comparison of a metric result dict, or "Unavailable"."""
+    if isinstance(metric_data, dict):
+        for key, value in metric_data.items():
+            if "comparison" in key.lower():
+                return value
+    return "Unavailable"
+
+
+def metric_recommendation(metric_data):
+    if not isinstance(metric_data, dict):
+        return None
+    return metric_data.get("recommendation", metric_data.get("Recommendation"))
+
+
+def iter_metrics(results):
+    """
+    Yields (category, metric, value, comparison, recommendation) for every metric of a result.
+    Compact results without per-metric detail (e.g. from `score --output`) yield nothing.
+    """
+    for category, metrics in (results.get("analysis_result") or {}).items():
+        for metric, metric_data in metrics.items():
+            yield category, metric, metric_value(metric_data), metric_comparison(metric_data), metric_recommendation(metric_data)
+
+
+def read_results(path):
+    """Yields results from a JSON-lines file (e.g. `coordinator --output`), one line at a time."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
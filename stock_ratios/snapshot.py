@@ -0,0 +1,169 @@
+import json
+import os
+import numpy as np
+from stock_ratios.batch import CATEGORIES, metric_table, fundamentals_matrix, metric_values
+from stock_ratios.fundamentals import FUNDAMENTAL_FIELDS, extract_fundamentals
+from stock_ratios.results import metric_recommendation
+from utils.data_fetcher import default_fetcher, fetch_dataset
+
+try:
+    import pyarrow as pa
+except ImportError:  # Optional dependency, only needed for snapshots
+    pa = None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Universe snapshots require pyarrow: pip install pyarrow")
+
+
+def value_column(category, metric):
+    return f"value:{category}/{metric}"
+
+
+def recommendation_column(category, metric):
+    return f"recommendation:{category}/{metric}"
+
+
+def collect_universe(tickers):
+    """
+    Analyses tickers and returns (results, fundamentals, failed): lists ready for write_snapshot
+    and a {ticker: error} map of tickers that could not be analysed, which are left out.
+    """
+    from stock_ratios.core import StockRatios
+
+    results = []
+    fundamentals = []
+    failed = {}
+    for ticker in tickers:
+        try:
+            result = StockRatios(ticker).fetch_all_ratios()
+            ticker_fundamentals = extract_fundamentals(
+                fetch_dataset(ticker, "info"), fetch_dataset(ticker, "balance_sheet"), fetch_dataset(ticker, "financials")
+            )
+        except Exception as e:
+            failed[ticker] = str(e)
+            continue
+        finally:
+            default_fetcher.invalidate(ticker)
+        results.append(result)
+        fundamentals.append(ticker_fundamentals)
+    return results, fundamentals, failed
+
+
+def write_snapshot(path, results, fundamentals=None):
+    """
+    Writes a universe snapshot as an uncompressed Arrow IPC (Feather v2) file.
+
+    One row per ticker holds the raw fundamentals, every metric value and recommendation,
+    the category and overall recommendations, the overall score and the full result dict
+    as JSON. The file is left uncompressed so readers can memory-map it without copying.
+    """
+    _require_pyarrow()
+    columns = {
+        "ticker": pa.array([result["ticker"] for result in results], pa.string()),
+        "sector": pa.array([result.get("sector") for result in results], pa.string()).dictionary_encode(),
+        "industry": pa.array([result.get("industry") for result in results], pa.string()).dictionary_encode(),
+        "overall_score": pa.array(np.array([result["overall_score"] for result in results], dtype=np.float64)),
+        "overall_recommendation": pa.array([result["overall_recommendation"] for result in results], pa.string()).dictionary_encode(),
+    }
+    for category in CATEGORIES:
+        columns[f"category_recommendation:{category}"] = pa.array(
+            [result["category_recommendations"].get(category) for result in results], pa.string()
+        ).dictionary_encode()
+
+    if fundamentals is not None:
+        matrix = fundamentals_matrix(fundamentals)
+        for i, field in enumerate(FUNDAMENTAL_FIELDS):
+            columns[f"fundamental:{field}"] = pa.array(np.ascontiguousarray(matrix[:, i]))
+        values = metric_values(matrix)
+        for i, (category, metric, _, _, _) in enumerate(metric_table()):
+            columns[value_column(category, metric)] = pa.array(np.ascontiguousarray(values[:, i]))
+
+    for category, metric, _, _, _ in metric_table():
+        columns[recommendation_column(category, metric)] = pa.array(
+            [metric_recommendation(result["analysis_result"].get(category, {}).get(metric)) for result in results], pa.string()
+        ).dictionary_encode()
+    columns["result_json"] = pa.array([json.dumps(result, default=str) for result in results], pa.string())
+
+    table = pa.table(columns)
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)  # Readers never map a half-written snapshot
+    return table.num_rows
+
+
+class SnapshotStockRatios:
+    """StockRatios-style accessors answered from a snapshot row instead of refetching."""
+
+    def __init__(self, ticker, results):
+        self.ticker = ticker
+        self._results = results
+
+    def get_valuation_ratios(self):
+        return self._results["analysis_result"]["Valuation"]
+
+    def get_profitability_ratios(self):
+        return self._results["analysis_result"]["Profitability"]
+
+    def get_liquidity_ratios(self):
+        return self._results["analysis_result"]["Liquidity"]
+
+    def get_debt_ratios(self):
+        return self._results["analysis_result"]["Debt"]
+
+    def get_efficiency_ratios(self):
+        return self._results["analysis_result"]["Efficiency"]
+
+    def fetch_all_ratios(self):
+        return self._results
+
+
+class UniverseSnapshot:
+    """A memory-mapped universe snapshot; every process opening it shares one page-cache copy."""
+
+    def __init__(self, path):
+        _require_pyarrow()
+        self.path = path
+        self._source = pa.memory_map(path, "r")
+        self.table = pa.ipc.open_file(self._source).read_all()  # Zero-copy: buffers point into the map
+        self._index = None
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def _row(self, ticker):
+        if self._index is None:
+            self._index = {value: row for row, value in enumerate(self.table.column("ticker").to_pylist())}
+        try:
+            return self._index[ticker]
+        except KeyError:
+            raise KeyError(f"{ticker} is not in snapshot {self.path}") from None
+
+    def column(self, name):
+        """Returns a column as a NumPy array, without copying for numeric columns."""
+        column = self.table.column(name)
+        if pa.types.is_floating(column.type) and column.num_chunks == 1:
+            return column.chunk(0).to_numpy(zero_copy_only=True)
+        return column.to_numpy()
+
+    def results(self, ticker):
+        """Returns the full fetch_all_ratios result stored for a ticker."""
+        return json.loads(self.table.column("result_json")[self._row(ticker)].as_py())
+
+    def fundamentals(self, ticker):
+        row = self._row(ticker)
+        return {
+            field: self.table.column(f"fundamental:{field}")[row].as_py()
+            for field in FUNDAMENTAL_FIELDS
+            if f"fundamental:{field}" in self.table.column_names
+        }
+
+    def stock_ratios(self, ticker):
+        return SnapshotStockRatios(ticker, self.results(ticker))
+
+    def close(self):
+        self.table = None
+        self._source.close()
@@ -0,0 +1,235 @@
+import sys
+import numpy as np
+from stock_ratios.batch import CATEGORIES, RECOMMENDATIONS, benchmark_matrices, engine_weights, score_block, recommendations_for
+from stock_ratios.fundamentals import FUNDAMENTAL_FIELDS, INFO_FIELDS, balance_sheet_columns, extract_fundamentals, _to_float
+from utils.data_fetcher import default_fetcher
+from utils.recommendation_engine import RecommendationEngine
+from utils import events
+from utils.tracing import span
+
+NO_PERIOD = np.iinfo(np.int32).min
+
+
+class _Categories:
+    """Interned category values with small integer codes (-1 is missing)."""
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value):
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        return code
+
+    def value(self, code):
+        return self.values[code] if code >= 0 else None
+
+
+class UniverseStore:
+    """
+    Compact columnar store of canonical fundamentals for a universe, one row per ticker-period.
+
+    Values live in one contiguous (rows, fields) array (float32 by default), rows carry an
+    interned ticker code and the period end as days since the epoch, and sector/industry are
+    per-ticker integer codes. Nothing else is kept per ticker, so the statement frames can be
+    dropped as soon as a ticker is added.
+    """
+
+    def __init__(self, dtype=np.float32, capacity=1024):
+        self.dtype = np.dtype(dtype)
+        self.rows = 0
+        self.values = np.full((capacity, len(FUNDAMENTAL_FIELDS)), np.nan, dtype=self.dtype)
+        self.row_tickers = np.zeros(capacity, dtype=np.int32)
+        self.row_periods = np.full(capacity, NO_PERIOD, dtype=np.int32)
+        self.tickers = _Categories()
+        self.sectors = _Categories()
+        self.industries = _Categories()
+        # Per ticker code: sector/industry codes and the row of the latest period
+        self.ticker_sectors = np.zeros(0, dtype=np.int16)
+        self.ticker_industries = np.zeros(0, dtype=np.int16)
+        self.latest = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.tickers.values)
+
+    def _grow_rows(self):
+        capacity = max(2 * len(self.values), 1)
+        values = np.full((capacity, self.values.shape[1]), np.nan, dtype=self.dtype)
+        values[:self.rows] = self.values[:self.rows]
+        self.values = values
+        self.row_tickers = np.resize(self.row_tickers, capacity)
+        self.row_periods = np.resize(self.row_periods, capacity)
+
+    def _ticker_code(self, ticker):
+        code = self.tickers.code(ticker)
+        if code >= len(self.latest):
+            size = max(2 * len(self.latest), code + 1)
+            self.ticker_sectors = np.concatenate([self.ticker_sectors, np.full(size - len(self.ticker_sectors), -1, dtype=np.int16)])
+            self.ticker_industries = np.concatenate([self.ticker_industries, np.full(size - len(self.ticker_industries), -1, dtype=np.int16)])
+            self.latest = np.concatenate([self.latest, np.full(size - len(self.latest), -1, dtype=np.int64)])
+        return code
+
+    def add(self, ticker, fundamentals, period_end=None, sector=None, industry=None):
+        """Adds one period of a ticker's fundamentals dict (see extract_fundamentals) and returns its row."""
+        code = self._ticker_code(ticker)
+        if sector is not None:
+            self.ticker_sectors[code] = self.sectors.code(sector)
+        if industry is not None:
+            self.ticker_industries[code] = self.industries.code(industry)
+
+        if self.rows == len(self.values):
+            self._grow_rows()
+        row = self.rows
+        self.rows += 1
+        self.values[row] = [fundamentals.get(field, np.nan) for field in FUNDAMENTAL_FIELDS]
+        self.row_tickers[row] = code
+        period = NO_PERIOD if period_end is None else int(np.datetime64(period_end, "D").astype(np.int64))
+        self.row_periods[row] = period
+
+        latest = self.latest[code]
+        if latest < 0 or period >= self.row_periods[latest]:
+            self.latest[code] = row
+        return row
+
+    def add_statements(self, ticker, info, balance_sheet, financials):
+        """
+        Adds every reported period of a ticker from yfinance data.
+
+        Info fields (price-driven) only describe the latest period and are left missing for
+        older ones. Balance sheet columns are matched to the financials by period end, and a
+        period the balance sheet does not report gets NaN balances. Nothing references the
+        frames afterwards.
+        """
+        if financials is None or financials.empty:
+            self.add(ticker, extract_fundamentals(info, balance_sheet, None), None, info.get("sector"), info.get("industry"))
+            return
+        balance_columns = balance_sheet_columns(balance_sheet, financials)
+        for column, period_end in enumerate(financials.columns):
+            balance_column = balance_columns[column]
+            fundamentals = extract_fundamentals(
+                info if column == 0 else {}, balance_sheet if balance_column is not None else None, financials, column, balance_column
+            )
+            self.add(ticker, fundamentals, period_end, info.get("sector"), info.get("industry"))
+
+    def add_quarterly_statements(self, ticker, info, quarterly_balance_sheet, quarterly_financials):
+        """
+        Adds a trailing-twelve-month period for every window of four quarters of a ticker's
+        yfinance quarterly statements, all windows computed in one ttm.ttm_universe pass. A
+        ticker with fewer than four quarters gets a single row of info fields only.
+        """
+        from stock_ratios.ttm import quarter_arrays, ttm_universe, window_fundamentals  # pandas is only needed for TTM
+        period_ends, income, balances = quarter_arrays(quarterly_financials, quarterly_balance_sheet)
+        sector, industry = info.get("sector"), info.get("industry")
+        if len(period_ends) < 4:
+            self.add(ticker, extract_fundamentals(info, None, None), None, sector, industry)
+            return
+        ttm_income, latest, year_ago = ttm_universe(income[np.newaxis], balances[np.newaxis])
+        windows = ttm_income.shape[1]
+        for window in range(windows):
+            fundamentals = window_fundamentals(ttm_income[0, window], latest[0, window], year_ago[0, window])
+            if window == windows - 1:
+                fundamentals.update((field, _to_float(info.get(field))) for field in INFO_FIELDS)
+            self.add(ticker, fundamentals, period_ends[window + 3], sector, industry)
+
+    def load(self, ticker, fetcher=None, ttm=False):
+        """
+        Fetches a ticker, adds its periods (trailing-twelve-month ones built from the quarterly
+        statements with ttm=True), then evicts its raw datasets from the fetcher cache.
+        """
+        fetcher = fetcher or default_fetcher
+        try:
+            with span("ticker", ticker=ticker, ttm=ttm), events.ticker_scope(ticker):
+                if ttm:
+                    self.add_quarterly_statements(
+                        ticker,
+                        fetcher.get(ticker, "info"),
+                        fetcher.get(ticker, "quarterly_balance_sheet"),
+                        fetcher.get(ticker, "quarterly_financials"),
+                    )
+                else:
+                    self.add_statements(
+                        ticker, fetcher.get(ticker, "info"), fetcher.get(ticker, "balance_sheet"), fetcher.get(ticker, "financials")
+                    )
+        finally:
+            fetcher.invalidate(ticker)
+
+    def ticker_list(self):
+        return list(self.tickers.values)
+
+    def latest_rows(self):
+        """Row of the latest period for every ticker, in ticker code order."""
+        return self.latest[:len(self)]
+
+    def matrix(self, rows=None):
+        """(rows, fields) float64 fundamentals for the batch kernel (latest period per ticker by default)."""
+        rows = self.latest_rows() if rows is None else rows
+        return self.values[rows].astype(np.float64)
+
+    def benchmarks(self, statistics=None):
+        """(tickers, metrics) lower and upper bounds, resolved once per distinct sector/industry pair."""
+        count = len(self)
+        pairs = np.stack([self.ticker_sectors[:count], self.ticker_industries[:count]], axis=1)
+        unique, inverse = np.unique(pairs, axis=0, return_inverse=True)
+        lower, upper = benchmark_matrices(
+            [self.sectors.value(sector) for sector, _ in unique],
+            [self.industries.value(industry) for _, industry in unique],
+            statistics,
+        )
+        inverse = inverse.reshape(-1)
+        return lower[inverse], upper[inverse]
+
+    def score(self, recommendation_engine=None, processes=None, statistics=None):
+        """
+        Scores the latest period of every ticker and returns (values, codes, category scores,
+        overall scores), one row per ticker code. `processes` > 1 uses the shared-memory pool,
+        and `statistics` (peer_statistics.SectorStatistics) supplies live peer benchmarks.
+        """
+        engine = recommendation_engine or RecommendationEngine()
+        with span("scoring", tickers=len(self.tickers.values), processes=processes or 1):
+            fundamentals = self.matrix()
+            lower, upper = self.benchmarks(statistics)
+            if processes and processes > 1:
+                from stock_ratios.parallel import score_universe_parallel
+                scores = score_universe_parallel(fundamentals, lower, upper, engine, processes)
+                output = (scores.values.copy(), scores.codes.copy(), scores.category_scores.copy(), scores.overall_scores.copy())
+                scores.release()
+                return output
+            return score_block(fundamentals, lower, upper, *engine_weights(engine))
+
+    def results(self, recommendation_engine=None, processes=None, statistics=None):
+        """Yields a compact result dict per ticker (scores and recommendations, no per-metric detail)."""
+        engine = recommendation_engine or RecommendationEngine()
+        _, _, categories, overall = self.score(engine, processes, statistics)
+        overall_codes = recommendations_for(overall, engine)
+        category_codes = recommendations_for(categories, engine)
+        for code, ticker in enumerate(self.tickers.values):
+            yield {
+                "ticker": ticker,
+                "sector": self.sectors.value(self.ticker_sectors[code]),
+                "industry": self.industries.value(self.ticker_industries[code]),
+                "overall_score": float(overall[code]),
+                "overall_recommendation": RECOMMENDATIONS[overall_codes[code]],
+                "category_recommendations": {
+                    category: RECOMMENDATIONS[category_codes[code, i]] for i, category in enumerate(CATEGORIES)
+                },
+            }
+
+    def memory_usage(self):
+        """Bytes used by each part of the store (capacity included) and per stored ticker-period."""
+        usage = {
+            "values": self.values.nbytes,
+            "row_tickers": self.row_tickers.nbytes,
+            "row_periods": self.row_periods.nbytes,
+            "ticker_codes": self.ticker_sectors.nbytes + self.ticker_industries.nbytes + self.latest.nbytes,
+            "strings": sum(sys.getsizeof(value) for values in (self.tickers.values, self.sectors.values, self.industries.values) for value in values),
+        }
+        usage["total"] = sum(usage.values())
+        usage["rows"] = self.rows
+        usage["tickers"] = len(self)
+        usage["bytes_per_row"] = usage["total"] / self.rows if self.rows else 0.0
+        return usage
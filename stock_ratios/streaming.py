@@ -0,0 +1,156 @@
+import queue
+import socket
+import time
+from stock_ratios.valuation import ValuationRatios
+from utils.recommendation_engine import RecommendationEngine
+
+# info fields that move proportionally with the share price
+PRICE_SCALED_FIELDS = ("trailingPE", "forwardPE", "priceToBook", "priceToSalesTrailing12Months", "marketCap")
+# info fields that move inversely with the share price
+PRICE_INVERSE_FIELDS = ("dividendYield",)
+
+
+def parse_tick(line):
+    """Parses a "TICKER,PRICE" line into a (ticker, price) tuple, or None if malformed."""
+    try:
+        ticker, price = line.strip().split(",", 1)
+        return ticker.strip(), float(price)
+    except ValueError:
+        return None
+
+
+class QueueTickSource:
+    """Yields (ticker, price) ticks put on an in-process queue until the sentinel is received."""
+
+    def __init__(self, tick_queue=None, sentinel=None):
+        self.queue = tick_queue if tick_queue is not None else queue.Queue()
+        self.sentinel = sentinel
+
+    def put(self, ticker, price):
+        self.queue.put((ticker, price))
+
+    def close(self):
+        self.queue.put(self.sentinel)
+
+    def __iter__(self):
+        while True:
+            tick = self.queue.get()
+            if tick == self.sentinel:
+                return
+            yield tick
+
+
+class FileTickSource:
+    """Yields ticks from a file of "TICKER,PRICE" lines, optionally tailing it for new lines."""
+
+    def __init__(self, path, follow=False, poll_interval=0.1):
+        self.path = path
+        self.follow = follow
+        self.poll_interval = poll_interval
+
+    def __iter__(self):
+        with open(self.path) as f:
+            while True:
+                line = f.readline()
+                if not line:
+                    if not self.follow:
+                        return
+                    time.sleep(self.poll_interval)
+                    continue
+                tick = parse_tick(line)
+                if tick is not None:
+                    yield tick
+
+
+class SocketTickSource:
+    """Yields ticks from a local socket that streams "TICKER,PRICE" lines."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    def __iter__(self):
+        with socket.create_connection((self.host, self.port)) as conn:
+            with conn.makefile("r") as stream:
+                for line in stream:
+                    tick = parse_tick(line)
+                    if tick is not None:
+                        yield tick
+
+
+class ValuationStream:
+    """
+    Keeps per-ticker valuation state and incrementally rescores a ticker on each price tick.
+
+    Only the ticked ticker's price-driven info fields are rescaled in place, its six valuation
+    ratios recomputed and its overall score recombined with the cached scores of the
+    statement-driven categories, so the cost of a tick does not depend on the universe size.
+    """
+
+    def __init__(self, recommendation_engine=None, sink=None):
+        self.recommendation_engine = recommendation_engine or RecommendationEngine()
+        self.sink = sink
+        self._states = {}
+
+    def register(self, ticker, info, analysis_results=None):
+        """Registers a ticker from already fetched info and, optionally, its full analysis results."""
+        category_scores = {}
+        for category, category_data in (analysis_results or {}).items():
+            if category != "Valuation":
+                category_scores[category] = self.recommendation_engine.calculate_category_score(category_data, category)
+        category_scores["Valuation"] = 0
+        self._states[ticker] = {
+            "valuation": ValuationRatios(ticker, info=dict(info)),
+            "price": info.get("currentPrice") or info.get("regularMarketPrice"),
+            "category_scores": category_scores,
+        }
+
+    def register_stock_ratios(self, stock_ratios):
+        """Registers a ticker from a StockRatios instance without refetching its data."""
+        self.register(stock_ratios.ticker, stock_ratios.valuation.info, stock_ratios.fetch_all_ratios()["analysis_result"])
+
+    def on_tick(self, ticker, price):
+        """Applies a price tick and returns the updated row, or None for unregistered tickers."""
+        state = self._states.get(ticker)
+        if state is None or price is None or price <= 0:
+            return None
+
+        valuation = state["valuation"]
+        info = valuation.info
+        previous_price = state["price"]
+        if previous_price:
+            change = price / previous_price
+            for field in PRICE_SCALED_FIELDS:
+                if info.get(field) is not None:
+                    info[field] *= change
+            for field in PRICE_INVERSE_FIELDS:
+                if info.get(field) is not None:
+                    info[field] /= change
+        info["currentPrice"] = price
+        state["price"] = price
+
+        engine = self.recommendation_engine
+        valuation_results = valuation.fetch_all_ratios()
+        category_scores = state["category_scores"]
+        category_scores["Valuation"] = engine.calculate_category_score(valuation_results, "Valuation")
+        overall_score = engine.combine_category_scores(category_scores)
+
+        row = {
+            "ticker": ticker,
+            "price": price,
+            "valuation": valuation_results,
+            "valuation_recommendation": engine.get_overall_recommendation(category_scores["Valuation"]),
+            "overall_score": overall_score,
+            "overall_recommendation": engine.get_overall_recommendation(overall_score),
+        }
+        if self.sink is not None:
+            self.sink(row)
+        return row
+
+    def run(self, source):
+        """Consumes ticks from a source until it is exhausted and returns the number of rows emitted."""
+        emitted = 0
+        for ticker, price in source:
+            if self.on_tick(ticker, price) is not None:
+                emitted += 1
+        return emitted
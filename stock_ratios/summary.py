@@ -0,0 +1,159 @@
+from collections import Counter, defaultdict
+from stock_ratios.results import iter_metrics
+
+# Lower is more notable; anything else (within benchmark, unavailable) ranks last
+COMPARISON_PRIORITIES = {"Above Benchmark": 1, "Below Benchmark": 2}
+RECOMMENDATION_PRIORITIES = {"Buy": 1, "Sell": 2, "Hold": 3}
+COMPARISON_WEIGHT = 0.6
+RECOMMENDATION_WEIGHT = 0.4
+COMPARISON_BUCKETS = ("Above Benchmark", "Below Benchmark", "Within Benchmark", "Unavailable")
+
+
+def _bucket(comparison):
+    return comparison if comparison in COMPARISON_BUCKETS else "Unavailable"
+
+
+def _tally(recommendation):
+    recommendation = (recommendation or "Hold").lower()
+    if recommendation.startswith("buy"):
+        return "Buy"
+    elif recommendation.startswith("sell"):
+        return "Sell"
+    return "Hold"
+
+
+def metric_priority(comparison, recommendation):
+    """Weighted priority of a metric from its benchmark comparison and recommendation (lower first)."""
+    comparison_priority = COMPARISON_PRIORITIES.get(comparison, 3)
+    recommendation_priority = RECOMMENDATION_PRIORITIES.get((recommendation or "Hold").split()[0], 3)
+    return COMPARISON_WEIGHT * comparison_priority + RECOMMENDATION_WEIGHT * recommendation_priority
+
+
+def summarize(results):
+    """
+    Summarizes one already computed fetch_all_ratios result.
+
+    Metrics are grouped per category by benchmark comparison with their priority, and
+    metric recommendations are counted. Nothing is fetched. The shape is the one
+    summarize_stock_ratios always printed, plus the overall score and recommendation.
+    """
+    summary = {}
+    overall_recommendations = {"Buy": 0, "Sell": 0, "Hold": 0}
+    ratio_priorities = {}
+    for category, metric, _, comparison, recommendation in iter_metrics(results):
+        priority = metric_priority(comparison, recommendation)
+        ratio_priorities[metric] = priority
+        category_summary = summary.setdefault(category, {bucket: [] for bucket in COMPARISON_BUCKETS})
+        category_summary[_bucket(comparison)].append((metric, priority))
+        overall_recommendations[_tally(recommendation)] += 1
+
+    ticker = results["ticker"]
+    return {
+        "Stock": ticker,
+        "Summary Statement": f"{ticker} has a mix of above and below benchmark ratios, with a total of {sum(overall_recommendations.values())} recommendations.",
+        "Summary": summary,
+        "Overall Recommendations": overall_recommendations,
+        "Overall Score": results.get("overall_score"),
+        "Overall Recommendation": results.get("overall_recommendation"),
+        "Ratio Priorities": {
+            "Priorities": ratio_priorities,
+            "Description": "The priority scores are calculated based on the comparison and recommendation priorities.",
+        },
+    }
+
+
+class UniverseSummary:
+    """
+    Universe and sector level aggregation of results, one result at a time.
+
+    Only counters and running sums keyed by category, metric and sector are kept, so memory
+    does not grow with the number of tickers.
+    """
+
+    def __init__(self):
+        self.tickers = 0
+        self.without_metrics = 0  # Compact results (e.g. from `score --output`) only add to the overall counts
+        self.score_total = 0.0
+        self.overall_recommendations = Counter()
+        self.category_recommendations = defaultdict(Counter)  # category -> recommendation counts
+        self.comparisons = defaultdict(Counter)  # category -> comparison bucket counts
+        self.metric_recommendations = defaultdict(Counter)  # category -> metric recommendation counts
+        self.priorities = defaultdict(lambda: [0.0, 0])  # (category, metric) -> [priority sum, count]
+        self.sectors = defaultdict(lambda: {"tickers": 0, "score_total": 0.0, "recommendations": Counter()})
+        self.sector_comparisons = defaultdict(Counter)  # (sector, category) -> comparison bucket counts
+
+    def add(self, results):
+        sector = results.get("sector") or "Unknown"
+        score = results.get("overall_score") or 0.0
+        self.tickers += 1
+        self.score_total += score
+        self.overall_recommendations[results.get("overall_recommendation")] += 1
+        for category, recommendation in results.get("category_recommendations", {}).items():
+            self.category_recommendations[category][recommendation] += 1
+
+        sector_totals = self.sectors[sector]
+        sector_totals["tickers"] += 1
+        sector_totals["score_total"] += score
+        sector_totals["recommendations"][results.get("overall_recommendation")] += 1
+
+        if not results.get("analysis_result"):
+            self.without_metrics += 1
+        for category, metric, _, comparison, recommendation in iter_metrics(results):
+            bucket = _bucket(comparison)
+            self.comparisons[category][bucket] += 1
+            self.sector_comparisons[(sector, category)][bucket] += 1
+            self.metric_recommendations[category][_tally(recommendation)] += 1
+            priority = self.priorities[(category, metric)]
+            priority[0] += metric_priority(comparison, recommendation)
+            priority[1] += 1
+
+    def summary(self):
+        categories = {}
+        for category in dict.fromkeys(list(self.comparisons) + list(self.category_recommendations)):
+            metrics = {
+                metric: round(total / count, 3)
+                for (metric_category, metric), (total, count) in self.priorities.items()
+                if metric_category == category and count
+            }
+            categories[category] = {
+                "Comparisons": dict(self.comparisons[category]),
+                "Metric Recommendations": dict(self.metric_recommendations[category]),
+                "Category Recommendations": dict(self.category_recommendations[category]),
+                "Average Priorities": dict(sorted(metrics.items(), key=lambda item: item[1])),
+            }
+        sectors = {
+            sector: {
+                "Tickers": totals["tickers"],
+                "Average Score": totals["score_total"] / totals["tickers"],
+                "Overall Recommendations": dict(totals["recommendations"]),
+                "Comparisons": {
+                    category: dict(counts)
+                    for (comparison_sector, category), counts in self.sector_comparisons.items()
+                    if comparison_sector == sector
+                },
+            }
+            for sector, totals in self.sectors.items()
+        }
+        return {
+            "Tickers": self.tickers,
+            "Tickers Without Metrics": self.without_metrics,
+            "Average Score": self.score_total / self.tickers if self.tickers else None,
+            "Overall Recommendations": dict(self.overall_recommendations),
+            "Categories": categories,
+            "Sectors": sectors,
+        }
+
+
+def summarize_stream(results, on_ticker=None):
+    """
+    Summarizes a stream of results in one pass and returns the universe summary.
+
+    `on_ticker` is called with each per-ticker summary as it is produced, so callers can write
+    them out instead of holding them.
+    """
+    universe = UniverseSummary()
+    for result in results:
+        if on_ticker is not None:
+            on_ticker(summarize(result))
+        universe.add(result)
+    return universe.summary()
@@ -0,0 +1,145 @@
+import numpy as np
+from stock_ratios.batch import CATEGORIES, CODE_SCORES, BUY, HOLD, SELL, RECOMMENDATIONS, metric_table, engine_weights
+from utils.recommendation_engine import RecommendationEngine
+
+
+def weight_matrix(weight_dicts):
+    """Stacks RecommendationEngine-style {category: {metric: weight}} dicts into a (configs, metrics) array."""
+    table = metric_table()
+    return np.array([
+        [weights.get(category, {}).get(metric, 0.0) for category, metric, _, _, _ in table]
+        for weights in weight_dicts
+    ], dtype=np.float64)
+
+
+def threshold_matrix(threshold_dicts):
+    """Stacks {"Buy": x, "Hold": y} dicts into a (configs, 2) array."""
+    return np.array([[thresholds["Buy"], thresholds["Hold"]] for thresholds in threshold_dicts], dtype=np.float64)
+
+
+def perturbed_weights(recommendation_engine=None, count=1000, scale=0.25, seed=None):
+    """Random (count, metrics) weight vectors around an engine's weights (multiplicative log-normal noise)."""
+    base, _, _ = engine_weights(recommendation_engine)
+    rng = np.random.default_rng(seed)
+    return base * np.exp(rng.normal(0.0, scale, size=(count, len(base))))
+
+
+def _category_onehot():
+    table = metric_table()
+    onehot = np.zeros((len(table), len(CATEGORIES)))
+    for i, (category, _, _, _, _) in enumerate(table):
+        onehot[i, CATEGORIES.index(category)] = 1.0
+    return onehot
+
+
+def sweep_scores(codes, weights):
+    """
+    Overall scores of every ticker under every weight vector, as a (configs, tickers) array.
+
+    `codes` are the cached (tickers, metrics) recommendation codes of a batch run. Mirrors
+    RecommendationEngine: zero-score metrics and categories are left out of the weighting, and
+    a category's weight is the sum of its metric weights.
+    """
+    scores = CODE_SCORES[codes]
+    scored = (scores != 0).astype(np.float64)
+    onehot = _category_onehot()
+    numerator = np.einsum("nm,km,mc->knc", scores, weights, onehot, optimize=True)
+    denominator = np.einsum("nm,km,mc->knc", scored, weights, onehot, optimize=True)
+    categories = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+    category_weights = (weights @ onehot)[:, None, :] * (categories != 0)
+    total = category_weights.sum(axis=2)
+    return np.divide((categories * category_weights).sum(axis=2), total, out=np.zeros_like(total), where=total > 0)
+
+
+def _recommendations(overall, thresholds):
+    codes = np.full(overall.shape, SELL, dtype=np.int8)
+    codes[overall >= thresholds[:, 1:2]] = HOLD
+    codes[overall >= thresholds[:, 0:1]] = BUY
+    return codes
+
+
+def _average_ranks(matrix):
+    """Row-wise ranks with ties given their average rank (as Spearman's correlation needs)."""
+    ranks = np.empty(matrix.shape)
+    for row, values in enumerate(matrix):
+        order = np.argsort(values, kind="stable")
+        ordered = values[order]
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(ordered)) + 1])
+        ends = np.concatenate([starts[1:], [len(values)]])
+        ranks[row, order] = np.repeat((starts + ends - 1) / 2.0, ends - starts)
+    return ranks
+
+
+def _correlation(ranks, baseline_ranks):
+    centered = ranks - ranks.mean(axis=1, keepdims=True)
+    baseline = baseline_ranks - baseline_ranks.mean()
+    denominator = np.sqrt((centered ** 2).sum(axis=1) * (baseline ** 2).sum())
+    return np.divide(centered @ baseline, denominator, out=np.full(len(ranks), np.nan), where=denominator > 0)
+
+
+class SweepResult:
+    def __init__(self, weights, thresholds, baseline_recommendations, recommendations, flips, buy_sell_flips, rank_correlations, counts, percentiles):
+        self.weights = weights  # (configs, metrics)
+        self.thresholds = thresholds  # (configs, 2) Buy and Hold thresholds
+        self.baseline_recommendations = baseline_recommendations  # (tickers,) codes
+        self.recommendations = recommendations  # (configs, tickers) codes
+        self.flips = flips  # (configs,) tickers whose recommendation differs from the baseline
+        self.buy_sell_flips = buy_sell_flips  # (configs,) tickers going Buy -> Sell or Sell -> Buy
+        self.rank_correlations = rank_correlations  # (configs,) Spearman correlation with the baseline scores
+        self.counts = counts  # (configs, 3) Buy/Hold/Sell counts
+        self.percentiles = percentiles  # (configs, 5) 5th/25th/50th/75th/95th score percentiles
+
+    def summary(self, config):
+        """Flip, stability and distribution figures for one configuration."""
+        return {
+            "weights": self.weights[config].tolist(),
+            "thresholds": {"Buy": float(self.thresholds[config, 0]), "Hold": float(self.thresholds[config, 1])},
+            "flips": int(self.flips[config]),
+            "buy_sell_flips": int(self.buy_sell_flips[config]),
+            "rank_correlation": float(self.rank_correlations[config]),
+            "recommendations": {RECOMMENDATIONS[code]: int(self.counts[config, code]) for code in (BUY, HOLD, SELL)},
+            "score_percentiles": dict(zip(("p5", "p25", "p50", "p75", "p95"), self.percentiles[config].tolist())),
+        }
+
+    def most_stable(self, count=10):
+        """Indexes of the configurations with the highest rank correlation to the baseline."""
+        return np.argsort(-np.nan_to_num(self.rank_correlations, nan=-2.0), kind="stable")[:count]
+
+
+def sweep(codes, weights, thresholds=None, recommendation_engine=None, chunk_size=256):
+    """
+    Scores a universe under many weight/threshold configurations at once.
+
+    `codes` are cached (tickers, metrics) recommendation codes (e.g. UniverseStore.score()[1]),
+    `weights` a (configs, metrics) array in batch.metric_table order and `thresholds` a
+    (configs, 2) array of Buy/Hold thresholds (the engine's by default). The engine's own
+    configuration is the baseline for flips and rank correlations. Configurations are scored
+    `chunk_size` at a time to bound memory.
+    """
+    engine = recommendation_engine or RecommendationEngine()
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    if thresholds is None:
+        thresholds = threshold_matrix([engine.thresholds] * len(weights))
+    thresholds = np.atleast_2d(np.asarray(thresholds, dtype=np.float64))
+
+    baseline_scores = sweep_scores(codes, engine_weights(engine)[0][None, :])
+    baseline = _recommendations(baseline_scores, threshold_matrix([engine.thresholds]))[0]
+    baseline_ranks = _average_ranks(baseline_scores)[0]
+
+    recommendations = np.empty((len(weights), len(codes)), dtype=np.int8)
+    rank_correlations = np.empty(len(weights))
+    percentiles = np.empty((len(weights), 5))
+    for start in range(0, len(weights), chunk_size):
+        end = min(start + chunk_size, len(weights))
+        overall = sweep_scores(codes, weights[start:end])
+        recommendations[start:end] = _recommendations(overall, thresholds[start:end])
+        rank_correlations[start:end] = _correlation(_average_ranks(overall), baseline_ranks)
+        percentiles[start:end] = np.percentile(overall, [5, 25, 50, 75, 95], axis=1).T if len(codes) else np.nan
+
+    flips = (recommendations != baseline).sum(axis=1)
+    buy_sell_flips = (
+        ((baseline == BUY) & (recommendations == SELL)) | ((baseline == SELL) & (recommendations == BUY))
+    ).sum(axis=1)
+    counts = np.stack([(recommendations == code).sum(axis=1) for code in (BUY, HOLD, SELL)], axis=1)
+    return SweepResult(weights, thresholds, baseline, recommendations, flips, buy_sell_flips, rank_correlations, counts, percentiles)
@@ -0,0 +1,159 @@
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+from stock_ratios.fundamentals import FINANCIALS_LINES, BALANCE_SHEET_LINES, PREVIOUS_PERIOD_LINES, statement_value, derive_missing
+
+# Income statement items are flows and are summed over four quarters; balance sheet
+# items are point-in-time and taken from the latest quarter.
+INCOME_FIELDS = tuple(FINANCIALS_LINES)
+BALANCE_FIELDS = tuple(BALANCE_SHEET_LINES)
+
+
+def ttm_financials(quarterly_financials):
+    """
+    Builds annual-shaped income statements from quarterly ones so the ratio classes can run in
+    TTM mode: column 0 is the sum of the latest four quarters, column 1 the four quarters before
+    that, and so on, so `.iloc[0]`/`.iloc[1]` keep meaning "latest" and "a year earlier".
+    """
+    quarters = quarterly_financials.T.sort_index()  # Oldest quarter first
+    trailing = quarters.rolling(4, min_periods=4).sum().dropna(how="all")
+    return trailing.iloc[::-1].iloc[::4].T
+
+
+def ttm_balance_sheet(quarterly_balance_sheet, period_ends):
+    """
+    Quarter-end balances at `period_ends`, the ttm_financials columns, so each balance column
+    pairs with the TTM income ending the same quarter; NaN where no balance sheet was reported.
+    """
+    balances = quarterly_balance_sheet.copy()
+    balances.columns = pd.to_datetime(balances.columns)
+    balances = balances.loc[:, ~balances.columns.duplicated()]
+    return balances.reindex(columns=pd.to_datetime(period_ends))
+
+
+def quarter_rows(quarterly_financials, quarterly_balance_sheet):
+    """Yields (period_end, income, balances) dicts per quarter, oldest first, from yfinance frames."""
+    columns = list(quarterly_financials.columns)
+    balance_columns = {pd.Timestamp(period): i for i, period in enumerate(quarterly_balance_sheet.columns)}
+    for column in reversed(range(len(columns))):
+        period_end = pd.Timestamp(columns[column])
+        income = {name: statement_value(quarterly_financials, keys, column) for name, keys in FINANCIALS_LINES.items()}
+        balance_column = balance_columns.get(period_end)
+        if balance_column is None:
+            balances = {name: math.nan for name in BALANCE_FIELDS}
+        else:
+            balances = {name: statement_value(quarterly_balance_sheet, keys, balance_column) for name, keys in BALANCE_SHEET_LINES.items()}
+        yield period_end, income, balances
+
+
+def quarter_arrays(quarterly_financials, quarterly_balance_sheet):
+    """(period_ends, income, balances) of quarter_rows as (quarters, INCOME_FIELDS/BALANCE_FIELDS) arrays, oldest first."""
+    period_ends, income, balances = [], [], []
+    for period_end, quarter_income, quarter_balances in quarter_rows(quarterly_financials, quarterly_balance_sheet):
+        period_ends.append(period_end)
+        income.append([quarter_income[field] for field in INCOME_FIELDS])
+        balances.append([quarter_balances[field] for field in BALANCE_FIELDS])
+    quarters = len(period_ends)
+    return (
+        period_ends,
+        np.array(income, dtype=np.float64).reshape(quarters, len(INCOME_FIELDS)),
+        np.array(balances, dtype=np.float64).reshape(quarters, len(BALANCE_FIELDS)),
+    )
+
+
+def window_fundamentals(income, balances, year_ago):
+    """Canonical fundamentals of one TTM window from its income sums, latest and year-ago balances."""
+    fundamentals = {field: float(value) for field, value in zip(INCOME_FIELDS, income)}
+    fundamentals.update((field, float(value)) for field, value in zip(BALANCE_FIELDS, balances))
+    for field in PREVIOUS_PERIOD_LINES:
+        previous = float(year_ago[BALANCE_FIELDS.index(field)])
+        fundamentals[f"{field}_previous"] = fundamentals[field] if math.isnan(previous) else previous
+    return derive_missing(fundamentals)
+
+
+def ttm_universe(quarterly_income, quarterly_balances):
+    """
+    Vectorized TTM for a whole universe.
+
+    `quarterly_income` is (tickers, quarters, INCOME_FIELDS) and `quarterly_balances` is
+    (tickers, quarters, BALANCE_FIELDS), oldest quarter first. Returns (ttm_income,
+    balances, balances_year_ago) for every window of four quarters, each with
+    quarters - 3 windows; a window with a missing quarter is NaN.
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(quarterly_income, 4, axis=1)
+    ttm_income = windows.sum(axis=-1)
+    balances = quarterly_balances[:, 3:]
+    year_ago = np.full(balances.shape, np.nan)
+    year_ago[:, 1:] = quarterly_balances[:, :-4]  # Window i ends at quarter i + 3; a year earlier is quarter i - 1
+    return ttm_income, balances, year_ago
+
+
+class TTMAccumulator:
+    """
+    Rolls one ticker's TTM fundamentals forward a quarter at a time in O(1).
+
+    Running sums add the new quarter and subtract the one leaving the window; a per-field
+    count of missing quarters keeps a gap from poisoning the sums once it rolls out.
+    """
+
+    def __init__(self):
+        self.period_end = None
+        self._income = deque()
+        self._balances = deque(maxlen=5)  # Latest quarter plus the same quarter a year earlier
+        self._sums = dict.fromkeys(INCOME_FIELDS, 0.0)
+        self._missing = dict.fromkeys(INCOME_FIELDS, 0)
+
+    def add_quarter(self, period_end, income, balances):
+        """Adds the next quarter's income items and balances."""
+        if self.period_end is not None and period_end <= self.period_end:
+            return  # Already have this quarter (or a later one)
+        self.period_end = period_end
+
+        quarter = {field: income.get(field, math.nan) for field in INCOME_FIELDS}
+        self._income.append(quarter)
+        dropped = self._income.popleft() if len(self._income) > 4 else None
+        for field, value in quarter.items():
+            if math.isnan(value):
+                self._missing[field] += 1
+            else:
+                self._sums[field] += value
+            if dropped is not None:
+                if math.isnan(dropped[field]):
+                    self._missing[field] -= 1
+                else:
+                    self._sums[field] -= dropped[field]
+        self._balances.append({field: balances.get(field, math.nan) for field in BALANCE_FIELDS})
+
+    def fundamentals(self):
+        """Returns the current TTM statement fundamentals in the canonical field layout."""
+        complete = len(self._income) == 4
+        income = [self._sums[field] if complete and not self._missing[field] else math.nan for field in INCOME_FIELDS]
+        latest = self._balances[-1] if self._balances else {}
+        year_ago = self._balances[0] if len(self._balances) == 5 else {}
+        return window_fundamentals(
+            income,
+            [latest.get(field, math.nan) for field in BALANCE_FIELDS],
+            [year_ago.get(field, math.nan) for field in BALANCE_FIELDS],
+        )
+
+
+class TTMBook:
+    """TTM accumulators for a universe; a new quarter for one ticker touches only that ticker."""
+
+    def __init__(self):
+        self.accumulators = {}
+
+    def add_quarter(self, ticker, period_end, income, balances):
+        accumulator = self.accumulators.get(ticker)
+        if accumulator is None:
+            accumulator = self.accumulators[ticker] = TTMAccumulator()
+        accumulator.add_quarter(period_end, income, balances)
+
+    def load(self, ticker, quarterly_financials, quarterly_balance_sheet):
+        """Seeds or updates a ticker from yfinance quarterly frames (already seen quarters are skipped)."""
+        for period_end, income, balances in quarter_rows(quarterly_financials, quarterly_balance_sheet):
+            self.add_quarter(ticker, period_end, income, balances)
+
+    def fundamentals(self, ticker):
+        return self.accumulators[ticker].fundamentals()
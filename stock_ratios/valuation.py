@@ -1,4 +1,4 @@
-import yfinance as yf
+from stock_ratios.graph import FundamentalsGraph
 from config.valuation.valuation_config import (
     INDUSTRY_PE_BENCHMARKS, 
     DEFAULT_PE_BENCHMARK, 
@@ -10,39 +10,28 @@ from config.valuation.valuation_config import (
 )
 
 from utils.benchmark import (
-    get_industry_benchmark
+    get_industry_benchmark,
+    compare_to_benchmark,
+    recommendation_by_range
 )
+from utils.tracing import span
 
 class ValuationRatios:
-    def __init__(self, ticker):
+    def __init__(self, ticker, info=None, graph=None):
         self.ticker = ticker
-        self.stock = yf.Ticker(ticker)
-        self.info = self.stock.info
+        self.graph = graph or FundamentalsGraph(ticker, info)
+        self._benchmarks = {}  # Benchmarks depend only on sector/industry, so resolve once
 
-    def _get_recommendation_by_range(self, value, benchmark_range, buy_if_below=True):
-        if value is None or benchmark_range is None:
-            return "Data Unavailable"
-        try:
-            lower_bound, upper_bound = benchmark_range
-        except TypeError: #Handle the case where benchmark_range is not a tuple
-            return "Data Unavailable"
-
-        if buy_if_below:
-            if value < lower_bound:
-                return "Buy"
-            elif value > upper_bound:
-                return "Sell"
-            else:
-                return "Hold"
-        else:
-            if value > upper_bound:
-                return "Buy"
-            elif value < lower_bound:
-                return "Sell"
-            else:
-                return "Hold"
+    @property
+    def info(self):
+        return self.graph.value("info")
 
     def _get_industry_benchmark(self, ratio_type):
+        if ratio_type not in self._benchmarks:
+            self._benchmarks[ratio_type] = self._resolve_industry_benchmark(ratio_type)
+        return self._benchmarks[ratio_type]
+
+    def _resolve_industry_benchmark(self, ratio_type):
         sector = self.info.get("sector")
         industry = self.info.get("industry")
         if ratio_type == "PE":
@@ -60,21 +49,6 @@ class ValuationRatios:
         else:
             return None
 
-    def _compare_to_benchmark(self, value, benchmark_range):
-        if value is None or benchmark_range is None:
-            return "Data Unavailable"
-        try:
-            lower_bound, upper_bound = benchmark_range
-        except TypeError: #Handle the case where benchmark_range is not a tuple
-            return "Data Unavailable"
-
-        if value > upper_bound:
-            return "Above Benchmark"
-        elif value < lower_bound:
-            return "Below Benchmark"
-        else:
-            return "Within Benchmark"
-    
     def get_dividend_payout_ratio(self):
         try:
             # Fetch the dividend payout ratio from the Yahoo Finance info object
@@ -85,8 +59,8 @@ class ValuationRatios:
 
             # Get the industry Dividend Payout Ratio Benchmark
             benchmark_range = self._get_industry_benchmark("Dividend Payout")
-            comparison = self._compare_to_benchmark(dividend_payout_ratio * 100, benchmark_range)
-            recommendation = self._get_recommendation_by_range(dividend_payout_ratio * 100, benchmark_range, buy_if_below=False)
+            comparison = compare_to_benchmark(dividend_payout_ratio * 100, benchmark_range)
+            recommendation = recommendation_by_range(dividend_payout_ratio * 100, benchmark_range, buy_if_below=False)
             
             # Comparing Dividend Payout Ratio with the industry benchmark
             return {
@@ -105,8 +79,8 @@ class ValuationRatios:
                 return {"error": "Dividend Yield data is unavailable for this stock."}
 
             benchmark_range = self._get_industry_benchmark("Dividend Yield")
-            comparison = self._compare_to_benchmark(dividend_yield * 100, benchmark_range)
-            recommendation = self._get_recommendation_by_range(dividend_yield * 100, benchmark_range, buy_if_below=False)
+            comparison = compare_to_benchmark(dividend_yield * 100, benchmark_range)
+            recommendation = recommendation_by_range(dividend_yield * 100, benchmark_range, buy_if_below=False)
 
             return {
                 "dividend_yield": f"{round(dividend_yield * 100, 2)}%",
@@ -129,8 +103,8 @@ class ValuationRatios:
             peg_ratio = pe_ratio / earnings_growth
 
             benchmark_range = self._get_industry_benchmark("PEG")
-            comparison = self._compare_to_benchmark(peg_ratio, benchmark_range)
-            recommendation = self._get_recommendation_by_range(peg_ratio, benchmark_range)
+            comparison = compare_to_benchmark(peg_ratio, benchmark_range)
+            recommendation = recommendation_by_range(peg_ratio, benchmark_range)
 
             return {
                 "peg_ratio": peg_ratio,
@@ -149,8 +123,8 @@ class ValuationRatios:
                 return {"error": "P/S ratio data is unavailable for this stock."}
 
             benchmark_range = self._get_industry_benchmark("PS")
-            comparison = self._compare_to_benchmark(ps_ratio, benchmark_range)
-            recommendation = self._get_recommendation_by_range(ps_ratio, benchmark_range)
+            comparison = compare_to_benchmark(ps_ratio, benchmark_range)
+            recommendation = recommendation_by_range(ps_ratio, benchmark_range)
 
             return {
                 "ps_ratio": ps_ratio,
@@ -176,8 +150,8 @@ class ValuationRatios:
                 # If benchmark_range is not a tuple (e.g., integer), set it to None
                 benchmark_range = None
 
-            trailing_comparison = self._compare_to_benchmark(trailing_pe, benchmark_range)
-            forward_comparison = self._compare_to_benchmark(forward_pe, benchmark_range)
+            trailing_comparison = compare_to_benchmark(trailing_pe, benchmark_range)
+            forward_comparison = compare_to_benchmark(forward_pe, benchmark_range)
             
             recommendation = "Hold" # Default
             if forward_pe is not None and forward_pe < lower_bound:
@@ -210,8 +184,8 @@ class ValuationRatios:
                 return {"error": "P/B ratio data is unavailable for this stock."}
             
             benchmark_range = self._get_industry_benchmark("PB")
-            comparison = self._compare_to_benchmark(pb_ratio, benchmark_range)
-            recommendation = self._get_recommendation_by_range(pb_ratio, benchmark_range)
+            comparison = compare_to_benchmark(pb_ratio, benchmark_range)
+            recommendation = recommendation_by_range(pb_ratio, benchmark_range)
 
             return {
                 "pb_ratio": pb_ratio,
@@ -223,12 +197,17 @@ class ValuationRatios:
             return {"error": "Error retrieving data for the stock."}
 
     def fetch_all_ratios(self):
-        return {
-            "P/E Ratio": self.get_pe_ratio(),
-            "P/B Ratio": self.get_pb_ratio(),
-            "P/S Ratio": self.get_ps_ratio(),
-            "PEG Ratio": self.get_peg_ratio(),
-            "Dividend Yield": self.get_dividend_yield(),
-            "Dividend Payout": self.get_dividend_payout_ratio()
+        ratios = {
+            "P/E Ratio": self.get_pe_ratio,
+            "P/B Ratio": self.get_pb_ratio,
+            "P/S Ratio": self.get_ps_ratio,
+            "PEG Ratio": self.get_peg_ratio,
+            "Dividend Yield": self.get_dividend_yield,
+            "Dividend Payout": self.get_dividend_payout_ratio,
         }
+        results = {}
+        for ratio_name, calculation_method in ratios.items():
+            with span("ratio", ticker=self.ticker, category="Valuation", ratio=ratio_name):
+                results[ratio_name] = calculation_method()
+        return results
 
@@ -0,0 +1,139 @@
+import datetime
+import itertools
+import sqlite3
+from stock_ratios.results import iter_metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    run_date TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    sector TEXT,
+    industry TEXT,
+    overall_score REAL,
+    overall_recommendation TEXT,
+    PRIMARY KEY (run_date, ticker)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS category_recommendations (
+    run_date TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    category TEXT NOT NULL,
+    recommendation TEXT,
+    PRIMARY KEY (run_date, ticker, category)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS metrics (
+    run_date TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    category TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    comparison TEXT,
+    recommendation TEXT,
+    PRIMARY KEY (run_date, ticker, category, metric)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scores_by_ticker ON scores (ticker, run_date);
+CREATE INDEX IF NOT EXISTS category_recommendations_by_ticker ON category_recommendations (ticker, category, run_date);
+CREATE INDEX IF NOT EXISTS metrics_by_ticker ON metrics (ticker, metric, run_date);
+"""
+
+
+class ResultsWarehouse:
+    """
+    Append-only SQLite store of every run's results keyed by (run_date, ticker, category, metric).
+
+    A ticker's results for a run date are written once: appending them again raises ValueError
+    unless the caller asks to replace them, so history is never overwritten silently.
+
+    Primary keys lead with run_date for whole-run queries, and secondary indexes lead with
+    ticker for history queries, so both stay index lookups as the history grows.
+    """
+
+    def __init__(self, path, batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def append_run(self, results, run_date=None, replace=False):
+        """
+        Bulk-appends an iterable of fetch_all_ratios results for a run date (today by default),
+        in one transaction. Raises ValueError, appending nothing, if a ticker already has
+        results for that date, unless `replace` is set, in which case they are overwritten.
+        """
+        run_date = run_date or datetime.date.today().isoformat()
+        insert = "INSERT OR REPLACE" if replace else "INSERT"
+        results = iter(results)
+        appended = 0
+        try:
+            with self.conn:  # The whole run commits or rolls back together
+                while True:
+                    batch = list(itertools.islice(results, self.batch_size))  # Bounded memory for large universes
+                    if not batch:
+                        return appended
+                    self.conn.executemany(
+                        f"{insert} INTO scores VALUES (?, ?, ?, ?, ?, ?)",
+                        [
+                            (run_date, result["ticker"], result.get("sector"), result.get("industry"),
+                             result["overall_score"], result["overall_recommendation"])
+                            for result in batch
+                        ],
+                    )
+                    self.conn.executemany(
+                        f"{insert} INTO category_recommendations VALUES (?, ?, ?, ?)",
+                        [
+                            (run_date, result["ticker"], category, recommendation)
+                            for result in batch
+                            for category, recommendation in result["category_recommendations"].items()
+                        ],
+                    )
+                    self.conn.executemany(
+                        f"{insert} INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (run_date, result["ticker"], category, metric, value, str(comparison), recommendation)
+                            for result in batch
+                            for category, metric, value, comparison, recommendation in iter_metrics(result)
+                        ],
+                    )
+                    appended += len(batch)
+        except sqlite3.IntegrityError:
+            raise ValueError(f"The warehouse already holds results for run date {run_date}") from None
+
+    def run_dates(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT run_date FROM scores ORDER BY run_date")]
+
+    def score_history(self, ticker, start=None, end=None):
+        """Returns [(run_date, overall_score, overall_recommendation)] for a ticker, oldest first."""
+        return self.conn.execute(
+            """SELECT run_date, overall_score, overall_recommendation FROM scores
+               WHERE ticker = ? AND run_date >= ? AND run_date <= ? ORDER BY run_date""",
+            (ticker, start or "", end or "9999"),
+        ).fetchall()
+
+    def metric_history(self, ticker, metric, start=None, end=None):
+        """Returns [(run_date, value, comparison, recommendation)] for one metric of a ticker."""
+        return self.conn.execute(
+            """SELECT run_date, value, comparison, recommendation FROM metrics
+               WHERE ticker = ? AND metric = ? AND run_date >= ? AND run_date <= ? ORDER BY run_date""",
+            (ticker, metric, start or "", end or "9999"),
+        ).fetchall()
+
+    def recommendation_changes(self, from_date, to_date, category=None):
+        """
+        Returns [(ticker, from_recommendation, to_recommendation)] for tickers whose overall
+        (or, with `category`, that category's) recommendation differs between two run dates.
+        """
+        if category is None:
+            query = """SELECT a.ticker, a.overall_recommendation, b.overall_recommendation
+                       FROM scores a JOIN scores b ON b.run_date = ? AND b.ticker = a.ticker
+                       WHERE a.run_date = ? AND a.overall_recommendation IS NOT b.overall_recommendation
+                       ORDER BY a.ticker"""
+            return self.conn.execute(query, (to_date, from_date)).fetchall()
+        query = """SELECT a.ticker, a.recommendation, b.recommendation
+                   FROM category_recommendations a
+                   JOIN category_recommendations b ON b.run_date = ? AND b.ticker = a.ticker AND b.category = a.category
+                   WHERE a.run_date = ? AND a.category = ? AND a.recommendation IS NOT b.recommendation
+                   ORDER BY a.ticker"""
+        return self.conn.execute(query, (to_date, from_date, category)).fetchall()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,155 @@
+import json
+import os
+import sys
+import time
+import urllib.request
+from stock_ratios.core import analyze_ticker
+from utils import events
+
+CATEGORIES = ("Valuation", "Profitability", "Liquidity", "Debt", "Efficiency")
+
+# One character per recommendation keeps each ticker's state a short fixed-width string
+RECOMMENDATION_CODES = {"Buy": "B", "Hold": "H", "Sell": "S"}
+UNAVAILABLE_CODE = "U"
+CODE_NAMES = {"B": "Buy", "H": "Hold", "S": "Sell", UNAVAILABLE_CODE: "Data Unavailable"}
+
+# Field name for each position of a state string
+STATE_FIELDS = ("overall_recommendation",) + tuple(f"category_recommendations.{category}" for category in CATEGORIES)
+
+
+def encode_state(results):
+    """Encodes the overall and category recommendations of a result as a compact state string."""
+    recommendations = [results.get("overall_recommendation")]
+    category_recommendations = results.get("category_recommendations", {})
+    recommendations.extend(category_recommendations.get(category) for category in CATEGORIES)
+    return "".join(RECOMMENDATION_CODES.get(recommendation, UNAVAILABLE_CODE) for recommendation in recommendations)
+
+
+class RecommendationStateStore:
+    """Stores the last seen state string per ticker, persisted as one "TICKER STATE" line each."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.states = {}
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2:
+                    self.states[parts[0]] = parts[1]
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(f"{ticker} {state}\n" for ticker, state in self.states.items())
+        os.replace(tmp_path, self.path)  # Atomic, so a crash never leaves a half-written store
+
+    def update(self, ticker, state):
+        """Stores the new state and returns the transitions from the previous one."""
+        previous = self.states.get(ticker)
+        self.states[ticker] = state
+        if previous is None or previous == state:
+            return []
+        return [
+            {
+                "ticker": ticker,
+                "field": STATE_FIELDS[i],
+                "from": CODE_NAMES.get(old, old),
+                "to": CODE_NAMES.get(new, new),
+            }
+            for i, (old, new) in enumerate(zip(previous, state))
+            if old != new
+        ]
+
+
+class StdoutEmitter:
+    def emit(self, transitions):
+        for transition in transitions:
+            sys.stdout.write(json.dumps(transition) + "\n")
+        sys.stdout.flush()
+
+
+class FileEmitter:
+    """Appends transitions to a file as JSON lines."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, transitions):
+        with open(self.path, "a") as f:
+            for transition in transitions:
+                f.write(json.dumps(transition) + "\n")
+
+
+class WebhookEmitter:
+    """POSTs each batch of transitions as a JSON array to a webhook URL."""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def emit(self, transitions):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(transitions).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except OSError as e:
+            events.emit(events.ERROR, "webhook_failed", transitions=len(transitions), error=str(e))
+
+
+class WatchlistMonitor:
+    """
+    Periodically rescores a watchlist and emits only recommendation transitions.
+
+    With `statistics` (peer_statistics.SectorStatistics) every rescored result also updates the
+    live sector and industry distributions.
+    """
+
+    def __init__(self, tickers, store=None, emitters=None, scorer=analyze_ticker, statistics=None):
+        self.tickers = list(tickers)
+        self.store = store or RecommendationStateStore()
+        self.emitters = emitters if emitters is not None else [StdoutEmitter()]
+        self.scorer = scorer
+        self.statistics = statistics
+
+    def run_cycle(self):
+        """Rescores every ticker once, emits the transitions found and returns them."""
+        transitions = []
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+        for ticker in self.tickers:
+            try:
+                results = self.scorer(ticker)
+            except Exception as e:
+                events.emit(events.ERROR, "scoring_failed", ticker=ticker, error=str(e))
+                continue  # Keep the previous state so a failed fetch is not reported as a flip
+            if self.statistics is not None:
+                self.statistics.add(results)
+            for transition in self.store.update(ticker, encode_state(results)):
+                transition["timestamp"] = timestamp
+                transitions.append(transition)
+
+        self.store.save()
+        if transitions:
+            for emitter in self.emitters:
+                emitter.emit(transitions)
+        return transitions
+
+    def run(self, interval, cycles=None):
+        """Runs cycles every `interval` seconds, forever or for the given number of cycles."""
+        completed = 0
+        while cycles is None or completed < cycles:
+            started = time.time()
+            self.run_cycle()
+            completed += 1
+            if cycles is None or completed < cycles:
+                time.sleep(max(0, interval - (time.time() - started)))
@@ -0,0 +1,26 @@
+import math
+import numpy as np
+import pandas as pd
+from stock_ratios.backtest import statement_history, _prices_asof
+from stock_ratios.fundamentals import FINANCIALS_LINES, BALANCE_SHEET_LINES
+
+
+def test_statement_history_matches_balances_by_period_end():
+    revenue = FINANCIALS_LINES["total_revenue"][0]
+    assets = BALANCE_SHEET_LINES["total_assets"][0]
+    financials = pd.DataFrame({pd.Timestamp("2024-12-31"): [200.0], pd.Timestamp("2023-12-31"): [100.0]}, index=[revenue])
+    balance_sheet = pd.DataFrame({pd.Timestamp("2023-12-31"): [1000.0], pd.Timestamp("2022-12-31"): [900.0]}, index=[assets])
+
+    rows = {row["period_end"]: row for row in statement_history("AAPL", balance_sheet, financials)}
+    assert math.isnan(rows[pd.Timestamp("2024-12-31")]["total_assets"])
+    assert rows[pd.Timestamp("2023-12-31")]["total_assets"] == 1000.0
+
+
+def test_prices_asof_uses_each_tickers_last_close():
+    prices = pd.DataFrame(
+        {"A": [10.0, 11.0], "B": [20.0, np.nan]},
+        index=pd.to_datetime(["2024-03-30", "2024-03-31"]),
+    )
+    result = _prices_asof(prices, pd.to_datetime(["2024-03-29", "2024-03-31"]))
+    assert np.isnan(result[0]).all()
+    assert result[1].tolist() == [11.0, 20.0]
@@ -0,0 +1,109 @@
+import pytest
+from stock_ratios.distributed import SQLiteWorkQueue, DirectorySink, Coordinator, Worker
+from utils.symbols import InvalidTickerError
+
+
+def _queue(tmp_path):
+    return SQLiteWorkQueue(str(tmp_path / "queue.db"))
+
+
+def test_expired_lease_counts_as_an_attempt(tmp_path):
+    queue = _queue(tmp_path)
+    queue.enqueue(["AAPL"], max_attempts=3)
+    assert queue.lease("a", -1) == (1, ["AAPL"], 0)
+    assert queue.lease("b", -1) == (1, ["AAPL"], 1)
+    assert queue.lease("c", 600) == (1, ["AAPL"], 2)
+    assert queue.lease("d", 600) is None  # Still held by c
+
+
+def test_shard_fails_once_expired_leases_exhaust_its_attempts(tmp_path):
+    queue = _queue(tmp_path)
+    queue.enqueue(["AAPL", "MSFT"], max_attempts=2)
+    queue.lease("a", -1)
+    queue.lease("b", -1)
+    assert queue.lease("c", 600) is None
+    assert queue.is_drained()
+    [(attempts, failed)] = queue.take_failures()
+    assert attempts == 2
+    assert set(failed) == {"AAPL", "MSFT"}
+    assert not failed["AAPL"]["retryable"]
+    assert queue.take_failures() == []
+
+
+def test_complete_requires_the_current_lease(tmp_path):
+    queue = _queue(tmp_path)
+    queue.enqueue(["AAPL"])
+    queue.lease("a", -1)
+    queue.lease("b", 600)
+    assert not queue.renew(1, "a", 600)
+    assert not queue.complete(1, "a", {"AAPL": {"error": "stale", "retryable": True}})
+    assert queue.complete(1, "b")
+    assert queue.take_failures() == []
+    assert queue.counts() == {"done": 1}
+
+
+def test_worker_drops_a_shard_whose_lease_was_taken_over(tmp_path):
+    queue = _queue(tmp_path)
+    sink = DirectorySink(str(tmp_path / "sink"))
+    queue.enqueue(["AAPL"])
+    queue.lease("a", -1)
+
+    def scorer(ticker):
+        queue.lease("b", 600)  # Another worker reclaims the expired lease mid-shard
+        return {"ticker": ticker}
+
+    assert Worker(queue, sink, "a", scorer=scorer).process(1, ["AAPL"]) is None
+    assert sink.is_empty()
+    assert queue.counts() == {"leased": 1}
+
+
+def test_coordinator_retries_retryable_failures_up_to_max_attempts(tmp_path):
+    queue = _queue(tmp_path)
+    sink = DirectorySink(str(tmp_path / "sink"))
+    calls = {}
+
+    def scorer(ticker):
+        calls[ticker] = calls.get(ticker, 0) + 1
+        if ticker == "BAD":
+            raise InvalidTickerError("BAD: not listed")
+        if ticker == "FLAKY" and calls[ticker] < 2:
+            raise ConnectionError("reset")
+        if ticker == "DOWN":
+            raise ConnectionError("reset")
+        return {"ticker": ticker}
+
+    coordinator = Coordinator(queue, sink, shard_size=2, max_attempts=3, poll_interval=0)
+    coordinator.submit(["AAPL", "BAD", "FLAKY", "DOWN"])
+    worker = Worker(queue, sink, "w", scorer=scorer, poll_interval=0)
+    for _ in range(3):  # One pass per attempt, the coordinator re-enqueueing retries in between
+        worker.run()
+        coordinator._retry_failures()
+    coordinator.wait()
+    assert sorted(result["ticker"] for result in coordinator.aggregate()) == ["AAPL", "FLAKY"]
+    assert set(coordinator.failed) == {"BAD", "DOWN"}
+    assert calls == {"AAPL": 1, "BAD": 1, "FLAKY": 2, "DOWN": 3}
+
+
+def test_coordinator_refuses_an_earlier_runs_queue_or_sink(tmp_path):
+    queue = _queue(tmp_path)
+    sink = DirectorySink(str(tmp_path / "sink"))
+    Coordinator(queue, sink).submit(["AAPL"])
+    with pytest.raises(ValueError):
+        Coordinator(queue, DirectorySink(str(tmp_path / "other"))).submit(["MSFT"])
+
+    sink.write(1, [{"ticker": "AAPL"}])
+    with pytest.raises(ValueError):
+        Coordinator(SQLiteWorkQueue(str(tmp_path / "new.db")), sink).submit(["MSFT"])
+
+
+def test_worker_evicts_each_ticker_from_the_fetcher_cache(tmp_path):
+    from utils.data_fetcher import default_fetcher
+
+    def scorer(ticker):
+        default_fetcher._cache[(ticker, "info")] = (0.0, {"symbol": ticker})
+        return {"ticker": ticker}
+
+    queue = _queue(tmp_path)
+    queue.enqueue(["AAPL", "MSFT"])
+    Worker(queue, DirectorySink(str(tmp_path / "sink")), "a", scorer=scorer).run()
+    assert not [key for key in default_fetcher._cache if key[0] in ("AAPL", "MSFT")]
@@ -0,0 +1,21 @@
+import math
+import pandas as pd
+import pytest
+from stock_ratios.fundamentals import FINANCIALS_LINES, BALANCE_SHEET_LINES
+
+pytest.importorskip("pyarrow")
+from stock_ratios.fundamentals_store import FundamentalsStore
+
+
+def test_balance_sheet_matched_by_period_end(tmp_path):
+    revenue = FINANCIALS_LINES["total_revenue"][0]
+    assets = BALANCE_SHEET_LINES["total_assets"][0]
+    financials = pd.DataFrame({pd.Timestamp("2024-12-31"): [200.0], pd.Timestamp("2023-12-31"): [100.0]}, index=[revenue])
+    # The balance sheet lacks the latest year, so its columns are shifted against the financials
+    balance_sheet = pd.DataFrame({pd.Timestamp("2023-12-31"): [1000.0], pd.Timestamp("2022-12-31"): [900.0]}, index=[assets])
+
+    store = FundamentalsStore(str(tmp_path))
+    assert store.add("AAPL", {}, balance_sheet, financials) == 2
+    rows = {row["period_end"].isoformat(): row for row in store._buffer}
+    assert rows["2023-12-31"]["total_assets"] == 1000.0
+    assert math.isnan(rows["2024-12-31"]["total_assets"])
@@ -0,0 +1,15 @@
+import datetime
+import pandas as pd
+from utils.refresh_planner import RefreshPlanner
+
+
+def test_filing_window_closes(tmp_path):
+    planner = RefreshPlanner(str(tmp_path))
+    statement = pd.DataFrame({pd.Timestamp("2023-12-31"): [1.0], pd.Timestamp("2022-12-31"): [1.0]})
+    planner.record("AAPL", "financials", statement, today=datetime.date(2025, 1, 5))
+    # The next annual period ends around 2024-12-30, so its filing window runs from 2025-01-19 to 2025-03-30
+    assert planner.due("AAPL", "financials", today=datetime.date(2025, 1, 15)) is None
+    assert planner.due("AAPL", "financials", today=datetime.date(2025, 2, 1)) == "filing window"
+    planner.record("AAPL", "financials", statement, today=datetime.date(2025, 3, 25))
+    assert planner.due("AAPL", "financials", today=datetime.date(2025, 4, 5)) is None
+    assert planner.due("AAPL", "financials", today=datetime.date(2025, 7, 23)) == "max age"
@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+from stock_ratios.fundamentals import FIELD_INDEX, FINANCIALS_LINES, BALANCE_SHEET_LINES
+from stock_ratios.store import UniverseStore
+
+
+def test_balance_sheet_matched_by_period_end():
+    revenue = FINANCIALS_LINES["total_revenue"][0]
+    assets = BALANCE_SHEET_LINES["total_assets"][0]
+    financials = pd.DataFrame({pd.Timestamp("2024-12-31"): [200.0], pd.Timestamp("2023-12-31"): [100.0]}, index=[revenue])
+    # The balance sheet lacks the latest year, so its columns are shifted against the financials
+    balance_sheet = pd.DataFrame({pd.Timestamp("2023-12-31"): [1000.0], pd.Timestamp("2022-12-31"): [900.0]}, index=[assets])
+
+    store = UniverseStore(np.float64)
+    store.add_statements("AAPL", {}, balance_sheet, financials)
+    assert store.rows == 2
+    assert np.isnan(store.values[0, FIELD_INDEX["total_assets"]])
+    assert store.values[1, FIELD_INDEX["total_assets"]] == 1000.0
+    assert store.values[1, FIELD_INDEX["total_assets_previous"]] == 900.0
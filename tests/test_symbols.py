@@ -0,0 +1,13 @@
+from utils.symbols import SymbolIndex
+
+
+def test_accepts_other_exchanges_and_indices():
+    index = SymbolIndex()
+    for ticker in ("VOD.L", "SHOP.TO", "7203.T", "0700.HK", "^NSEI", "^GSPC", "RELIANCE.NS", "M&M.NS", "BRK-B"):
+        assert index.check(ticker) is None, ticker
+
+
+def test_rejects_malformed_symbols():
+    index = SymbolIndex()
+    for ticker in ("", "RELIANCE.XYZW", "FOO.", "^", ".NS", "BAD SYM.L", "TOOLONGUS"):
+        assert index.check(ticker) is not None, ticker
@@ -0,0 +1,72 @@
+import math
+import numpy as np
+from stock_ratios.ttm import INCOME_FIELDS, BALANCE_FIELDS, TTMAccumulator, ttm_universe
+
+
+def test_year_ago_balances_follow_each_window():
+    balances = np.arange(8, dtype=float).reshape(1, 8, 1)
+    _, latest, year_ago = ttm_universe(np.zeros((1, 8, 1)), balances)
+    assert latest[0, :, 0].tolist() == [3, 4, 5, 6, 7]
+    assert np.isnan(year_ago[0, 0, 0])
+    assert year_ago[0, 1:, 0].tolist() == [0, 1, 2, 3]
+
+
+def test_ttm_universe_matches_the_accumulator():
+    quarters = 9
+    rng = np.random.default_rng(0)
+    income = rng.uniform(1, 100, (1, quarters, len(INCOME_FIELDS)))
+    balances = rng.uniform(1, 100, (1, quarters, len(BALANCE_FIELDS)))
+    ttm_income, latest, year_ago = ttm_universe(income, balances)
+
+    accumulator = TTMAccumulator()
+    for quarter in range(quarters):
+        accumulator.add_quarter(
+            quarter,
+            dict(zip(INCOME_FIELDS, income[0, quarter])),
+            dict(zip(BALANCE_FIELDS, balances[0, quarter])),
+        )
+        window = quarter - 3
+        if window < 0:
+            continue
+        expected = accumulator.fundamentals()
+        for i, field in enumerate(INCOME_FIELDS):
+            assert math.isclose(ttm_income[0, window, i], expected[field])
+        for i, field in enumerate(BALANCE_FIELDS):
+            assert latest[0, window, i] == expected[field]
+            if f"{field}_previous" in expected and window >= 1:
+                assert year_ago[0, window, i] == expected[f"{field}_previous"]
+
+
+def test_ttm_balance_sheet_follows_the_income_periods():
+    import pandas as pd
+    from stock_ratios.ttm import ttm_financials, ttm_balance_sheet
+    quarters = pd.date_range("2022-06-30", "2024-03-31", freq="QE")[::-1]  # Eight quarters, newest first
+    financials = pd.DataFrame([[1.0] * 8], index=["Net Income"], columns=quarters)
+    # The balance sheet already reports the next quarter and lacks the 2023-03-31 one
+    balance_quarters = pd.to_datetime(["2024-06-30", "2024-03-31", "2023-12-31", "2023-09-30", "2023-06-30"])
+    balance_sheet = pd.DataFrame([[6.0, 5.0, 4.0, 3.0, 2.0]], index=["Total Assets"], columns=balance_quarters)
+    ttm_income = ttm_financials(financials)
+    ttm_balances = ttm_balance_sheet(balance_sheet, ttm_income.columns)
+    assert list(ttm_income.columns) == list(pd.to_datetime(["2024-03-31", "2023-03-31"]))
+    assert list(ttm_balances.columns) == list(ttm_income.columns)
+    assert ttm_balances.loc["Total Assets"].iloc[0] == 5.0
+    assert math.isnan(ttm_balances.loc["Total Assets"].iloc[1])
+
+
+def test_universe_store_adds_ttm_windows():
+    import pandas as pd
+    from stock_ratios.fundamentals import FIELD_INDEX
+    from stock_ratios.store import UniverseStore
+    quarters = pd.date_range("2023-03-31", "2024-06-30", freq="QE")[::-1]  # Six quarters, newest first
+    financials = pd.DataFrame([[6.0, 5.0, 4.0, 3.0, 2.0, 1.0]], index=["Net Income"], columns=quarters)
+    balance_sheet = pd.DataFrame([[60.0, 50.0, 40.0, 30.0, 20.0, 10.0]], index=["Total Assets"], columns=quarters)
+    store = UniverseStore(np.float64)
+    store.add_quarterly_statements("AAPL", {"sector": "Technology", "trailingPE": 30}, balance_sheet, financials)
+
+    assert store.rows == 3
+    latest = store.values[store.latest_rows()[0]]
+    assert latest[FIELD_INDEX["net_income"]] == 6.0 + 5.0 + 4.0 + 3.0
+    assert latest[FIELD_INDEX["total_assets"]] == 60.0
+    assert latest[FIELD_INDEX["total_assets_previous"]] == 20.0
+    assert latest[FIELD_INDEX["trailingPE"]] == 30.0
+    assert np.isnan(store.values[0, FIELD_INDEX["trailingPE"]])
@@ -1,3 +1,5 @@
+from utils import events
+
 SECTOR_TO_INDUSTRY_MAPPING = {
     "Technology": ["IT Services", "Software Products", "E-commerce"],
     "Financial Services": ["Banks (Private Sector)", "Banks (Public Sector)", "NBFCs"],
@@ -32,11 +34,43 @@ def get_industry_benchmark(sector, industry, benchmark_dict, default_benchmark):
                 total_upper = sum(upper for lower, upper in valid_benchmarks)
                 return (total_lower / len(valid_benchmarks), total_upper / len(valid_benchmarks))
             else:
-                print(f"No valid benchmarks found for sector: {sector}. Using default benchmark")
+                events.emit(events.INFO, "default_benchmark", sector=sector)  # No industry of the sector has one
                 return default_benchmark
         else:
             return default_benchmark
 
     except Exception as e:
-        print(f"Error getting benchmark: {e}")
+        events.emit(events.WARNING, "benchmark_error", error=str(e))
         return default_benchmark
+
+def compare_to_benchmark(value, benchmark_range):
+    """Places a value above, below or within a (lower, upper) benchmark range."""
+    if value is None or benchmark_range is None:
+        return "Data Unavailable"
+    try:
+        lower_bound, upper_bound = benchmark_range
+    except TypeError:
+        return "Data Unavailable"
+
+    if value > upper_bound:
+        return "Above Benchmark"
+    elif value < lower_bound:
+        return "Below Benchmark"
+    else:
+        return "Within Benchmark"
+
+def recommendation_by_range(value, benchmark_range, buy_if_below=True):
+    """Buy/Hold/Sell from where a value falls in a (lower, upper) benchmark range."""
+    if value is None or benchmark_range is None:
+        return "Data Unavailable"
+    try:
+        lower_bound, upper_bound = benchmark_range
+    except TypeError:
+        return "Data Unavailable"
+
+    if value < lower_bound:
+        return "Buy" if buy_if_below else "Sell"
+    elif value > upper_bound:
+        return "Sell" if buy_if_below else "Buy"
+    else:
+        return "Hold"
@@ -0,0 +1,89 @@
+import statistics
+import time
+from utils.data_fetcher import DataFetcher, DATASET_TTLS, DEFAULT_TTL
+
+WARM_DATASETS = ("info", "balance_sheet", "financials")
+
+
+class CacheWarmer:
+    """
+    Pre-fetches a universe's datasets into a SharedCache at a bounded rate.
+
+    Entries that are missing or expire within `min_remaining` seconds (at most half of the
+    dataset's TTL, so a fresh entry is never due) are refetched, the soonest to expire first.
+    Progress lives in the cache itself, so an interrupted run picks up where it stopped:
+    entries it already refreshed are no longer due.
+    """
+
+    def __init__(self, cache, datasets=WARM_DATASETS, rate=1.0, min_remaining=60 * 60, ttls=None, symbols=None):
+        self.cache = cache
+        self.datasets = datasets
+        self.rate = rate  # Downloads per second
+        self.min_remaining = min_remaining
+        self.ttls = dict(DATASET_TTLS)
+        self.ttls.update(ttls or {})
+        # Entries count as stale `min_remaining` seconds early, so the fetcher refreshes them
+        self.fetcher = DataFetcher(
+            ttls={dataset: self._ttl(dataset) - self._min_remaining(dataset) for dataset in datasets},
+            symbols=symbols,
+            shared_cache=cache,
+        )
+
+    def _ttl(self, dataset):
+        return self.ttls.get(dataset, DEFAULT_TTL)
+
+    def _min_remaining(self, dataset):
+        return min(self.min_remaining, self._ttl(dataset) / 2)
+
+    def _fetched(self, tickers):
+        universe = set(tickers)
+        return {(ticker, dataset): fetched_at for ticker, dataset, fetched_at in self.cache.entries() if ticker in universe}
+
+    def plan(self, tickers, now=None):
+        """Returns the (ticker, dataset) pairs due, missing ones first, then by expiry."""
+        now = now or time.time()
+        fetched = self._fetched(tickers)
+        due = []
+        for ticker in tickers:
+            for dataset in self.datasets:
+                fetched_at = fetched.get((ticker, dataset))
+                expires = fetched_at + self._ttl(dataset) if fetched_at is not None else 0.0
+                if expires - now < self._min_remaining(dataset):
+                    due.append((expires, ticker, dataset))
+        due.sort()
+        return [(ticker, dataset) for _, ticker, dataset in due]
+
+    def run(self, tickers):
+        """Warms every due entry and returns (warmed count, {"ticker/dataset": error})."""
+        warmed = 0
+        failed = {}
+        interval = 1.0 / self.rate if self.rate else 0.0
+        next_slot = time.monotonic()
+        for ticker, dataset in self.plan(tickers):
+            time.sleep(max(next_slot - time.monotonic(), 0.0))
+            next_slot = time.monotonic() + interval
+            try:
+                self.fetcher.get(ticker, dataset)
+                warmed += 1
+            except Exception as e:
+                failed[f"{ticker}/{dataset}"] = str(e)
+            self.fetcher.invalidate(ticker)  # Values live in the shared cache, not in this process
+        return warmed, failed
+
+    def coverage(self, tickers, now=None):
+        """Per dataset: tickers with a fresh, expired or missing entry, and the age of cached entries in hours."""
+        now = now or time.time()
+        fetched = self._fetched(tickers)
+        report = {}
+        for dataset in self.datasets:
+            ages = [now - fetched[(ticker, dataset)] for ticker in tickers if (ticker, dataset) in fetched]
+            fresh = sum(age < self._ttl(dataset) for age in ages)
+            report[dataset] = {
+                "fresh": fresh,
+                "expired": len(ages) - fresh,
+                "missing": len(tickers) - len(ages),
+                "coverage": fresh / len(tickers) if tickers else None,
+                "median_age_hours": round(statistics.median(ages) / 3600, 2) if ages else None,
+                "max_age_hours": round(max(ages) / 3600, 2) if ages else None,
+            }
+        return report
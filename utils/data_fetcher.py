@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+from utils.shared_cache import SharedCache
+from utils.symbols import SymbolIndex, InvalidTickerError
+from utils.tracing import span
+
+# How long a fetched dataset is reused before it is downloaded again (seconds)
+DATASET_TTLS = {
+    "info": 15 * 60,
+    "balance_sheet": 24 * 60 * 60,
+    "financials": 24 * 60 * 60,
+    "quarterly_balance_sheet": 24 * 60 * 60,
+    "quarterly_financials": 24 * 60 * 60,
+}
+DEFAULT_TTL = 60 * 60
+# How long a symbol whose info came back empty (delisted, mistyped) is rejected without refetching
+NEGATIVE_TTL = 6 * 60 * 60
+# Path of a SharedCache database the default fetcher uses, so separate processes share downloads
+SHARED_CACHE_ENV = "STOCK_RATIOS_CACHE"
+
+
+def _is_empty_info(info):
+    # yfinance returns a (near) empty dict such as {'trailingPegRatio': None} for unknown symbols
+    return not info or len(info) <= 1
+
+
+class _InFlight:
+    """A download in progress that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class DataFetcher:
+    """
+    Downloads yfinance datasets per (ticker, dataset) and caches them in memory for a TTL.
+
+    Concurrent requests for the same (ticker, dataset) are coalesced: the first caller
+    downloads, the others wait for and share its result (or its exception).
+
+    Malformed tickers are rejected by the symbol index before any I/O, and symbols whose
+    info came back empty are negatively cached for `negative_ttl` seconds; both raise
+    InvalidTickerError.
+
+    With a `planner` (utils.refresh_planner.RefreshPlanner), statements are only downloaded
+    when the planner expects a new filing and are otherwise served from its stored copy.
+
+    With a `shared_cache` (utils.shared_cache.SharedCache), misses in memory are looked up in
+    the cache shared with other processes before downloading, under the same TTLs, and only
+    one process downloads a given (ticker, dataset) at a time.
+    """
+
+    def __init__(self, ttls=None, symbols=None, negative_ttl=NEGATIVE_TTL, planner=None, shared_cache=None):
+        self.ttls = dict(DATASET_TTLS)
+        self.ttls.update(ttls or {})
+        self.symbols = symbols or SymbolIndex()
+        self.negative_ttl = negative_ttl
+        self.planner = planner
+        self.shared_cache = shared_cache
+        self._cache = {}
+        self._empty_symbols = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _download(self, ticker, dataset):
+        import yfinance as yf  # Imported on first download; pulls in pandas
+        return getattr(yf.Ticker(ticker), dataset)
+
+    def _load(self, ticker, dataset):
+        """Returns (value, source, fetched_at) where source is "shared", "stored" or "download"."""
+        if self.shared_cache is None:
+            return self._load_upstream(ticker, dataset) + (time.time(),)
+        loaded = {}
+
+        def download():
+            loaded["value"], loaded["source"] = self._load_upstream(ticker, dataset)
+            return loaded["value"]
+
+        def cacheable(value):
+            return dataset != "info" or not _is_empty_info(value)  # Rejected below, negatively cached in memory only
+
+        value, fetched_at = self.shared_cache.fetch(ticker, dataset, self._ttl(dataset), download, cacheable)
+        return value, loaded.get("source", "shared"), fetched_at
+
+    def _load_upstream(self, ticker, dataset):
+        planner = self.planner
+        if planner is None or not planner.manages(dataset):
+            return self._download(ticker, dataset), "download"
+        if not planner.due(ticker, dataset):
+            stored = planner.stored(ticker, dataset)
+            if stored is not None:
+                return stored, "stored"
+        value = self._download(ticker, dataset)
+        planner.record(ticker, dataset, value)
+        return value, "download"
+
+    def _ttl(self, dataset):
+        return self.ttls.get(dataset, DEFAULT_TTL)
+
+    def get(self, ticker, dataset):
+        """Returns the dataset (e.g. "info", "balance_sheet", "financials") for a ticker."""
+        with span("fetch", ticker=ticker, dataset=dataset) as current:
+            value, source = self._get(ticker, dataset)
+            if current.recording:
+                current.set_attribute("cache", source)
+                current.set_attribute("cache.hit", source not in ("download", "coalesced"))
+                current.set_attribute("payload.rows", len(value) if hasattr(value, "__len__") else None)
+            return value
+
+    def _get(self, ticker, dataset):
+        """Returns (value, source), source being "memory", "coalesced" (waited on another caller) or one of _load's."""
+        self.symbols.validate(ticker)
+        expires = self._empty_symbols.get(ticker)
+        if expires is not None and time.time() < expires:
+            raise InvalidTickerError(f"{ticker}: No data available upstream (symbol may be delisted or mistyped)")
+
+        key = (ticker, dataset)
+        entry = self._cache.get(key)
+        if entry is not None and time.time() - entry[0] < self._ttl(dataset):
+            return entry[1], "memory"
+
+        with self._lock:
+            entry = self._cache.get(key)  # Another caller may have just finished downloading it
+            if entry is not None and time.time() - entry[0] < self._ttl(dataset):
+                return entry[1], "memory"
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, "coalesced"
+
+        try:
+            call.value, source, fetched_at = self._load(ticker, dataset)
+            if dataset == "info" and _is_empty_info(call.value):
+                self._empty_symbols[ticker] = time.time() + self.negative_ttl
+                raise InvalidTickerError(f"{ticker}: No data available upstream (symbol may be delisted or mistyped)")
+            with self._lock:
+                self._cache[key] = (fetched_at, call.value)  # Shared entries keep their age, not a fresh TTL
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+        return call.value, source
+
+    def invalidate(self, ticker=None, dataset=None):
+        """Drops in-memory entries matching the ticker and/or dataset (all entries if neither is given)."""
+        with self._lock:
+            if dataset is None or dataset == "info":
+                for symbol in list(self._empty_symbols):
+                    if ticker is None or symbol == ticker:
+                        del self._empty_symbols[symbol]
+            for key in list(self._cache):
+                if (ticker is None or key[0] == ticker) and (dataset is None or key[1] == dataset):
+                    del self._cache[key]
+
+
+default_fetcher = DataFetcher(
+    shared_cache=SharedCache(os.environ[SHARED_CACHE_ENV]) if os.environ.get(SHARED_CACHE_ENV) else None
+)
+
+
+def fetch_dataset(ticker, dataset):
+    """Fetches a dataset for a ticker through the shared default fetcher."""
+    return default_fetcher.get(ticker, dataset)
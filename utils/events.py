@@ -0,0 +1,123 @@
+import contextlib
+import contextvars
+import json
+import sys
+import threading
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+QUIET = 100
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "quiet": QUIET}
+LEVEL_NAMES = {value: name.upper() for name, value in LEVELS.items()}
+
+# Distinct (event, fields) keys aggregated before further ones are only counted per event name
+MAX_AGGREGATES = 10000
+
+_ticker = contextvars.ContextVar("event_ticker", default=None)
+
+
+class EventSink:
+    """
+    Levelled, sampled event output with per-event aggregation.
+
+    Events below `level` are dropped. Of the rest, the first `sample_first` of each event name
+    are written, then one in every `sample_every`; all of them are counted per (event, fields)
+    along with the distinct tickers they occurred for, so summary() can report e.g. that an
+    alias was used for 340 tickers while only a handful of lines were written.
+    """
+
+    def __init__(self, level=WARNING, stream=None, json_lines=False, sample_first=5, sample_every=1000):
+        self.level = level
+        self.stream = stream or sys.stderr
+        self.json_lines = json_lines
+        self.sample_first = sample_first
+        self.sample_every = sample_every
+        self._seen = {}  # event name -> occurrences
+        self._aggregates = {}  # (level, event, fields) -> [count, tickers]
+        self._lock = threading.Lock()
+
+    def record(self, level, event, ticker, fields):
+        key = (level, event, tuple(sorted(fields.items())))
+        with self._lock:
+            seen = self._seen[event] = self._seen.get(event, 0) + 1
+            aggregate = self._aggregates.get(key)
+            if aggregate is None:
+                if len(self._aggregates) >= MAX_AGGREGATES:
+                    key = (level, event, ())
+                aggregate = self._aggregates.setdefault(key, [0, set()])
+            aggregate[0] += 1
+            if ticker is not None:
+                aggregate[1].add(ticker)
+        if seen <= self.sample_first or (self.sample_every and seen % self.sample_every == 0):
+            self.write(level, event, ticker, fields, seen)
+
+    def write(self, level, event, ticker, fields, seen):
+        if self.json_lines:
+            line = json.dumps({"time": time.time(), "level": LEVEL_NAMES.get(level, level), "event": event, "ticker": ticker, "occurrence": seen, **fields}, default=str)
+        else:
+            details = " ".join(f"{key}={value}" for key, value in fields.items())
+            line = f"{LEVEL_NAMES.get(level, level)} {event}" + (f" [{ticker}]" if ticker else "") + (f" {details}" if details else "")
+            if seen > self.sample_first:
+                line += f" (occurrence {seen})"
+        self.stream.write(line + "\n")
+
+    def summary(self):
+        """Every recorded (event, fields) with its count and number of distinct tickers, most frequent first."""
+        with self._lock:
+            rows = [
+                {"level": LEVEL_NAMES.get(level, level), "event": event, "fields": dict(fields), "count": count, "tickers": len(tickers)}
+                for (level, event, fields), (count, tickers) in self._aggregates.items()
+            ]
+        return sorted(rows, key=lambda row: -row["count"])
+
+    def write_summary(self):
+        """Writes the aggregate of every event that was sampled away."""
+        for row in self.summary():
+            if self._seen.get(row["event"], 0) <= self.sample_first:
+                continue
+            if self.json_lines:
+                self.stream.write(json.dumps({"summary": True, **row}, default=str) + "\n")
+            else:
+                details = " ".join(f"{key}={value}" for key, value in row["fields"].items())
+                self.stream.write(f"{row['level']} {row['event']}" + (f" {details}" if details else "") + f": {row['count']} times for {row['tickers']} tickers\n")
+
+
+_sink = EventSink()
+_level = _sink.level
+
+
+def configure(level=WARNING, stream=None, json_lines=False, sample_first=5, sample_every=1000):
+    """Replaces the process-wide sink; level=QUIET turns events off."""
+    global _sink, _level
+    _sink = EventSink(level, stream, json_lines, sample_first, sample_every)
+    _level = level
+    return _sink
+
+
+def sink():
+    return _sink
+
+
+def enabled(level):
+    """Whether an event at `level` would be recorded, to skip building costly fields."""
+    return level >= _level
+
+
+def emit(level, event, ticker=None, **fields):
+    """Records an event; the ticker defaults to the one bound by ticker_scope()."""
+    if level < _level:
+        return
+    _sink.record(level, event, ticker or _ticker.get(), fields)
+
+
+@contextlib.contextmanager
+def ticker_scope(ticker):
+    """Attributes events emitted inside the block (on this thread or context) to a ticker."""
+    token = _ticker.set(ticker)
+    try:
+        yield
+    finally:
+        _ticker.reset(token)
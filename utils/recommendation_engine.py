@@ -1,32 +1,38 @@
+# Default metric weights per category (engines add those of registered plugin metrics)
+DEFAULT_WEIGHTS = {
+    "Valuation": {
+        "P/E Ratio": 0.25,
+        "PEG Ratio": 0.1,
+        "P/S Ratio": 0.2,
+        "P/B Ratio": 0.25,
+        "Dividend Yield": 0.1,
+        "Dividend Payout": 0.1
+    },
+    "Profitability": {
+        "ROA": 0.3,
+        "ROE": 0.4,
+        "Net Profit Margin": 0.3
+    },
+    "Liquidity": {
+        "Current Ratio": 0.5,
+        "Quick Ratio": 0.5
+    },
+    "Debt": {
+        "Debt-to-Equity Ratio": 0.5,
+        "Interest Coverage Ratio": 0.5
+    },
+    "Efficiency": {
+        "Asset Turnover Ratio": 1.0
+    }
+}
+
 class RecommendationEngine:
     def __init__(self, weights=None, thresholds=None):
         """Initializes the RecommendationEngine with weights and thresholds."""
-        self.weights = weights or {
-            "Valuation": {
-                "P/E Ratio": 0.25,
-                "PEG Ratio": 0.1,
-                "P/S Ratio": 0.2,
-                "P/B Ratio": 0.25,
-                "Dividend Yield": 0.1,
-                "Dividend Payout": 0.1
-            },
-            "Profitability": {
-                "ROA": 0.3,
-                "ROE": 0.4,
-                "Net Profit Margin": 0.3
-            },
-            "Liquidity": {
-                "Current Ratio": 0.5,
-                "Quick Ratio": 0.5
-            },
-            "Debt": {
-                "Debt-to-Equity Ratio": 0.5,
-                "Interest Coverage Ratio": 0.5
-            },
-            "Efficiency": {
-                "Asset Turnover Ratio": 1.0
-            }
-        }
+        if not weights:
+            from stock_ratios.metrics import default_weights  # Includes registered plugin metrics
+            weights = default_weights()
+        self.weights = weights
         self.thresholds = thresholds or {
             "Buy": 70,
             "Hold": 40,
@@ -35,10 +41,13 @@ class RecommendationEngine:
 
     def calculate_metric_score(self, metric_data):
         """Calculates a score (0-100) for a single metric."""
-        if not metric_data or "recommendation" not in metric_data or metric_data["recommendation"] == "Data Unavailable":
+        if not metric_data:
             return 0  # Handle cases where metric_data is None or empty
 
-        recommendation = metric_data["recommendation"]
+        # Valuation metrics use "recommendation", the other categories "Recommendation"
+        recommendation = metric_data.get("recommendation", metric_data.get("Recommendation"))
+        if recommendation is None or recommendation == "Data Unavailable":
+            return 0
         if recommendation == "Buy":
             return 100
         elif recommendation == "Hold":
@@ -70,10 +79,17 @@ class RecommendationEngine:
         """Calculates the overall weighted score, handling missing categories."""
         if not analysis_results: #Handle if analysis_results is empty
             return 0
+        category_scores = {
+            category: self.calculate_category_score(category_data, category)
+            for category, category_data in analysis_results.items()
+        }
+        return self.combine_category_scores(category_scores)
+
+    def combine_category_scores(self, category_scores):
+        """Combines already computed category scores into the overall weighted score."""
         overall_score = 0
         total_weight_used = 0
-        for category, category_data in analysis_results.items():
-            category_score = self.calculate_category_score(category_data, category)
+        for category, category_score in category_scores.items():
             category_weight = sum(self.weights.get(category, {}).values())
             if category_score != 0:
                 overall_score += category_score * category_weight
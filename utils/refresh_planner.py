@@ -0,0 +1,143 @@
+import csv
+import datetime
+import json
+import os
+import pickle
+import statistics
+
+# Datasets that only change when results are published; everything else follows the fetcher TTLs
+STATEMENT_DATASETS = ("balance_sheet", "financials", "quarterly_balance_sheet", "quarterly_financials")
+# Expected days between period ends until enough history is seen to learn a ticker's cadence
+DEFAULT_CADENCE_DAYS = {
+    "balance_sheet": 365,
+    "financials": 365,
+    "quarterly_balance_sheet": 91,
+    "quarterly_financials": 91,
+}
+# Statements for a period are usually filed between these many days after the period end
+FILING_WINDOW_DAYS = (20, 90)
+# How often a ticker whose filing is expected but not seen yet is rechecked
+RECHECK_DAYS = 7
+# Statements older than this are refetched regardless, as a safety net for missed filings
+MAX_AGE_DAYS = 120
+
+
+def _date(value):
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def period_ends(statement):
+    """Period end dates of a yfinance statement (its columns), newest first; empty for other shapes."""
+    columns = getattr(statement, "columns", None)
+    if columns is None:
+        return []
+    ends = []
+    for column in columns:
+        try:
+            ends.append(_date(column))
+        except ValueError:
+            continue
+    return sorted(ends, reverse=True)
+
+
+def load_calendar(path):
+    """Reads a "ticker,date" CSV of expected results announcements into {ticker: [dates]}."""
+    calendar = {}
+    with open(path) as f:
+        for row in csv.DictReader(f):
+            calendar.setdefault(row["ticker"].strip(), []).append(_date(row["date"].strip()))
+    for dates in calendar.values():
+        dates.sort()
+    return calendar
+
+
+class RefreshPlanner:
+    """
+    Decides when a ticker's statements are worth refetching, and keeps the last copy on disk.
+
+    Per (ticker, dataset) it records when the statement was fetched and the period ends it
+    contained. A refetch is due when the ticker is new, an announcement from the calendar has
+    passed since the last fetch, the next period's filing window (learned from the spacing of
+    past period ends) is open and the last check is RECHECK_DAYS old, or the copy is older
+    than MAX_AGE_DAYS. Once the window has closed without a new period, only the calendar
+    and MAX_AGE_DAYS trigger a refetch. Otherwise the stored statement is reused.
+    """
+
+    def __init__(self, directory, calendar=None):
+        self.directory = directory
+        self.calendar = calendar or {}
+        self.state_path = os.path.join(directory, "state.json")
+        os.makedirs(os.path.join(directory, "statements"), exist_ok=True)
+        self.state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+
+    def manages(self, dataset):
+        return dataset in STATEMENT_DATASETS
+
+    def _key(self, ticker, dataset):
+        return f"{ticker}/{dataset}"
+
+    def _statement_path(self, ticker, dataset):
+        return os.path.join(self.directory, "statements", f"{ticker}.{dataset}.pickle")
+
+    def cadence_days(self, ticker, dataset):
+        """Median spacing of the period ends seen for a ticker, or the dataset default."""
+        entry = self.state.get(self._key(ticker, dataset)) or {}
+        ends = sorted(_date(end) for end in entry.get("period_ends", []))
+        gaps = [(later - earlier).days for earlier, later in zip(ends, ends[1:]) if later > earlier]
+        return statistics.median(gaps) if gaps else DEFAULT_CADENCE_DAYS.get(dataset, 365)
+
+    def due(self, ticker, dataset, today=None):
+        """Returns the reason a refetch is due ("new", "calendar", "filing window", "max age") or None."""
+        today = today or datetime.date.today()
+        entry = self.state.get(self._key(ticker, dataset))
+        if entry is None or not os.path.exists(self._statement_path(ticker, dataset)):
+            return "new"
+        fetched = _date(entry["fetched"])
+        if (today - fetched).days >= MAX_AGE_DAYS:
+            return "max age"
+        if any(fetched < announced <= today for announced in self.calendar.get(ticker, ())):
+            return "calendar"
+        if entry.get("period_end"):
+            expected_end = _date(entry["period_end"]) + datetime.timedelta(days=self.cadence_days(ticker, dataset))
+            window_opens = expected_end + datetime.timedelta(days=FILING_WINDOW_DAYS[0])
+            window_closes = expected_end + datetime.timedelta(days=FILING_WINDOW_DAYS[1])
+            if window_opens <= today <= window_closes and (today - fetched).days >= RECHECK_DAYS:
+                return "filing window"
+        return None
+
+    def plan(self, tickers, datasets=("balance_sheet", "financials"), today=None):
+        """Returns {dataset: [tickers due]} for a universe."""
+        return {dataset: [ticker for ticker in tickers if self.due(ticker, dataset, today)] for dataset in datasets}
+
+    def stored(self, ticker, dataset):
+        """The last stored statement, or None."""
+        try:
+            with open(self._statement_path(ticker, dataset), "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def record(self, ticker, dataset, statement, today=None):
+        """Stores a freshly fetched statement and the period ends it contains."""
+        path = self._statement_path(ticker, dataset)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(statement, f)
+        os.replace(tmp_path, path)
+
+        key = self._key(ticker, dataset)
+        entry = self.state.get(key) or {"period_ends": []}
+        seen = set(entry["period_ends"]) | {end.isoformat() for end in period_ends(statement)}
+        entry["period_ends"] = sorted(seen, reverse=True)[:12]  # Enough history to learn the cadence
+        entry["period_end"] = entry["period_ends"][0] if entry["period_ends"] else None
+        entry["fetched"] = (today or datetime.date.today()).isoformat()
+        self.state[key] = entry
+
+    def save(self):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
@@ -0,0 +1,129 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: no cross-process single-flight there
+    fcntl = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    ticker TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (ticker, dataset)
+) WITHOUT ROWID;
+"""
+
+
+class _FileLock:
+    """Exclusive flock on a lock file, polled so waiting gives up after a timeout."""
+
+    def __init__(self, path, timeout, poll_interval=0.05):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.file = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return self
+        self.file = open(self.path, "a")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return self
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    # The holder is stuck; fetch anyway rather than stall this process
+                    self.file.close()
+                    self.file = None
+                    return self
+                time.sleep(self.poll_interval)
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+
+class SharedCache:
+    """
+    Dataset cache shared by every process on a machine, in a SQLite database in WAL mode.
+
+    Readers never block each other or the writer, and each entry is replaced in a single
+    transaction. fetch() adds cross-process single-flight: the process that takes a
+    (ticker, dataset) lock file downloads, the others wait on the lock and then read its
+    entry instead of downloading again.
+    """
+
+    def __init__(self, path, lock_dir=None, lock_timeout=120):
+        self.path = path
+        self.lock_dir = lock_dir or f"{path}.locks"
+        self.lock_timeout = lock_timeout
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=60)  # One per thread
+        return conn
+
+    def _lock(self, ticker, dataset):
+        return _FileLock(os.path.join(self.lock_dir, f"{ticker}.{dataset}.lock"), self.lock_timeout)
+
+    def get(self, ticker, dataset, max_age=None):
+        """Returns (value, fetched_at), or None if missing or older than `max_age` seconds."""
+        row = self._connection().execute(
+            "SELECT fetched_at, payload FROM datasets WHERE ticker = ? AND dataset = ?", (ticker, dataset)
+        ).fetchone()
+        if row is None or (max_age is not None and time.time() - row[0] >= max_age):
+            return None
+        return pickle.loads(row[1]), row[0]
+
+    def put(self, ticker, dataset, value, fetched_at=None):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?)",
+                (ticker, dataset, fetched_at or time.time(), payload),
+            )
+
+    def fetch(self, ticker, dataset, max_age, download, cacheable=None):
+        """
+        Returns (value, fetched_at) of a fresh cached value, or downloads it, with only one process
+        downloading at a time. Downloaded values failing `cacheable(value)` are returned but not stored.
+        """
+        entry = self.get(ticker, dataset, max_age)
+        if entry is not None:
+            return entry
+        with self._lock(ticker, dataset):
+            entry = self.get(ticker, dataset, max_age)  # Filled by the process we waited on
+            if entry is not None:
+                return entry
+            fetched_at = time.time()
+            value = download()
+            if cacheable is None or cacheable(value):
+                self.put(ticker, dataset, value, fetched_at)
+            return value, fetched_at
+
+    def entries(self):
+        """Returns [(ticker, dataset, fetched_at)] for every cached entry."""
+        return self._connection().execute("SELECT ticker, dataset, fetched_at FROM datasets").fetchall()
+
+    def invalidate(self, ticker=None, dataset=None):
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM datasets WHERE (? IS NULL OR ticker = ?) AND (? IS NULL OR dataset = ?)",
+                (ticker, ticker, dataset, dataset),
+            )
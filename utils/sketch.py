@@ -0,0 +1,99 @@
+import math
+import random
+
+
+class KLLSketch:
+    """
+    Mergeable streaming quantile sketch (Karnin, Lang and Liberty's KLL).
+
+    Values go into a stack of compactors; when the stack is full the lowest full compactor is
+    sorted and every other item (random offset) is promoted a level up with twice the weight.
+    Memory stays around 3 * k items regardless of the stream length, updates are amortized
+    O(log n), and rank error is roughly 1.7 / k. Sketches built separately (per worker, per
+    time window) merge into one describing the combined stream.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.compactors = [[]]
+        self.size = 0
+        self.max_size = self._capacity(0)
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * (2.0 / 3.0) ** depth)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self.max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def _compress(self):
+        for level, items in enumerate(self.compactors):
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self._grow()
+                items.sort()
+                kept = [items.pop()] if len(items) % 2 else []
+                self.compactors[level + 1].extend(items[self._rng.random() < 0.5::2])
+                self.compactors[level] = kept
+                self.size = sum(len(compactor) for compactor in self.compactors)
+                return
+
+    def update(self, value):
+        """Adds a value (NaN is ignored)."""
+        if value != value:
+            return
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.compactors[0].append(value)
+        self.size += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+    def merge(self, other):
+        """Folds another sketch into this one."""
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.size = sum(len(compactor) for compactor in self.compactors)
+        while self.size >= self.max_size:
+            self._compress()
+        return self
+
+    def quantiles(self, fractions):
+        """Approximate values at the given fractions (0..1), or Nones for an empty sketch."""
+        if not self.count:
+            return [None] * len(fractions)
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self.compactors) for value in items)
+        total = sum(weight for _, weight in weighted)
+        results = []
+        for fraction in fractions:
+            if fraction <= 0:
+                results.append(self.min)
+                continue
+            if fraction >= 1:
+                results.append(self.max)
+                continue
+            target = fraction * total
+            cumulative = 0
+            for value, weight in weighted:
+                cumulative += weight
+                if cumulative >= target:
+                    results.append(value)
+                    break
+        return results
+
+    def quantile(self, fraction):
+        return self.quantiles([fraction])[0]
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,79 @@
+import re
+
+# Exchange suffix rules from the README's ticker format section. Yahoo Finance itself uses
+# ".BO" for the Bombay Stock Exchange, so it is accepted alongside ".BS".
+EXCHANGE_SUFFIXES = {
+    "NS": re.compile(r"^[A-Z0-9][A-Z0-9&\-]{0,19}$"),  # e.g. RELIANCE.NS, M&M.NS, BAJAJ-AUTO.NS
+    "BS": re.compile(r"^[A-Z0-9][A-Z0-9&\-]{0,19}$"),  # e.g. TATAMOTORS.BS
+    "BO": re.compile(r"^[A-Z0-9][A-Z0-9&\-]{0,19}$"),  # e.g. TATAMOTORS.BO, 500325.BO
+}
+US_SYMBOL = re.compile(r"^[A-Z]{1,5}(-[A-Z]{1,2})?$")  # e.g. AAPL, BRK-B
+# Other Yahoo Finance exchanges only get a shape check, e.g. VOD.L, SHOP.TO, 7203.T, 0700.HK
+OTHER_EXCHANGE_SYMBOL = re.compile(r"^[A-Z0-9][A-Z0-9&\-]{0,19}$")
+EXCHANGE_SUFFIX = re.compile(r"^[A-Z]{1,3}$")
+INDEX_SYMBOL = re.compile(r"^\^[A-Z0-9][A-Z0-9.\-]{0,19}$")  # e.g. ^NSEI, ^GSPC, ^N225
+
+
+class InvalidTickerError(ValueError):
+    """Raised for tickers rejected before (or instead of) fetching any data."""
+
+
+class SymbolIndex:
+    """
+    Offline ticker validation: exchange suffix rules plus an optional list of known symbols.
+
+    Indian (.NS/.BS/.BO) and US symbols follow the README's rules; other Yahoo Finance
+    exchange suffixes and ^ index symbols are only checked for shape.
+    """
+
+    def __init__(self, known_symbols=None):
+        self.known_symbols = {symbol.strip().upper() for symbol in known_symbols} if known_symbols else None
+        self._valid = set()
+
+    @classmethod
+    def from_file(cls, path):
+        """Loads known symbols from a file with one ticker per line."""
+        with open(path) as f:
+            return cls(line.split("#", 1)[0] for line in f if line.split("#", 1)[0].strip())
+
+    def check(self, ticker):
+        """Returns the reason a ticker is rejected, or None if it looks valid."""
+        if not isinstance(ticker, str) or not ticker.strip():
+            return "Ticker is empty"
+        symbol = ticker.strip().upper()
+        if symbol.startswith("^"):
+            if not INDEX_SYMBOL.match(symbol):
+                return f"Malformed index symbol '{symbol}'"
+        elif "." in symbol:
+            base, suffix = symbol.rsplit(".", 1)
+            if not EXCHANGE_SUFFIX.match(suffix):
+                return f"Malformed exchange suffix '.{suffix}' (use .NS or .BS for Indian stocks, none for US stocks)"
+            rule = EXCHANGE_SUFFIXES.get(suffix, OTHER_EXCHANGE_SYMBOL)
+            if not rule.match(base):
+                return f"Malformed symbol '{base}' for exchange '.{suffix}'"
+        elif not US_SYMBOL.match(symbol):
+            return f"Malformed US ticker '{symbol}'"
+        if self.known_symbols is not None and symbol not in self.known_symbols:
+            return f"'{symbol}' is not in the known symbols list"
+        return None
+
+    def validate(self, ticker):
+        """Raises InvalidTickerError unless the ticker passes the offline checks."""
+        if ticker in self._valid:
+            return
+        reason = self.check(ticker)
+        if reason is not None:
+            raise InvalidTickerError(f"{ticker}: {reason}")
+        self._valid.add(ticker)
+
+    def split(self, tickers):
+        """Splits tickers into (valid, {ticker: reason}) without any I/O."""
+        valid = []
+        rejected = {}
+        for ticker in tickers:
+            reason = self.check(ticker)
+            if reason is None:
+                valid.append(ticker)
+            else:
+                rejected[ticker] = reason
+        return valid, rejected
@@ -0,0 +1,209 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import urllib.request
+from utils import events
+
+# OTLP span kind and status codes
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_ERROR = 2
+
+_current = contextvars.ContextVar("current_span", default=None)
+_tracer = None
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}  # OTLP JSON encodes 64-bit integers as strings
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+class _NoopSpan:
+    """Returned while tracing is off, so instrumented code costs one call and a global lookup."""
+
+    recording = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    recording = True
+
+    def __init__(self, tracer, name, attributes):
+        parent = _current.get()
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.start = None
+        self.end = None
+        self.error = None
+        self._token = None
+
+    def __enter__(self):
+        self.tracer._opened(self)
+        self.start = time.time_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.time_ns()
+        if exc is not None:
+            self.error = exc
+        _current.reset(self._token)
+        self.tracer._closed(self)
+        return False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": [_attribute(key, value) for key, value in self.attributes.items() if value is not None],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            span["status"] = {"code": STATUS_CODE_ERROR, "message": f"{type(self.error).__name__}: {self.error}"}
+        return span
+
+
+class Tracer:
+    """
+    Collects finished spans per trace and exports a trace once all of its spans have ended.
+
+    Spans ending on other threads (e.g. concurrent fetches) join their parent's trace when
+    the thread was started in a copy of the caller's context (contextvars.copy_context()).
+    """
+
+    def __init__(self, exporter, service_name="stock-ratios"):
+        self.exporter = exporter
+        self.service_name = service_name
+        self._finished = {}  # trace id -> finished spans
+        self._open = {}  # trace id -> spans still running
+        self._lock = threading.Lock()
+
+    def _opened(self, span):
+        with self._lock:
+            self._open[span.trace_id] = self._open.get(span.trace_id, 0) + 1
+
+    def _closed(self, span):
+        with self._lock:
+            self._finished.setdefault(span.trace_id, []).append(span)
+            self._open[span.trace_id] -= 1
+            if self._open[span.trace_id]:
+                return
+            del self._open[span.trace_id]
+            spans = self._finished.pop(span.trace_id)
+        self._export(spans)
+
+    def _export(self, spans):
+        self.exporter.export({
+            "resourceSpans": [{
+                "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": "stock_ratios"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        })
+
+    def flush(self):
+        """Exports the finished spans of traces that still have spans running."""
+        with self._lock:
+            pending = [spans for spans in self._finished.values() if spans]
+            self._finished = {}
+        for spans in pending:
+            self._export(spans)
+
+
+class FileExporter:
+    """Appends one OTLP/JSON ExportTraceServiceRequest per trace to a JSON-lines file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, request):
+        line = json.dumps(request) + "\n"
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+
+
+class CollectorExporter:
+    """POSTs each trace to an OTLP/HTTP JSON endpoint, e.g. http://localhost:4318/v1/traces."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def export(self, request):
+        http_request = urllib.request.Request(
+            self.url,
+            data=json.dumps(request).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=self.timeout):
+                pass
+        except OSError as e:
+            events.emit(events.ERROR, "trace_export_failed", url=self.url, error=str(e))
+
+
+def exporter_for(target):
+    """A CollectorExporter for http(s) URLs, otherwise a FileExporter."""
+    if target.startswith(("http://", "https://")):
+        return CollectorExporter(target)
+    return FileExporter(target)
+
+
+def configure(exporter, service_name="stock-ratios"):
+    """Turns tracing on for the whole process."""
+    global _tracer
+    _tracer = Tracer(exporter, service_name)
+    return _tracer
+
+
+def shutdown():
+    """Exports whatever is still buffered and turns tracing off."""
+    global _tracer
+    if _tracer is not None:
+        _tracer.flush()
+    _tracer = None
+
+
+def span(name, **attributes):
+    """Context manager timing a stage as a child of the current span; a shared no-op while tracing is off."""
+    if _tracer is None:
+        return _NOOP_SPAN
+    return Span(_tracer, name, attributes)
+
+
+def current_span():
+    """The innermost running span, or the no-op span."""
+    return _current.get() or _NOOP_SPAN
@@ -0,0 +1,11 @@
+def load_tickers(path):
+    """Reads a universe/watchlist file with one ticker per line, skipping blanks, comments and duplicates."""
+    tickers = []
+    seen = set()
+    with open(path) as f:
+        for line in f:
+            ticker = line.split("#", 1)[0].strip()
+            if ticker and ticker not in seen:
+                seen.add(ticker)
+                tickers.append(ticker)
+    return tickers